@@ -2,7 +2,8 @@
 Admin Panel Forms
 """
 from django import forms
-from core.models import Polla, Evento, Match, Racetrack, League, Team
+from django.db.models import Q
+from core.models import Polla, Evento, Match, Racetrack, League, Team, User
 
 
 class PollaForm(forms.ModelForm):
@@ -95,3 +96,38 @@ class ResultPollaForm(forms.ModelForm):
 class ResultEventoForm(forms.Form):
     """Form for entering evento match results (dynamically generated)"""
     pass
+
+
+class JackpotPayoutForm(forms.Form):
+    """Form for paying a jackpot to one or more winners (equal shares)"""
+    winners = forms.CharField(
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 6, 'placeholder': 'Un email o alias por línea'}),
+        help_text='Un email o alias por línea',
+    )
+    amount = forms.DecimalField(
+        required=False, min_value=0.01, max_digits=10, decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': 'Todo el acumulado'}),
+    )
+    comment = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+
+    def clean_winners(self):
+        """Resolve the lines to users (one query); duplicates are paid once"""
+        names = list(dict.fromkeys(line.strip() for line in self.cleaned_data['winners'].splitlines() if line.strip()))
+        by_email, by_alias = {}, {}
+        for user in User.objects.filter(Q(email__in=names) | Q(alias__in=names)):
+            by_email[user.email] = user
+            by_alias.setdefault(user.alias, []).append(user)
+
+        users, errors = [], []
+        for name in names:
+            if name in by_email:
+                users.append(by_email[name])
+            elif len(by_alias.get(name, [])) == 1:
+                users.append(by_alias[name][0])
+            elif name in by_alias:
+                errors.append(f'{name} (alias repetido, usa el email)')
+            else:
+                errors.append(f'{name} (no existe)')
+        if errors:
+            raise forms.ValidationError(f"Usuarios inválidos: {', '.join(errors)}")
+        return list({user.pk: user for user in users}.values())
@@ -27,6 +27,19 @@ urlpatterns = [
     path('eventos/<int:evento_id>/results/', views.enter_results_evento, name='enter_results_evento'),
     path('eventos/<int:evento_id>/pay/', views.pay_evento, name='pay_evento'),
 
+    # Jackpots (Acumulados)
+    path('jackpots/', views.manage_jackpots, name='manage_jackpots'),
+    path('jackpots/<int:jackpot_id>/pay/', views.pay_jackpot, name='pay_jackpot'),
+
     # User Management (superadmin only)
     path('users/', views.manage_users, name='manage_users'),
+
+    # Reports
+    path('reports/revenue/', views.revenue_report, name='revenue_report'),
+
+    # CSV exports
+    path('pollas/<int:polla_id>/export/', views.export_polla_bets, name='export_polla_bets'),
+    path('eventos/<int:evento_id>/export/', views.export_evento_bets, name='export_evento_bets'),
+    path('ledger/export/', views.export_ledger, name='export_ledger'),
+    path('users/export/', views.export_users, name='export_users'),
 ]
@@ -8,9 +8,20 @@ These replicate the business logic from PHP's func.php:
 - Email notifications
 """
 from decimal import Decimal
-from django.db.models import Sum, Count
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, BinaryField, F
+from django.db.models.functions import Coalesce, Greatest, Substr
 from django.utils import timezone
-from core.models import AccountTransaction, EventTransaction, BetPolla, BetEvento
+from core.archive import polla_bets, evento_bets
+from core import money, packing
+from core.singleflight import single_flight
+from core.subqueries import subquery_count, subquery_max, subquery_sum
+from core.models import (
+    Polla, Evento, AccountTransaction, EventTransaction, BetPolla, BetEvento, BetMatch,
+    BetPollaArchive, BetEventoArchive, LedgerEntry, Jackpot, JackpotPayout
+)
 
 
 def get_polla_winners(polla):
@@ -18,19 +29,16 @@ def get_polla_winners(polla):
     Calculate winners for a polla (replicates PHP's getPremiosbyPolla)
     Returns list of winners with prize amounts
     """
-    # Get all bets ordered by points
-    bets = polla.bets.all().order_by('-pto_tot', 'date_bet')
+    # Pot and participants come from the polla's counters (no ledger scan)
+    num_participants = polla.entries
+    total_pot = polla.pot_total
 
-    if not bets.exists():
+    if not num_participants:
         return []
 
-    # Calculate total pot
-    total_pot = AccountTransaction.objects.filter(
-        polla=polla,
-        tipo='Pote'
-    ).aggregate(total=Sum('qty'))['total'] or Decimal('0.00')
-
-    num_participants = bets.count()
+    # Get all bets ordered by points
+    # (live or archived, see core.archive)
+    bets = polla_bets(polla).select_related('user').order_by('-pto_tot', 'date_bet')
 
     # Prize distribution based on participant count (matches PHP logic)
     if num_participants < 50:
@@ -60,25 +68,36 @@ def get_polla_winners(polla):
             pct = third_place_pct
             place = '3er Lugar'
 
-        # Check for ties
+        # Check for ties: split the prize among tied participants
+        # (in cents, so the shares add up exactly)
         tied_bets = [b for b in top_bets if b.pto_tot == bet.pto_tot]
-        if len(tied_bets) > 1:
-            # Split prize among tied participants
-            prize = (total_pot * pct) / len(tied_bets)
-        else:
-            prize = total_pot * pct
+        shares = money.split(money.percent(money.to_cents(total_pot), pct), len(tied_bets))
+        prize = money.from_cents(shares[tied_bets.index(bet)])
 
         winners.append({
             'user': bet.user,
             'bet': bet,
             'points': bet.pto_tot,
             'place': place,
-            'prize': round(prize, 2)
+            'prize': prize
         })
 
     return winners
 
 
+def cached_polla_winners(polla):
+    """
+    get_polla_winners() shared by concurrent requests (see core/singleflight.py)
+    Keyed on results_version, so new results or a payment are never served stale.
+    """
+    return single_flight(
+        f'results:polla:{polla.id}:v{polla.results_version}',
+        lambda: get_polla_winners(polla),
+        ttl=settings.RESULTS_CACHE_SECONDS,
+        stale_ttl=settings.RESULTS_CACHE_STALE_SECONDS,
+    )
+
+
 def process_polla_payment(polla):
     """
     Process prize payments for a polla (replicates PHP's tblPagarPollas)
@@ -89,38 +108,50 @@ def process_polla_payment(polla):
 
     winners = get_polla_winners(polla)
     now = timezone.now()
-
-    for winner_data in winners:
-        user = winner_data['user']
-        prize = winner_data['prize']
-
-        # Credit user's account
-        AccountTransaction.objects.create(
-            user=user,
-            polla=polla,
-            bet=winner_data['bet'],
-            tipo='Premio',
-            comment=f"Premio {winner_data['place']} - {polla.code4}",
-            qty=prize,
-            trx_date=now
-        )
-
-        # Debit from pot
-        AccountTransaction.objects.create(
-            user_id=1,  # System user
-            polla=polla,
-            tipo='Pote',
-            comment=f"Premio pagado {winner_data['place']} - {polla.code4}",
-            qty=-prize,
-            trx_date=now
-        )
-
-        # Send email notification
-        send_winner_email_polla(user, polla, prize, winner_data['place'])
-
-    # Mark as paid
-    polla.status = 'Paid'
-    polla.save()
+    total_paid = Decimal('0.00')
+
+    with transaction.atomic():
+        for winner_data in winners:
+            user = winner_data['user']
+            prize = winner_data['prize']
+
+            # Credit user's account
+            AccountTransaction.objects.create(
+                user=user,
+                polla=polla,
+                bet=winner_data['bet'],
+                tipo='Premio',
+                comment=f"Premio {winner_data['place']} - {polla.code4}",
+                qty=prize,
+                trx_date=now
+            )
+
+            # Debit from pot
+            AccountTransaction.objects.create(
+                user_id=1,  # System user
+                polla=polla,
+                tipo='Pote',
+                comment=f"Premio pagado {winner_data['place']} - {polla.code4}",
+                qty=-prize,
+                trx_date=now
+            )
+            total_paid += prize
+
+            # Send email notification once the payment is committed
+            transaction.on_commit(
+                lambda user=user, prize=prize, place=winner_data['place']: send_winner_email_polla(user, polla, prize, place)
+            )
+
+        # Keep the pot counter in sync with the Pote debits
+        Polla.objects.filter(pk=polla.pk).update(pot_total=F('pot_total') - total_paid)
+
+        # Mark as paid
+        polla.status = 'Paid'
+        polla.save(update_fields=['status'])
+        polla.bump_results_version()
+
+        # The results page never changes again: pre-render it once
+        transaction.on_commit(lambda: write_results_snapshot(polla))
 
     return True
 
@@ -130,19 +161,16 @@ def get_evento_winners(evento):
     Calculate winners for an evento (replicates PHP's getPremiosbyEvento)
     Returns list of winners with prize amounts
     """
-    # Get all bets ordered by points
-    bets = evento.bets.all().order_by('-puntos', 'date_bet')
+    # Pot and participants come from the evento's counters (no ledger scan)
+    num_participants = evento.entries
+    total_pot = evento.pot_total
 
-    if not bets.exists():
+    if not num_participants:
         return []
 
-    # Calculate total pot
-    total_pot = EventTransaction.objects.filter(
-        evento=evento,
-        tipo='Pote'
-    ).aggregate(total=Sum('qty'))['total'] or Decimal('0.00')
-
-    num_participants = bets.count()
+    # Get all bets ordered by points
+    # (live or archived, see core.archive)
+    bets = evento_bets(evento).select_related('user').order_by('-puntos', 'date_bet')
 
     # Prize distribution (same logic as pollas)
     if num_participants < 50:
@@ -170,22 +198,30 @@ def get_evento_winners(evento):
             place = '3er Lugar'
 
         tied_bets = [b for b in top_bets if b.puntos == bet.puntos]
-        if len(tied_bets) > 1:
-            prize = (total_pot * pct) / len(tied_bets)
-        else:
-            prize = total_pot * pct
+        shares = money.split(money.percent(money.to_cents(total_pot), pct), len(tied_bets))
+        prize = money.from_cents(shares[tied_bets.index(bet)])
 
         winners.append({
             'user': bet.user,
             'bet': bet,
             'points': bet.puntos,
             'place': place,
-            'prize': round(prize, 2)
+            'prize': prize
         })
 
     return winners
 
 
+def cached_evento_winners(evento):
+    """get_evento_winners() shared by concurrent requests (see cached_polla_winners)"""
+    return single_flight(
+        f'results:evento:{evento.id}:v{evento.results_version}',
+        lambda: get_evento_winners(evento),
+        ttl=settings.RESULTS_CACHE_SECONDS,
+        stale_ttl=settings.RESULTS_CACHE_STALE_SECONDS,
+    )
+
+
 def process_evento_payment(evento):
     """
     Process prize payments for an evento (replicates PHP's tblPagarEvento)
@@ -196,109 +232,310 @@ def process_evento_payment(evento):
 
     winners = get_evento_winners(evento)
     now = timezone.now()
+    total_paid = Decimal('0.00')
+
+    with transaction.atomic():
+        for winner_data in winners:
+            user = winner_data['user']
+            prize = winner_data['prize']
+
+            # Credit user's account
+            EventTransaction.objects.create(
+                user=user,
+                evento=evento,
+                bet=winner_data['bet'],
+                tipo='Premio',
+                comment=f"Premio {winner_data['place']} - {evento.name}",
+                qty=prize,
+                trx_date=now
+            )
+
+            # Debit from pot
+            EventTransaction.objects.create(
+                user_id=1,  # System user
+                evento=evento,
+                tipo='Pote',
+                comment=f"Premio pagado {winner_data['place']} - {evento.name}",
+                qty=-prize,
+                trx_date=now
+            )
+            total_paid += prize
+
+            # Send email notification once the payment is committed
+            transaction.on_commit(
+                lambda user=user, prize=prize, place=winner_data['place']: send_winner_email_evento(user, evento, prize, place)
+            )
+
+        # Keep the pot counter in sync with the Pote debits
+        Evento.objects.filter(pk=evento.pk).update(pot_total=F('pot_total') - total_paid)
+
+        # Mark as paid
+        evento.status = 'Paid'
+        evento.save(update_fields=['status'])
+        evento.bump_results_version()
+
+        # The results page never changes again: pre-render it once
+        transaction.on_commit(lambda: write_results_snapshot(evento))
+
+    return True
 
-    for winner_data in winners:
-        user = winner_data['user']
-        prize = winner_data['prize']
-
-        # Credit user's account
-        EventTransaction.objects.create(
-            user=user,
-            evento=evento,
-            bet=winner_data['bet'],
-            tipo='Premio',
-            comment=f"Premio {winner_data['place']} - {evento.name}",
-            qty=prize,
-            trx_date=now
-        )
 
-        # Debit from pot
-        EventTransaction.objects.create(
-            user_id=1,  # System user
-            evento=evento,
-            tipo='Pote',
-            comment=f"Premio pagado {winner_data['place']} - {evento.name}",
-            qty=-prize,
-            trx_date=now
+def process_jackpot_payment(jackpot, users, amount=None, comment=''):
+    """
+    Pay a jackpot (all of it, or `amount`) to `users` in equal shares.
+
+    One atomic batch: a Premio credit per winner and the matching debit of
+    the jackpot's tipo from the system user, bulk inserted together with
+    their ledger rows, then the debits taken off the running total.
+    The jackpot row is locked so concurrent payouts see each other's debits.
+    Returns the JackpotPayout; raises ValueError with the reason otherwise.
+    """
+    if not users:
+        raise ValueError('No hay ganadores seleccionados')
+
+    with transaction.atomic():
+        jackpot = Jackpot.objects.select_for_update().get(pk=jackpot.pk)
+        available = jackpot.total_cents
+        cents = available if amount is None else money.to_cents(amount)
+        if available <= 0:
+            raise ValueError('El acumulado está en cero')
+        if cents <= 0:
+            raise ValueError('El monto debe ser mayor que cero')
+        if cents > available:
+            raise ValueError(f'El monto supera el acumulado disponible (${money.from_cents(available)})')
+
+        now = timezone.now()
+        payout = JackpotPayout.objects.create(
+            jackpot=jackpot, paid_at=now, total_cents=cents, winners=len(users), comment=comment,
         )
+        label = f'{jackpot.name or jackpot.tipo} #{payout.id}'
+        credit_comment = f'Premio acumulado - {label}'
+        debit_comment = f'Acumulado pagado - {label}'
 
-        # Send email notification
-        send_winner_email_evento(user, evento, prize, winner_data['place'])
+        trxs = []
+        for user, share in zip(users, money.split(cents, len(users))):
+            prize = money.from_cents(share)
+            trxs.append(AccountTransaction(user=user, tipo='Premio', comment=credit_comment, qty=prize, trx_date=now))
+            trxs.append(AccountTransaction(user_id=1, tipo=jackpot.tipo, comment=debit_comment, qty=-prize, trx_date=now))
 
-    # Mark as paid
-    evento.status = 'Paid'
-    evento.save()
+        # bulk_create skips AccountTransaction.save(): mirror the ledger rows here
+        AccountTransaction.objects.bulk_create(trxs, batch_size=1000)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL: bulk_create does not set the pks; the comments are unique to this payout
+            trxs = AccountTransaction.objects.filter(comment__in=[credit_comment, debit_comment], trx_date=now)
+        LedgerEntry.objects.bulk_create([LedgerEntry.from_transaction(trx) for trx in trxs], batch_size=1000)
 
-    return True
+        Jackpot.add(jackpot.tipo, -cents)
+        Jackpot.objects.filter(pk=jackpot.pk).update(last_paid_at=now)
+        transaction.on_commit(lambda: cache.delete(Jackpot.CACHE_KEY))
+
+    return payout
 
 
-def calculate_evento_points(evento):
+def with_user_stats(users):
+    """
+    Annotate users with balance, polla/evento bet counts (live + archived)
+    and last bet date, as correlated subqueries of the same SELECT
+    """
+    last_polla_bet = Coalesce(subquery_max(BetPolla, 'user', 'date_bet'), subquery_max(BetPollaArchive, 'user', 'date_bet'))
+    last_evento_bet = Coalesce(subquery_max(BetEvento, 'user', 'date_bet'), subquery_max(BetEventoArchive, 'user', 'date_bet'))
+
+    return users.annotate(
+        balance_cents=subquery_sum(LedgerEntry, 'user', 'qty_cents', output_field=BigIntegerField(), conciliado=False),
+        num_polla_bets=subquery_count(BetPolla, 'user') + subquery_count(BetPollaArchive, 'user'),
+        num_evento_bets=subquery_count(BetEvento, 'user') + subquery_count(BetEventoArchive, 'user'),
+        # GREATEST() is NULL if any argument is: fall back to the other one
+        last_bet=Greatest(Coalesce(last_polla_bet, last_evento_bet), Coalesce(last_evento_bet, last_polla_bet)),
+    )
+
+
+def score_prediction(tipo_juego, pred1, pred2, score1, score2):
+    """Points of one match prediction against the match result"""
+    if tipo_juego == 3:
+        # NFL - Winner selection
+        actual_winner = 'E1' if score1 > score2 else 'E2'
+        predicted_winner = 'E1' if pred1 > pred2 else 'E2'
+        return 1 if actual_winner == predicted_winner else 0
+
+    if tipo_juego in [5, 6]:
+        # Soccer - Winner or Tie
+        actual_result = 'TIE' if score1 == score2 else ('E1' if score1 > score2 else 'E2')
+        predicted_result = 'TIE' if pred1 == pred2 else ('E1' if pred1 > pred2 else 'E2')
+        return 1 if actual_result == predicted_result else 0
+
+    # Exact score prediction
+    if pred1 == score1 and pred2 == score2:
+        return 3  # Exact match
+    if ((pred1 > pred2 and score1 > score2) or
+            (pred1 < pred2 and score1 < score2) or
+            (pred1 == pred2 and score1 == score2)):
+        return 1  # Correct winner/tie
+    return 0
+
+
+def calculate_evento_points(evento, batch_size=1000):
     """
     Calculate points for all evento bets based on match results
     (Replicates PHP's calcularPuntosEvento)
+
+    Works in bulk: match results are read once, packed bets are decoded
+    from BetEvento.predictions, legacy bets from their core_betmatch rows
+    (fetched as plain values), and everything is written back with
+    bulk_update instead of one save() per prediction.
+
+    Full recompute of the card; results entry rescores only the matches it
+    changed (rescore_evento_matches).
+    """
+    # Matches without results (not played yet, or cleared) score 0
+    results = {
+        match_id: (score1, score2)
+        for match_id, score1, score2 in evento.matches.filter(
+            score_team1__isnull=False, score_team2__isnull=False
+        ).values_list('id', 'score_team1', 'score_team2')
+    }
+    tipo_juego = evento.tipo_juego
+
+    with transaction.atomic():
+        # Packed bets: decode, score, re-pack
+        scored = []
+        for bet in BetEvento.objects.filter(evento=evento, predictions__isnull=False).only('id', 'predictions').iterator(chunk_size=batch_size):
+            records = []
+            total_points = 0
+            for match_id, pred1, pred2, points in packing.unpack_predictions(bet.predictions):
+                points = score_prediction(tipo_juego, pred1, pred2, *results[match_id]) if match_id in results else 0
+                total_points += points
+                records.append((match_id, pred1, pred2, points))
+            bet.set_predictions(records)
+            bet.puntos = total_points
+            scored.append(bet)
+        BetEvento.objects.bulk_update(scored, ['predictions', 'puntos'], batch_size=batch_size)
+
+        # Legacy bets: one core_betmatch row per prediction
+        predictions = []
+        totals = {}
+        rows = BetMatch.objects.filter(bet_evento__evento=evento).values_list(
+            'id', 'bet_evento_id', 'match_id', 'score_team1', 'score_team2', 'puntos'
+        )
+        for prediction_id, bet_id, match_id, pred1, pred2, old_points in rows.iterator(chunk_size=batch_size):
+            points = score_prediction(tipo_juego, pred1, pred2, *results[match_id]) if match_id in results else 0
+            if points != old_points:
+                predictions.append(BetMatch(id=prediction_id, puntos=points))
+            totals[bet_id] = totals.get(bet_id, 0) + points
+        BetMatch.objects.bulk_update(predictions, ['puntos'], batch_size=batch_size)
+        BetEvento.objects.bulk_update(
+            [BetEvento(id=bet_id, puntos=points) for bet_id, points in totals.items()],
+            ['puntos'], batch_size=batch_size
+        )
+
+        evento.bump_results_version()
+
+
+def rescore_evento_matches(evento, match_ids, batch_size=1000):
+    """
+    Rescore only the predictions of `match_ids` after their results changed
+    (entered, corrected or cleared), adjusting each bet's puntos by the
+    difference instead of recomputing every match of the card.
+
+    Legacy bets read just the core_betmatch rows of those matches (match
+    index). Packed bets hold the whole card in one column: the bet form packs
+    it in match order, so the query slices out only the 9-byte records of
+    the changed matches (SUBSTR at their position). Only the bets where one
+    of them changes points are loaded whole and rewritten; a bet whose
+    record is not where expected (packed in another order, or the card
+    changed after betting) is decoded whole to find it.
+    Bet totals are updated with one puntos = puntos + delta UPDATE per
+    distinct delta.
     """
-    for bet in evento.bets.all():
-        total_points = 0
-
-        for prediction in bet.match_predictions.all():
-            match = prediction.match
-
-            if match.score_team1 is None or match.score_team2 is None:
-                continue  # Results not entered yet
-
-            # Scoring logic varies by tipo_juego
-            if evento.tipo_juego == 3:
-                # NFL - Winner selection
-                actual_winner = 'E1' if match.score_team1 > match.score_team2 else 'E2'
-                predicted_winner = 'E1' if prediction.score_team1 > prediction.score_team2 else 'E2'
-
-                if actual_winner == predicted_winner:
-                    points = 1
-                else:
-                    points = 0
-
-            elif evento.tipo_juego in [5, 6]:
-                # Soccer - Winner or Tie
-                if match.score_team1 == match.score_team2:
-                    actual_result = 'TIE'
-                elif match.score_team1 > match.score_team2:
-                    actual_result = 'E1'
-                else:
-                    actual_result = 'E2'
-
-                if prediction.score_team1 == prediction.score_team2:
-                    predicted_result = 'TIE'
-                elif prediction.score_team1 > prediction.score_team2:
-                    predicted_result = 'E1'
-                else:
-                    predicted_result = 'E2'
-
-                if actual_result == predicted_result:
-                    points = 1
-                else:
-                    points = 0
-
-            else:
-                # Exact score prediction
-                if (prediction.score_team1 == match.score_team1 and
-                        prediction.score_team2 == match.score_team2):
-                    points = 3  # Exact match
-                elif ((prediction.score_team1 > prediction.score_team2 and
-                       match.score_team1 > match.score_team2) or
-                      (prediction.score_team1 < prediction.score_team2 and
-                       match.score_team1 < match.score_team2) or
-                      (prediction.score_team1 == prediction.score_team2 and
-                       match.score_team1 == match.score_team2)):
-                    points = 1  # Correct winner/tie
-                else:
-                    points = 0
-
-            prediction.puntos = points
-            prediction.save()
-            total_points += points
-
-        bet.puntos = total_points
-        bet.save()
+    match_ids = set(match_ids)
+    if not match_ids:
+        return
+    results = {
+        match_id: (score1, score2)
+        for match_id, score1, score2 in evento.matches.filter(id__in=match_ids).values_list('id', 'score_team1', 'score_team2')
+    }
+    tipo_juego = evento.tipo_juego
+
+    def points_of(match_id, pred1, pred2):
+        score1, score2 = results[match_id]
+        if score1 is None or score2 is None:
+            return 0  # Result cleared
+        return score_prediction(tipo_juego, pred1, pred2, score1, score2)
+
+    deltas = {}
+    with transaction.atomic():
+        # Packed bets: read and re-score the changed matches' records only
+        size = packing.PREDICTION.size
+        order = list(evento.matches.values_list('id', flat=True))
+        slices = {
+            f'record_{match_id}': Substr(
+                'predictions', order.index(match_id) * size + 1, size, output_field=BinaryField(),
+            )
+            for match_id in results
+        }
+        rows = BetEvento.objects.filter(evento=evento, predictions__isnull=False).annotate(**slices)
+        to_rewrite = []
+        for bet_id, *records in rows.values_list('id', *slices).iterator(chunk_size=batch_size):
+            for match_id, record in zip(results, records):
+                record = bytes(record or b'')
+                if len(record) != size or packing.PREDICTION.unpack(record)[0] != match_id:
+                    to_rewrite.append(bet_id)  # Not at its position: decode the whole card
+                    break
+                _, pred1, pred2, points = packing.PREDICTION.unpack(record)
+                if points_of(match_id, pred1, pred2) != points:
+                    to_rewrite.append(bet_id)
+                    break
+
+        scored = []
+        for start in range(0, len(to_rewrite), batch_size):
+            bets = BetEvento.objects.filter(id__in=to_rewrite[start:start + batch_size]).only('id', 'predictions')
+            for bet in bets:
+                records = packing.unpack_predictions(bet.predictions)
+                delta = 0
+                changed = False
+                for i, (match_id, pred1, pred2, points) in enumerate(records):
+                    if match_id in results:
+                        new_points = points_of(match_id, pred1, pred2)
+                        if new_points != points:
+                            changed = True
+                            delta += new_points - points
+                            records[i] = (match_id, pred1, pred2, new_points)
+                # Records can change with a net delta of 0 (one match gains what another loses)
+                if changed:
+                    bet.set_predictions(records)
+                    scored.append(bet)
+                    deltas[bet.id] = delta
+        BetEvento.objects.bulk_update(scored, ['predictions'], batch_size=batch_size)
+
+        # Legacy bets: only the core_betmatch rows of the changed matches
+        predictions = []
+        rows = BetMatch.objects.filter(match_id__in=match_ids).values_list(
+            'id', 'bet_evento_id', 'match_id', 'score_team1', 'score_team2', 'puntos'
+        )
+        for prediction_id, bet_id, match_id, pred1, pred2, points in rows.iterator(chunk_size=batch_size):
+            new_points = points_of(match_id, pred1, pred2)
+            if new_points != points:
+                predictions.append(BetMatch(id=prediction_id, puntos=new_points))
+                deltas[bet_id] = deltas.get(bet_id, 0) + new_points - points
+        BetMatch.objects.bulk_update(predictions, ['puntos'], batch_size=batch_size)
+
+        by_delta = {}
+        for bet_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(bet_id)
+        for delta, bet_ids in by_delta.items():
+            for start in range(0, len(bet_ids), batch_size):
+                BetEvento.objects.filter(id__in=bet_ids[start:start + batch_size]).update(puntos=F('puntos') + delta)
+
+        evento.bump_results_version()
+
+
+def write_results_snapshot(event):
+    """Static results page of a Paid polla/evento (served by view_results)"""
+    from user_area.results import write_snapshot
+    if isinstance(event, Polla):
+        write_snapshot(event, get_polla_winners(event))
+    else:
+        write_snapshot(event, get_evento_winners(event))
 
 
 def send_winner_email_polla(user, polla, prize, place):
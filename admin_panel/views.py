@@ -4,18 +4,31 @@ Custom Admin Panel Views
 This is your custom admin interface (NOT Django's built-in admin).
 Matches the PHP /adm/ directory structure with frontend-accessible admin pages.
 """
+from datetime import datetime, time, timedelta
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.http import HttpResponseBadRequest
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.core.paginator import Paginator
+from django.db.models import Q, Sum
+from core import exports, money, rollups
 from core.models import (
     Polla, Evento, Match, Racetrack, League, Team,
-    BetPolla, BetEvento, User
+    BetPolla, BetEvento, User, DailyRollup, RollupWatermark, Jackpot, JackpotPayout
 )
+from core.db_routers import use_replica
+from core.subqueries import subquery_count
 from admin_panel.decorators import admin_required, superadmin_required
 from admin_panel.forms import (
-    PollaForm, EventoForm, MatchForm, ResultPollaForm, ResultEventoForm
+    PollaForm, EventoForm, MatchForm, ResultPollaForm, ResultEventoForm, JackpotPayoutForm
 )
 
+EVENTS_PER_PAGE = 50
+USERS_PER_PAGE = 50
+
 
 @admin_required
 def dashboard(request):
@@ -25,8 +38,9 @@ def dashboard(request):
         'total_users': User.objects.count(),
         'active_pollas': Polla.objects.filter(status='Running').count(),
         'active_eventos': Evento.objects.filter(status='Running').count(),
-        'recent_pollas': Polla.objects.all().order_by('-created_at')[:5],
-        'recent_eventos': Evento.objects.all().order_by('-created_at')[:5],
+        'recent_pollas': Polla.objects.select_related('racetrack').order_by('-created_at')[:5],
+        'recent_eventos': Evento.objects.select_related('league').order_by('-created_at')[:5],
+        'jackpots': Jackpot.current(),
     }
     return render(request, 'admin_panel/dashboard.html', context)
 
@@ -35,11 +49,19 @@ def dashboard(request):
 
 @admin_required
 def manage_pollas(request):
-    """List and manage pollas (horse race pools)"""
-    pollas = Polla.objects.filter(status__in=['Running', 'Close']).order_by('-date_race')
+    """
+    List and manage pollas (horse race pools)
+
+    One page of EVENTS_PER_PAGE pollas with their racetrack joined in; entries
+    and pot are the denormalized counters and the results status comes from
+    f1..f6, so the page costs the same two queries however many are open.
+    """
+    pollas = Polla.objects.filter(status__in=['Running', 'Close']).select_related('racetrack').order_by('-date_race', '-id')
+    page = Paginator(pollas, EVENTS_PER_PAGE).get_page(request.GET.get('page'))
     return render(request, 'admin_panel/manage_pollas.html', {
         'title': 'Administrar Pollas',
-        'pollas': pollas
+        'pollas': page.object_list,
+        'page': page,
     })
 
 
@@ -79,11 +101,21 @@ def delete_polla(request, polla_id):
 
 @admin_required
 def manage_eventos(request):
-    """List and manage eventos (sports events)"""
-    eventos = Evento.objects.filter(status__in=['Running', 'Close']).order_by('-date')
+    """
+    List and manage eventos (sports events)
+
+    Same as manage_pollas, with the league joined in and the match / pending
+    result counts as correlated subqueries of the page's SELECT.
+    """
+    eventos = Evento.objects.filter(status__in=['Running', 'Close']).select_related('league').annotate(
+        num_matches=subquery_count(Match, 'evento'),
+        pending_matches=subquery_count(Match, 'evento', Q(score_team1__isnull=True) | Q(score_team2__isnull=True)),
+    ).order_by('-date', '-id')
+    page = Paginator(eventos, EVENTS_PER_PAGE).get_page(request.GET.get('page'))
     return render(request, 'admin_panel/manage_eventos.html', {
         'title': 'Administrar Eventos',
-        'eventos': eventos
+        'eventos': page.object_list,
+        'page': page,
     })
 
 
@@ -114,6 +146,7 @@ def add_matches(request, evento_id):
         form = MatchForm(request.POST, evento=evento)
         if form.is_valid():
             form.save()
+            Evento.refresh_locks_at(Evento.objects.filter(pk=evento.pk))
             messages.success(request, 'Partido agregado exitosamente')
             return redirect('admin_panel:add_matches', evento_id=evento.id)
     else:
@@ -159,11 +192,13 @@ def enter_results_polla(request, polla_id):
         if form.is_valid():
             polla = form.save(commit=False)
             polla.status = 'Close'
-            polla.save()
+            # Only the results: never overwrite the bet counters
+            polla.save(update_fields=['f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'status'])
 
             # Calculate points for all bets
             for bet in polla.bets.all():
                 bet.calculate_points()
+            polla.bump_results_version()
 
             messages.success(request, 'Resultados ingresados. Proceder a pagar premios.')
             return redirect('admin_panel:pay_polla', polla_id=polla.id)
@@ -179,41 +214,73 @@ def enter_results_polla(request, polla_id):
 
 @admin_required
 def enter_results_evento(request, evento_id):
-    """Enter results for an evento"""
+    """
+    Enter results for an evento
+
+    Partial results are accepted: matches left blank keep their current
+    score. Changed scores are saved with one bulk_update and only their
+    predictions are rescored; the evento is closed once every match has a
+    result.
+    """
     evento = get_object_or_404(Evento, id=evento_id)
 
     if evento.status == 'Paid':
         messages.warning(request, 'Este evento ya fue pagado')
         return redirect('admin_panel:manage_eventos')
 
-    matches = evento.matches.all().order_by('orden_pa')
+    matches = list(evento.matches.select_related('team1', 'team2').order_by('orden_pa'))
 
     if request.method == 'POST':
-        # Process match results
-        all_results_entered = True
+        scores = {}
+        errors = []
         for match in matches:
-            score1 = request.POST.get(f'match_{match.id}_score1')
-            score2 = request.POST.get(f'match_{match.id}_score2')
-
-            if score1 and score2:
-                match.score_team1 = int(score1)
-                match.score_team2 = int(score2)
-                match.save()
-            else:
-                all_results_entered = False
-
-        if all_results_entered:
-            evento.status = 'Close'
-            evento.save()
-
-            # Calculate points for all bets
-            from admin_panel.utils import calculate_evento_points
-            calculate_evento_points(evento)
-
-            messages.success(request, 'Resultados ingresados. Proceder a pagar premios.')
-            return redirect('admin_panel:pay_evento', evento_id=evento.id)
+            score1 = request.POST.get(f'match_{match.id}_score1', '').strip()
+            score2 = request.POST.get(f'match_{match.id}_score2', '').strip()
+            if not score1 and not score2:
+                continue  # Not played yet
+            try:
+                score1, score2 = int(score1), int(score2)
+                if score1 < 0 or score2 < 0:
+                    raise ValueError
+            except ValueError:
+                errors.append(str(match))
+                continue
+            scores[match.id] = (score1, score2)
+
+        if errors:
+            messages.error(request, f"Marcador inválido: {', '.join(errors)}")
         else:
-            messages.error(request, 'Debes ingresar resultados para todos los partidos')
+            with transaction.atomic():
+                # Lock the evento so two admins saving at once rescore one after the other,
+                # each diffing against the scores the other just committed
+                evento = Evento.objects.select_for_update().get(pk=evento.pk)
+                if evento.status == 'Paid':
+                    messages.warning(request, 'Este evento ya fue pagado')
+                    return redirect('admin_panel:manage_eventos')
+
+                matches = list(evento.matches.order_by('orden_pa'))
+                changed = []
+                for match in matches:
+                    if match.id in scores and scores[match.id] != (match.score_team1, match.score_team2):
+                        match.score_team1, match.score_team2 = scores[match.id]
+                        changed.append(match)
+                Match.objects.bulk_update(changed, ['score_team1', 'score_team2'])
+
+                # Points of the changed matches only
+                from admin_panel.utils import rescore_evento_matches
+                rescore_evento_matches(evento, [match.id for match in changed])
+
+                complete = all(match.score_team1 is not None and match.score_team2 is not None for match in matches)
+                if complete and evento.status != 'Close':
+                    evento.status = 'Close'
+                    evento.save(update_fields=['status'])
+
+            if complete:
+                messages.success(request, 'Resultados ingresados. Proceder a pagar premios.')
+                return redirect('admin_panel:pay_evento', evento_id=evento.id)
+
+            messages.success(request, f'Resultados parciales guardados ({len(changed)} partidos actualizados)')
+            return redirect('admin_panel:enter_results_evento', evento_id=evento.id)
 
     return render(request, 'admin_panel/enter_results_evento.html', {
         'title': f'Ingresar Resultados - {evento.name}',
@@ -233,7 +300,8 @@ def pay_polla(request, polla_id):
         messages.warning(request, 'Esta polla ya fue pagada')
         return redirect('admin_panel:manage_pollas')
 
-    if polla.status != 'Close':
+    # Closed by run_scheduler at post time does not mean results were entered
+    if polla.status != 'Close' or not polla.has_results():
         messages.error(request, 'Debes ingresar resultados primero')
         return redirect('admin_panel:enter_results_polla', polla_id=polla.id)
 
@@ -267,7 +335,8 @@ def pay_evento(request, evento_id):
         messages.warning(request, 'Este evento ya fue pagado')
         return redirect('admin_panel:manage_eventos')
 
-    if evento.status != 'Close':
+    # Closed by run_scheduler at post time does not mean results were entered
+    if evento.status != 'Close' or not evento.has_results():
         messages.error(request, 'Debes ingresar resultados primero')
         return redirect('admin_panel:enter_results_evento', evento_id=evento.id)
 
@@ -292,13 +361,160 @@ def pay_evento(request, evento_id):
     })
 
 
+# ==================== JACKPOTS ====================
+
+@admin_required
+def manage_jackpots(request):
+    """Running jackpot (Acumulado) totals and their last payouts"""
+    jackpots = Jackpot.ensure_all()
+    totals = Jackpot.totals_cents()
+    for jackpot in jackpots:
+        jackpot.available = money.from_cents(totals[jackpot.tipo])
+
+    return render(request, 'admin_panel/manage_jackpots.html', {
+        'title': 'Acumulados',
+        'jackpots': jackpots,
+        'payouts': JackpotPayout.objects.select_related('jackpot')[:20],
+    })
+
+
+@superadmin_required
+def pay_jackpot(request, jackpot_id):
+    """Pay a jackpot to one or more winners"""
+    jackpot = get_object_or_404(Jackpot, id=jackpot_id)
+
+    if request.method == 'POST':
+        form = JackpotPayoutForm(request.POST)
+        if form.is_valid():
+            from admin_panel.utils import process_jackpot_payment
+            try:
+                payout = process_jackpot_payment(
+                    jackpot, form.cleaned_data['winners'], form.cleaned_data['amount'], form.cleaned_data['comment'],
+                )
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f'Acumulado pagado a {payout.winners} ganadores')
+                return redirect('admin_panel:manage_jackpots')
+    else:
+        form = JackpotPayoutForm()
+
+    return render(request, 'admin_panel/pay_jackpot.html', {
+        'title': f'Pagar Acumulado - {jackpot.name or jackpot.tipo}',
+        'jackpot': jackpot,
+        'form': form,
+    })
+
+
 # ==================== USER MANAGEMENT ====================
 
 @superadmin_required
+@use_replica
 def manage_users(request):
-    """Manage users (superadmin only)"""
-    users = User.objects.all().order_by('-date_joined')
+    """
+    Manage users (superadmin only)
+
+    One page of USERS_PER_PAGE users, newest first, optionally filtered by an
+    email / alias prefix (?q=). Balance, bet counts and last bet date come
+    from correlated subqueries in the page's single SELECT.
+    """
+    query = request.GET.get('q', '').strip()
+    users = User.objects.order_by('-date_joined', '-id')
+    if query:
+        # Prefix matches only, so the email / alias indexes are used
+        if '@' in query:
+            users = users.filter(email__istartswith=query)
+        else:
+            users = users.filter(Q(email__istartswith=query) | Q(alias__istartswith=query))
+
+    # COUNT(*) leaves the unused annotations out; the page's SELECT ... LIMIT
+    # runs the subqueries for its rows only
+    from admin_panel.utils import with_user_stats
+    page = Paginator(with_user_stats(users), USERS_PER_PAGE).get_page(request.GET.get('page'))
+    for user in page.object_list:
+        user.balance = money.from_cents(user.balance_cents)
+
     return render(request, 'admin_panel/manage_users.html', {
         'title': 'Administrar Usuarios',
-        'users': users
+        'users': page.object_list,
+        'page': page,
+        'query': query,
+    })
+
+
+# ==================== REPORTS ====================
+
+@superadmin_required
+@use_replica
+def revenue_report(request):
+    """Daily totals per tipo, racetrack and league (reads only core_dailyrollup)"""
+    try:
+        date_to = parse_date(request.GET.get('hasta') or '') or timezone.localdate()
+        date_from = parse_date(request.GET.get('desde') or '') or date_to - timedelta(days=30)
+    except ValueError:
+        messages.error(request, 'Fecha inválida')
+        return redirect('admin_panel:revenue_report')
+
+    days = DailyRollup.objects.filter(day__gte=date_from, day__lte=date_to).order_by()
+
+    def report(*fields):
+        return [
+            dict(row, total=money.from_cents(row['cents']))
+            for row in days.values(*fields).annotate(cents=Sum('total_cents'), entries=Sum('entries')).order_by(*fields)
+        ]
+
+    watermark = RollupWatermark.objects.filter(name=rollups.WATERMARK).first()
+    return render(request, 'admin_panel/revenue_report.html', {
+        'title': 'Reporte de Ingresos',
+        'date_from': date_from,
+        'date_to': date_to,
+        'by_day': report('day', 'source', 'tipo'),
+        'by_tipo': report('source', 'tipo'),
+        'by_racetrack': report('racetrack__nombre', 'tipo'),
+        'by_league': report('league__name', 'tipo_juego', 'tipo'),
+        'updated_at': watermark.updated_at if watermark else None,
     })
+
+
+# ==================== EXPORTS ====================
+# CSV downloads streamed row by row (core/exports.py); bigger dumps:
+# python manage.py export_data
+
+@admin_required
+def export_polla_bets(request, polla_id):
+    """All bets of a polla as CSV"""
+    polla = get_object_or_404(Polla, id=polla_id)
+    return exports.stream_csv(f'polla-{polla.code4}-bets.csv', exports.polla_bet_rows(polla))
+
+
+@admin_required
+def export_evento_bets(request, evento_id):
+    """All bets of an evento as CSV"""
+    evento = get_object_or_404(Evento, id=evento_id)
+    return exports.stream_csv(f'evento-{evento.id}-bets.csv', exports.evento_bet_rows(evento))
+
+
+@superadmin_required
+def export_ledger(request):
+    """Ledger entries of a date range as CSV (?desde=YYYY-MM-DD&hasta=YYYY-MM-DD, both inclusive)"""
+    desde = request.GET.get('desde') or ''
+    hasta = request.GET.get('hasta') or ''
+    try:
+        # parse_date returns None for a malformed string and raises for an impossible date
+        date_from = parse_date(desde) if desde else None
+        date_to = parse_date(hasta) if hasta else None
+    except ValueError:
+        date_from = date_to = None
+    if (desde and date_from is None) or (hasta and date_to is None):
+        return HttpResponseBadRequest('Fecha inválida: use AAAA-MM-DD')
+    start = timezone.make_aware(datetime.combine(date_from, time.min)) if date_from else None
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)) if date_to else None
+
+    filename = f"ledger-{date_from or 'inicio'}-{date_to or 'hoy'}.csv"
+    return exports.stream_csv(filename, exports.ledger_rows(start, end))
+
+
+@superadmin_required
+def export_users(request):
+    """All users with their balances as CSV"""
+    return exports.stream_csv('users.csv', exports.user_rows())
@@ -13,4 +13,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bets_project.settings')
 
+# Tells settings we are running under ASGI (enables the pooled DB backend)
+os.environ.setdefault('BETS_ASGI', '1')
+
 application = get_asgi_application()
@@ -7,10 +7,27 @@ but this can be useful for debugging and database inspection.
 from django.contrib import admin
 from core.models import (
     User, Racetrack, League, Team, Polla, Evento, Match,
-    BetPolla, BetEvento, BetMatch, AccountTransaction, EventTransaction
+    BetPolla, BetEvento, BetMatch, BetPollaArchive, BetEventoArchive, AccountTransaction, EventTransaction, LedgerEntry, LedgerArchive,
+    PollaPickCounts, DailyRollup, RollupWatermark, Jackpot, JackpotPayout
 )
 
 
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """
+    Money tables: browse only. Edits go through the app (AccountTransaction /
+    EventTransaction.save() keep core_ledgerentry in sync)
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('email', 'alias', 'is_admin', 'is_active', 'date_joined')
@@ -71,15 +88,67 @@ class BetEventoAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'user__alias')
 
 
+@admin.register(BetPollaArchive)
+class BetPollaArchiveAdmin(admin.ModelAdmin):
+    list_display = ('user', 'polla', 'pto_tot', 'date_bet', 'archived_at')
+    search_fields = ('user__email', 'user__alias')
+
+
+@admin.register(BetEventoArchive)
+class BetEventoArchiveAdmin(admin.ModelAdmin):
+    list_display = ('user', 'evento', 'puntos', 'date_bet', 'archived_at')
+    search_fields = ('user__email', 'user__alias')
+
+
 @admin.register(AccountTransaction)
-class AccountTransactionAdmin(admin.ModelAdmin):
+class AccountTransactionAdmin(ReadOnlyAdmin):
     list_display = ('user', 'tipo', 'qty', 'trx_date', 'conciliado')
     list_filter = ('tipo', 'conciliado')
     search_fields = ('user__email', 'comment')
 
 
 @admin.register(EventTransaction)
-class EventTransactionAdmin(admin.ModelAdmin):
+class EventTransactionAdmin(ReadOnlyAdmin):
     list_display = ('user', 'tipo', 'qty', 'trx_date', 'conciliado')
     list_filter = ('tipo', 'conciliado')
     search_fields = ('user__email', 'comment')
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(ReadOnlyAdmin):
+    list_display = ('user', 'source', 'tipo', 'qty', 'trx_date', 'conciliado')
+    list_filter = ('source', 'tipo', 'conciliado')
+    search_fields = ('user__email', 'comment')
+
+
+@admin.register(LedgerArchive)
+class LedgerArchiveAdmin(ReadOnlyAdmin):
+    list_display = ('user', 'source', 'tipo', 'qty', 'trx_date', 'archived_at')
+    list_filter = ('source', 'tipo')
+
+
+@admin.register(PollaPickCounts)
+class PollaPickCountsAdmin(admin.ModelAdmin):
+    list_display = ('polla', 'updated_at')
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'source', 'tipo', 'racetrack', 'league', 'tipo_juego', 'entries', 'total', 'updated_at')
+    list_filter = ('source', 'tipo')
+    date_hierarchy = 'day'
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_id', 'updated_at')
+
+
+@admin.register(Jackpot)
+class JackpotAdmin(admin.ModelAdmin):
+    list_display = ('tipo', 'name', 'total', 'last_paid_at')
+
+
+@admin.register(JackpotPayout)
+class JackpotPayoutAdmin(admin.ModelAdmin):
+    list_display = ('jackpot', 'paid_at', 'total_cents', 'winners')
@@ -0,0 +1,36 @@
+"""
+Read-through access to archived bets
+
+Bets of old Paid pollas/eventos live in the archive tables (see
+`manage.py archive_bets`). Code that lists bets goes through these helpers
+so it keeps working whether a bet is live or archived.
+"""
+from core.models import BetPolla, BetEvento, BetPollaArchive, BetEventoArchive
+
+
+def polla_bets(polla):
+    """Bets of a polla: live ones, or the archived ones once it was archived"""
+    if polla.archived:
+        return BetPollaArchive.objects.filter(polla=polla)
+    return BetPolla.objects.filter(polla=polla)
+
+
+def evento_bets(evento):
+    """Bets of an evento: live ones, or the archived ones once it was archived"""
+    if evento.archived:
+        return BetEventoArchive.objects.filter(evento=evento)
+    return BetEvento.objects.filter(evento=evento)
+
+
+def user_polla_bets(user):
+    """All polla bets of a user, live and archived, newest first"""
+    bets = list(BetPolla.objects.filter(user=user).select_related('polla'))
+    bets += BetPollaArchive.objects.filter(user=user).select_related('polla')
+    return sorted(bets, key=lambda bet: bet.date_bet, reverse=True)
+
+
+def user_evento_bets(user):
+    """All evento bets of a user, live and archived, newest first"""
+    bets = list(BetEvento.objects.filter(user=user).select_related('evento'))
+    bets += BetEventoArchive.objects.filter(user=user).select_related('evento')
+    return sorted(bets, key=lambda bet: bet.date_bet, reverse=True)
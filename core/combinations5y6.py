@@ -0,0 +1,77 @@
+"""
+5y6 Combinations - Tickets, cost and hit counts of a cuadro without expanding it
+
+A cuadro with n_r horses in race r stands for n_1 * ... * n_6 tickets (one
+horse per race). Everything is computed from the per-race bitsets of
+core/scoring5y6.py instead of materializing that Cartesian product:
+- tickets: product of the per-race selection sizes
+- cost: tickets * settings.TICKET_PRICE_5Y6
+- hits: hits[k] = tickets hitting exactly k of the 6 races, the coefficients
+  of the polynomial  prod_r (miss_r + hit_r * x)  where hit_r is 1 if the
+  race winner is selected (0 while the race has no winner) and
+  miss_r = n_r - hit_r
+
+Usage:
+    from core.combinations5y6 import evaluate_cuadro, evaluate_jornada_tickets
+    evaluate_cuadro(cuadro)                   # {'tickets', 'cost', 'hits'}
+    evaluate_jornada_tickets(jornada.id)      # {cuadro_id: {...}} for the whole jornada
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from core import money
+from core.scoring5y6 import RACES, popcount, load_bitsets, load_cuadro_bitsets, winner_bits
+
+
+def ticket_price():
+    return Decimal(str(settings.TICKET_PRICE_5Y6))
+
+
+def ticket_count(bitsets):
+    """Number of tickets (0 if a race has no selection)"""
+    tickets = 1
+    for mask in bitsets:
+        tickets *= popcount(mask)
+    return tickets
+
+
+def ticket_cost(bitsets, price=None):
+    """Price of all the tickets of a cuadro, as a Decimal"""
+    price = ticket_price() if price is None else price
+    return money.from_cents(ticket_count(bitsets) * money.to_cents(price))
+
+
+def hit_counts(bitsets, winners):
+    """[tickets hitting exactly 0 races, ..., exactly 6 races]"""
+    coefficients = [1]
+    for race in range(RACES):
+        hit = 1 if bitsets[race] & winners[race] else 0
+        miss = popcount(bitsets[race]) - hit
+        # Multiply by (miss + hit * x)
+        product = [0] * (len(coefficients) + 1)
+        for k, count in enumerate(coefficients):
+            product[k] += count * miss
+            product[k + 1] += count * hit
+        coefficients = product
+    return coefficients
+
+
+def summarize(bitsets, winners, price):
+    return {
+        'tickets': ticket_count(bitsets),
+        'cost': ticket_cost(bitsets, price),
+        'hits': hit_counts(bitsets, winners),
+    }
+
+
+def evaluate_cuadro(cuadro):
+    """Tickets, cost and hit counts of one cuadro"""
+    return summarize(load_cuadro_bitsets(cuadro.id), winner_bits(cuadro.jornada_id), ticket_price())
+
+
+def evaluate_jornada_tickets(jornada_id):
+    """{cuadro_id: {'tickets', 'cost', 'hits'}} for every cuadro of a jornada, from one scan of the selecciones"""
+    winners = winner_bits(jornada_id)
+    price = ticket_price()
+    return {cuadro_id: summarize(bitsets, winners, price) for cuadro_id, bitsets in load_bitsets(jornada_id).items()}
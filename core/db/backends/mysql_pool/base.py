@@ -0,0 +1,93 @@
+"""
+Pooled MySQL backend (used by the ASGI deployment)
+
+Django keeps persistent connections per thread (CONN_MAX_AGE). Under ASGI the
+sync parts of a request run on whatever thread is free, so those connections
+are rarely reused and every request pays the connect + TLS + auth +
+init_command cost again.
+
+This backend keeps a process-wide pool of open connections per alias instead:
+- close() at the end of a request returns the connection to the pool
+- the next connect() on ANY thread takes it back (no new handshake)
+- connections idle longer than POOL['MAX_IDLE'] seconds are discarded
+- with CONN_HEALTH_CHECKS the connection is pinged before being reused
+
+Settings (see settings.py):
+    'ENGINE': 'core.db.backends.mysql_pool',
+    'CONN_MAX_AGE': 0,
+    'POOL': {'SIZE': 10, 'MAX_IDLE': 300},
+"""
+import queue
+import threading
+import time
+
+from django.db.backends.mysql import base as mysql_base
+
+# alias -> LifoQueue of (raw connection, time it was returned)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, size):
+    """Return the connection pool for a database alias (created on first use)"""
+    with _pools_lock:
+        if alias not in _pools:
+            # LIFO so the most recently used (warmest) connection is reused first
+            _pools[alias] = queue.LifoQueue(maxsize=size)
+        return _pools[alias]
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    """MySQL DatabaseWrapper that recycles raw connections through a pool"""
+
+    @property
+    def pool_options(self):
+        return self.settings_dict.get('POOL', {})
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.pool_options.get('SIZE', 10))
+
+    def get_new_connection(self, conn_params):
+        max_idle = self.pool_options.get('MAX_IDLE', 300)
+
+        while True:
+            try:
+                connection, returned_at = self.pool.get_nowait()
+            except queue.Empty:
+                return super().get_new_connection(conn_params)
+
+            if time.monotonic() - returned_at > max_idle:
+                self._discard(connection)
+                continue
+
+            if self.settings_dict['CONN_HEALTH_CHECKS']:
+                try:
+                    connection.ping()
+                except mysql_base.Database.Error:
+                    self._discard(connection)
+                    continue
+
+            return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        # Never recycle a connection in an unknown state
+        if self.in_atomic_block or self.errors_occurred:
+            return super()._close()
+
+        try:
+            # Discard anything left open outside autocommit
+            self.connection.rollback()
+            self.pool.put_nowait((self.connection, time.monotonic()))
+        except (queue.Full, mysql_base.Database.Error):
+            return super()._close()
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except mysql_base.Database.Error:
+            pass
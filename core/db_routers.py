@@ -0,0 +1,110 @@
+"""
+Database Router - Primary / read replica
+
+All writes, and by default all reads, go to 'default' (the primary).
+Reads only go to the 'replica' alias inside code explicitly marked as
+read-only: views decorated with @use_replica and blocks wrapped in
+replica_reads() (reports, verification commands).
+
+Read-your-writes: when a request writes a bet or a transaction,
+ReplicaPinMiddleware pins that user to the primary for REPLICA_PIN_SECONDS,
+so their new bet / balance shows up immediately even if the replica lags.
+"""
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+DEFAULT = 'default'
+REPLICA = 'replica'
+
+# Writing any of these pins the user to the primary
+PIN_MODELS = {
+    'core.betpolla',
+    'core.betevento',
+    'core.betmatch',
+    'core.accounttransaction',
+    'core.eventtransaction',
+    'core.ledgerentry',
+}
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+# Per-request state ({'pinned': bool, 'wrote': bool}), set by ReplicaPinMiddleware.
+# A mutable dict so writes made inside sync_to_async threads are still seen.
+_request_state = contextvars.ContextVar('replica_request_state', default=None)
+
+
+def start_request(pinned):
+    """Start tracking a request (called by ReplicaPinMiddleware)"""
+    state = {'pinned': pinned, 'wrote': False}
+    return state, _request_state.set(state)
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Send reads inside this block to the replica (if one is configured)"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def use_replica(view_func):
+    """
+    View decorator: read-only view, serve its queries from the replica
+
+    Put it below @login_required so the session user is loaded from the primary.
+
+    Usage:
+        @login_required
+        @use_replica
+        def my_bets(request):
+            ...
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Route read-only code to the replica, everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if REPLICA not in settings.DATABASES or not _use_replica.get():
+            return DEFAULT
+
+        state = _request_state.get()
+        if state is not None and state['pinned']:
+            return DEFAULT
+
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and model._meta.label_lower in PIN_MODELS:
+            state['wrote'] = True
+        return DEFAULT
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,118 @@
+"""
+5y6 Entry - Validate and bulk insert cuadros with their selecciones
+
+A cuadro is a name plus the horses picked in each of the 6 races:
+    {'nombre_cuadro': 'Juan 1', 'carreras': [[3, 7], [1], [2, 5, 9], [4], [11], [6, 8]]}
+
+Usage:
+    from core.entry5y6 import validate_cuadros, create_cuadros
+    cuadros = validate_cuadros(jornada, rows)        # raises ValueError listing the bad rows
+    created = create_cuadros(jornada, cuadros)       # bulk_create, one transaction per chunk
+
+Process:
+1. Every row is validated before anything is written (6 races, horses
+   1-20, non-empty races, names unique in the jornada)
+2. Each chunk inserts its Cuadro5y6 rows and then their Seleccion5y6 rows
+   with bulk_create, inside one transaction
+3. The jornada is rescored if it already has ganadores
+
+`manage.py import_5y6` reads the rows from CSV or JSON files.
+"""
+
+from django.db import connection, transaction
+from core.models import Cuadro5y6, Seleccion5y6, Ganador5y6
+from core.scoring5y6 import RACES, HORSES, evaluate_jornada
+
+CHUNK_SIZE = 1000
+
+
+def validate_cuadro(row):
+    """(nombre_cuadro, [sorted horses of race 1, ..., race 6]) or ValueError"""
+    nombre = str(row.get('nombre_cuadro') or '').strip()
+    if not nombre:
+        raise ValueError('nombre_cuadro is required')
+    if len(nombre) > 100:
+        raise ValueError('nombre_cuadro is longer than 100 characters')
+
+    carreras = row.get('carreras')
+    if not isinstance(carreras, (list, tuple)) or len(carreras) != RACES:
+        raise ValueError(f'{RACES} races are required')
+
+    races = []
+    for race, horses in enumerate(carreras, start=1):
+        try:
+            horses = sorted({int(horse) for horse in horses})
+        except (TypeError, ValueError):
+            raise ValueError(f'race {race}: horses must be numbers')
+        if not horses:
+            raise ValueError(f'race {race}: no horse selected')
+        if horses[0] < 1 or horses[-1] > HORSES:
+            raise ValueError(f'race {race}: horses must be between 1 and {HORSES}')
+        races.append(horses)
+    return nombre, races
+
+
+def validate_cuadros(jornada, rows, max_errors=20):
+    """Validate every row; raises ValueError with the first `max_errors` problems"""
+    taken = set(Cuadro5y6.objects.filter(jornada=jornada).values_list('nombre_cuadro', flat=True))
+    cuadros = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            nombre, races = validate_cuadro(row)
+            if nombre in taken:
+                raise ValueError(f'cuadro "{nombre}" already exists in the jornada')
+        except ValueError as e:
+            errors.append(f'row {number}: {e}')
+            if len(errors) >= max_errors:
+                break
+            continue
+        taken.add(nombre)
+        cuadros.append((nombre, races))
+
+    if errors:
+        raise ValueError('\n'.join(errors))
+    return cuadros
+
+
+def _insert_chunk(jornada, chunk):
+    cuadros = Cuadro5y6.objects.bulk_create([
+        Cuadro5y6(jornada=jornada, nombre_cuadro=nombre) for nombre, races in chunk
+    ])
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        ids = {cuadro.nombre_cuadro: cuadro.id for cuadro in cuadros}
+    else:
+        # MySQL: bulk_create does not set the pks; names are unique in the jornada (cuadro5y6_unique_nombre)
+        ids = dict(Cuadro5y6.objects.filter(
+            jornada=jornada, nombre_cuadro__in=[nombre for nombre, races in chunk],
+        ).values_list('nombre_cuadro', 'id'))
+
+    selecciones = [
+        Seleccion5y6(cuadro_id=ids[nombre], numero_carrera=race, numero_caballo=horse)
+        for nombre, races in chunk
+        for race, horses in enumerate(races, start=1)
+        for horse in horses
+    ]
+    Seleccion5y6.objects.bulk_create(selecciones, batch_size=5000)
+    return len(selecciones)
+
+
+def create_cuadros(jornada, cuadros, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Insert validated cuadros; returns (cuadros created, selecciones created).
+
+    `progress(cuadros_done, selecciones_done)` is called after every chunk.
+    """
+    created = selecciones = 0
+    for start in range(0, len(cuadros), chunk_size):
+        chunk = cuadros[start:start + chunk_size]
+        with transaction.atomic():
+            selecciones += _insert_chunk(jornada, chunk)
+        created += len(chunk)
+        if progress:
+            progress(created, selecciones)
+
+    if created and Ganador5y6.objects.filter(jornada=jornada).exists():
+        evaluate_jornada(jornada)
+    return created, selecciones
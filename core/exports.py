@@ -0,0 +1,155 @@
+"""
+CSV exports - bets, ledger and users, streamed in constant memory
+
+Each export is a generator of rows (header first) reading the database in
+CHUNK_SIZE slices by keyset (id > last id seen, in id order): every chunk is
+a short indexed query, so no queryset is cached whole and no cursor or
+transaction stays open while a slow client downloads. The same generators
+back the admin downloads (StreamingHttpResponse, async under ASGI) and
+`manage.py export_data`.
+
+Usage:
+    from core.exports import polla_bet_rows, stream_csv, write_csv
+    return stream_csv('polla-123-bets.csv', polla_bet_rows(polla))   # admin view
+    write_csv(polla_bet_rows(polla), open('bets.csv', 'w', newline=''))
+"""
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import BigIntegerField
+from django.http import StreamingHttpResponse
+from core import money, packing
+from core.archive import polla_bets, evento_bets
+from core.db_routers import replica_reads
+from core.models import User, LedgerEntry, LedgerArchive
+from core.subqueries import subquery_sum
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns what is written (csv.writer -> generator)"""
+
+    def write(self, value):
+        return value
+
+
+def _chunked(queryset, *fields):
+    """values_list(id, *fields) rows in id order, fetched CHUNK_SIZE at a time by keyset"""
+    queryset = queryset.order_by('id').values_list('id', *fields)
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        rows = list(chunk[:CHUNK_SIZE])
+        yield from rows
+        if len(rows) < CHUNK_SIZE:
+            return
+        last_id = rows[-1][0]
+
+
+def polla_bet_rows(polla):
+    """One row per bet of a polla (live or archived)"""
+    yield ['bet_id', 'user_id', 'alias', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6', 'credit_cost', 'date_bet', 'pto_tot', 'status']
+
+    bets = polla_bets(polla)
+    if polla.archived:
+        rows = _chunked(bets, 'user_id', 'user__alias', 'picks', 'credit_cost', 'date_bet', 'pto_tot', 'status')
+        for bet_id, user_id, alias, picks, *rest in rows:
+            yield [bet_id, user_id, alias, *packing.unpack_picks(picks), *rest]
+    else:
+        yield from _chunked(bets, 'user_id', 'user__alias', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6',
+                            'credit_cost', 'date_bet', 'pto_tot', 'status')
+
+
+def evento_bet_rows(evento):
+    """One row per bet of an evento (live or archived)"""
+    yield ['bet_id', 'user_id', 'alias', 'credit_cost', 'date_bet', 'puntos', 'status']
+    yield from _chunked(evento_bets(evento), 'user_id', 'user__alias', 'credit_cost', 'date_bet', 'puntos', 'status')
+
+
+def ledger_rows(date_from=None, date_to=None, user=None):
+    """
+    Ledger entries with date_from <= trx_date < date_to (either bound optional)
+
+    Rows moved to core_ledgerarchive by compact_ledger come first, then the
+    live ones, each in id order. The snapshot rows standing in for the
+    archived ones are left out, so every amount is exported once.
+    """
+    yield ['id', 'trx_date', 'user_id', 'alias', 'source', 'tipo', 'polla_id', 'evento_id', 'qty', 'conciliado', 'comment']
+
+    archived = LedgerArchive.objects.all()
+    entries = LedgerEntry.objects.exclude(source=LedgerEntry.SOURCE_SNAPSHOT)
+    for queryset in (archived, entries):
+        if date_from:
+            queryset = queryset.filter(trx_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(trx_date__lt=date_to)
+        if user:
+            queryset = queryset.filter(user=user)
+
+        rows = _chunked(queryset, 'trx_date', 'user_id', 'user__alias', 'source', 'tipo', 'polla_id', 'evento_id',
+                        'qty_cents', 'conciliado', 'comment')
+        for *head, qty_cents, conciliado, comment in rows:
+            yield [*head, money.from_cents(qty_cents), conciliado, comment]
+
+
+def user_rows():
+    """Every user with their balance (same rule as User.get_balance)"""
+    yield ['id', 'email', 'alias', 'is_active', 'is_admin', 'date_joined', 'last_login', 'balance']
+
+    users = User.objects.annotate(
+        balance_cents=subquery_sum(LedgerEntry, 'user', 'qty_cents', output_field=BigIntegerField(), conciliado=False)
+    )
+    rows = _chunked(users, 'email', 'alias', 'is_active', 'is_admin', 'date_joined', 'last_login', 'balance_cents')
+    for *head, balance_cents in rows:
+        yield [*head, money.from_cents(balance_cents)]
+
+
+def write_csv(rows, f):
+    """Write rows to an open text file; returns the number of data rows"""
+    writer = csv.writer(f)
+    count = -1
+    for count, row in enumerate(rows):
+        writer.writerow(row)
+    return max(count, 0)
+
+
+def _csv_lines(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _replica_lines(rows):
+    # The generator runs after the view returned: open the replica block here
+    with replica_reads():
+        yield from _csv_lines(rows)
+
+
+def _read_block(lines):
+    with replica_reads():
+        return ''.join(islice(lines, CHUNK_SIZE))
+
+
+async def _async_lines(rows):
+    # ASGI consumes a sync iterator whole before sending it: hand the
+    # queries to a worker thread one block of lines at a time instead
+    lines = _csv_lines(rows)
+    try:
+        while True:
+            block = await sync_to_async(_read_block)(lines)
+            if not block:
+                return
+            yield block
+    finally:
+        await sync_to_async(lines.close)()
+
+
+def stream_csv(filename, rows):
+    """StreamingHttpResponse downloading `rows` as a CSV file"""
+    content = _async_lines(rows) if settings.ASGI_DEPLOYMENT else _replica_lines(rows)
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,116 @@
+"""
+Cold Storage Command - Move settled bets out of the live bet tables
+
+Usage:
+    python manage.py archive_bets                 # Paid events older than 6 months
+    python manage.py archive_bets --months 12
+    python manage.py archive_bets --dry-run
+
+For every Paid polla / evento older than the cutoff, in one transaction each:
+1. Copy its bets to core_betpollaarchive / core_beteventoarchive (same ids;
+   evento predictions compressed into the bet row)
+2. Detach its transactions from the bets (they keep polla/evento)
+3. Delete the live bets (and their core_betmatch rows)
+4. Flag the polla/evento as archived
+
+core_betpolla, core_betevento and core_betmatch (and their indexes) then only
+hold bets of recent events. my_bets and the results pages read archived
+bets transparently (see core/archive.py).
+
+(On MySQL, RANGE partitioning core_betmatch by evento_id is an alternative,
+but requires the partition key in every unique key; the archive tables avoid
+that schema change.)
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from core import packing
+from core.models import (
+    Polla, Evento, BetPolla, BetEvento, BetMatch, AccountTransaction, EventTransaction,
+    BetPollaArchive, BetEventoArchive
+)
+
+
+class Command(BaseCommand):
+    help = 'Move bets of old Paid pollas/eventos to the compressed archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=6,
+            help='Archive events paid more than this many months ago (default: 6)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list what would be archived',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=30 * options['months'])
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No data will be moved'))
+
+        pollas = Polla.objects.filter(status='Paid', archived=False, date_race__lt=cutoff)
+        eventos = Evento.objects.filter(status='Paid', archived=False, date__lt=cutoff)
+
+        self.stdout.write(f'Archiving bets of {pollas.count()} pollas and {eventos.count()} eventos '
+                          f'before {cutoff:%Y-%m-%d}...')
+        if dry_run:
+            return
+
+        total = 0
+        for polla in pollas.iterator():
+            total += self.archive_polla(polla)
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Archived {total} polla bets'))
+
+        total = 0
+        for evento in eventos.iterator():
+            total += self.archive_evento(evento)
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Archived {total} evento bets'))
+
+    @transaction.atomic
+    def archive_polla(self, polla):
+        bets = list(BetPolla.objects.filter(polla=polla))
+        BetPollaArchive.objects.bulk_create([BetPollaArchive.from_bet(bet) for bet in bets], batch_size=1000)
+
+        # Transactions would be CASCADE-deleted with their bet
+        AccountTransaction.objects.filter(bet__polla=polla).update(bet=None)
+        BetPolla.objects.filter(polla=polla).delete()
+
+        Polla.objects.filter(pk=polla.pk).update(archived=True)
+        return len(bets)
+
+    @transaction.atomic
+    def archive_evento(self, evento):
+        bets = list(BetEvento.objects.filter(evento=evento))
+
+        # Predictions of bets stored the legacy way (core_betmatch rows)
+        predictions = {}
+        rows = BetMatch.objects.filter(bet_evento__evento=evento).order_by('bet_evento_id', 'match_id')
+        for bet_id, match_id, score1, score2, puntos in rows.values_list(
+                'bet_evento_id', 'match_id', 'score_team1', 'score_team2', 'puntos').iterator():
+            predictions.setdefault(bet_id, []).append((match_id, score1, score2, puntos))
+
+        BetEventoArchive.objects.bulk_create(
+            [BetEventoArchive.from_bet(bet, self.bet_predictions(bet, predictions)) for bet in bets],
+            batch_size=1000,
+        )
+
+        # Transactions would be CASCADE-deleted with their bet
+        EventTransaction.objects.filter(bet__evento=evento).update(bet=None)
+        BetMatch.objects.filter(bet_evento__evento=evento).delete()
+        BetEvento.objects.filter(evento=evento).delete()
+
+        Evento.objects.filter(pk=evento.pk).update(archived=True)
+        return len(bets)
+
+    def bet_predictions(self, bet, predictions):
+        """A bet's predictions, packed on the bet or from its core_betmatch rows"""
+        if bet.is_packed:
+            return packing.unpack_predictions(bet.predictions)
+        return predictions.get(bet.id, [])
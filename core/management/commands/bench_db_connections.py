@@ -0,0 +1,105 @@
+"""
+Benchmark - Connection setup cost vs. persistent connections
+
+Usage:
+    python manage.py bench_db_connections
+    python manage.py bench_db_connections --iterations 500 --database default
+
+Runs the same trivial query N times in two modes:
+1. Reconnect per request (what CONN_MAX_AGE=0 does: connect, TLS, auth,
+   init_command, query, close)
+2. Persistent connection (what CONN_MAX_AGE / the ASGI pool does: query only)
+
+With the pooled backend (core.db.backends.mysql_pool) close() only returns
+the connection to the pool, so mode 1 empties the pool after each close to
+really reconnect.
+
+The difference between both averages is the latency that persistent
+connections remove from every request.
+"""
+
+import queue
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Measure DB connection setup time removed by persistent connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Queries to run in each mode (default: 200)',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to benchmark (default: default)',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        connection = connections[options['database']]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Benchmarking '{options['database']}' ({connection.settings_dict['ENGINE']}), "
+            f"{iterations} iterations per mode..."
+        ))
+
+        # Warm up (first connect also runs the server version check)
+        self.run_query(connection)
+
+        reconnect = self.measure(connection, iterations, reconnect=True)
+        persistent = self.measure(connection, iterations, reconnect=False)
+        connection.close()
+
+        self.stdout.write('')
+        self.report('Reconnect per request', reconnect)
+        self.report('Persistent connection', persistent)
+
+        saved = statistics.mean(reconnect) - statistics.mean(persistent)
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'  ✓ Connection setup removed from each request: {saved:.2f} ms'
+        ))
+
+    def measure(self, connection, iterations, reconnect):
+        timings = []
+        for _ in range(iterations):
+            if reconnect:
+                self.disconnect(connection)
+            start = time.perf_counter()
+            self.run_query(connection)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    @staticmethod
+    def disconnect(connection):
+        """Close the connection for real, also when the backend pools it"""
+        connection.close()
+        pool = getattr(connection, 'pool', None)
+        while pool is not None:
+            try:
+                raw, _returned_at = pool.get_nowait()
+            except queue.Empty:
+                break
+            connection._discard(raw)
+
+    @staticmethod
+    def run_query(connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'  {label:<24} avg {statistics.mean(timings):7.2f} ms   '
+            f'median {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms'
+        )
@@ -0,0 +1,115 @@
+"""
+Benchmark - HTTP throughput of a running server
+
+Usage:
+    python manage.py bench_http http://127.0.0.1:8000/inside/ --user someone@email.com
+    python manage.py bench_http URL --requests 2000 --concurrency 50 --user someone@email.com
+
+Compare the sync and async user views by starting the same code under both
+servers and pointing the benchmark at each one:
+
+    # Current setup: gunicorn sync workers (WSGI, user_area.views)
+    gunicorn bets_project.wsgi:application --workers 4 --bind 127.0.0.1:8000
+
+    # ASGI: uvicorn workers (user_area.async_views)
+    uvicorn bets_project.asgi:application --workers 4 --port 8001
+
+    python manage.py bench_http http://127.0.0.1:8000/inside/ --user someone@email.com
+    python manage.py bench_http http://127.0.0.1:8001/inside/ --user someone@email.com
+
+--user creates a real session for that user in the configured session store,
+so the pages are benchmarked logged in.
+"""
+
+import statistics
+import time
+from importlib import import_module
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = 'Measure requests/second and latency of a URL on a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Full URL to request')
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Total requests to send (default: 500)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=20,
+            help='Concurrent clients (default: 20)',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the user to log in as',
+        )
+
+    def handle(self, *args, **options):
+        url = options['url']
+        total = options['requests']
+        concurrency = options['concurrency']
+
+        headers = {}
+        if options['user']:
+            headers['Cookie'] = f"{settings.SESSION_COOKIE_NAME}={self.create_session(options['user'])}"
+
+        self.stdout.write(self.style.SUCCESS(f'Benchmarking {url} ({total} requests, {concurrency} concurrent)...'))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: self.fetch(url, headers), range(total)))
+        elapsed = time.perf_counter() - start
+
+        timings = sorted(ms for ok, ms in results if ok)
+        errors = total - len(timings)
+
+        if not timings:
+            raise CommandError('All requests failed')
+
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write('')
+        self.stdout.write(f'  Throughput: {len(timings) / elapsed:8.1f} req/s')
+        self.stdout.write(f'  Latency:    avg {statistics.mean(timings):.1f} ms   '
+                          f'median {statistics.median(timings):.1f} ms   p95 {p95:.1f} ms')
+        if errors:
+            self.stdout.write(self.style.WARNING(f'  ! {errors} requests failed'))
+        else:
+            self.stdout.write(self.style.SUCCESS('  ✓ All requests succeeded'))
+
+    @staticmethod
+    def fetch(url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def create_session(email):
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            raise CommandError(f'User {email} not found')
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
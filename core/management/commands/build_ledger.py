@@ -0,0 +1,100 @@
+"""
+Ledger Backfill Command - Copy both transaction tables into core_ledgerentry
+
+Usage:
+    python manage.py build_ledger
+    python manage.py build_ledger --batch-size 5000
+
+New transactions are mirrored automatically by AccountTransaction.save() /
+EventTransaction.save(), and deletes by a post_delete receiver. This
+command copies the rows that existed before the unified ledger, or were
+written with bulk_create / raw SQL without their ledger rows (required
+repair step after those), and is safe to re-run: rows already in the
+ledger (or in its archive) are skipped. Rows edited with raw SQL are not
+refreshed: re-save them.
+
+Process:
+1. core_accounttransaction -> core_ledgerentry (source='polla')
+2. core_eventtransaction   -> core_ledgerentry (source='evento')
+3. Fill qty_cents of rows written before that column existed
+4. Verify row counts and totals per source (totals from qty_cents)
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import BigIntegerField, Count, F, Sum
+from django.db.models.functions import Cast, Round
+from core import money
+from core.models import AccountTransaction, EventTransaction, LedgerEntry, LedgerArchive
+
+
+class Command(BaseCommand):
+    help = 'Backfill the unified ledger from AccountTransaction and EventTransaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows inserted per bulk_create (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        self.copy(AccountTransaction, LedgerEntry.SOURCE_POLLA, batch_size)
+        self.copy(EventTransaction, LedgerEntry.SOURCE_EVENTO, batch_size)
+        self.fill_cents()
+        self.verify(AccountTransaction, LedgerEntry.SOURCE_POLLA)
+        self.verify(EventTransaction, LedgerEntry.SOURCE_EVENTO)
+
+    def copy(self, model, source, batch_size):
+        self.stdout.write(f'Copying {model._meta.db_table} into the ledger...')
+
+        already_mirrored = LedgerEntry.objects.filter(source=source).values('source_trx_id')
+        already_archived = LedgerArchive.objects.filter(source=source).values('source_trx_id')
+        pending = model.objects.exclude(id__in=already_mirrored).exclude(id__in=already_archived).order_by('id')
+
+        count = 0
+        batch = []
+        for trx in pending.iterator(chunk_size=batch_size):
+            batch.append(LedgerEntry.from_transaction(trx))
+            if len(batch) >= batch_size:
+                count += self.flush(batch)
+        count += self.flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Copied {count} rows'))
+
+    @staticmethod
+    def flush(batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            # ignore_conflicts: a row mirrored by a concurrent save() is not an error
+            LedgerEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def fill_cents(self):
+        cents = Cast(Round(F('qty') * 100), BigIntegerField())
+        filled = 0
+        for model in (LedgerEntry, LedgerArchive):
+            filled += model.objects.filter(qty_cents=0).exclude(qty=0).update(qty_cents=cents)
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Filled qty_cents of {filled} rows'))
+
+    def verify(self, model, source):
+        original = model.objects.aggregate(n=Count('id'), total=Sum('qty'))
+        live = LedgerEntry.objects.filter(source=source).aggregate(n=Count('id'), total=Sum('qty_cents'))
+        archived = LedgerArchive.objects.filter(source=source).aggregate(n=Count('id'), total=Sum('qty_cents'))
+
+        original_n, original_total = original['n'], original['total'] or 0
+        mirrored_n = live['n'] + archived['n']
+        mirrored_total = money.from_cents((live['total'] or 0) + (archived['total'] or 0))
+
+        self.stdout.write(
+            f"  {model._meta.db_table}: {original_n} rows / ${original_total} → "
+            f"ledger + archive: {mirrored_n} rows / ${mirrored_total}"
+        )
+        if (original_n, original_total) != (mirrored_n, mirrored_total):
+            self.stdout.write(self.style.WARNING(f'  ! {source} ledger does not match {model._meta.db_table}'))
@@ -0,0 +1,163 @@
+"""
+Ledger Compaction Command - Fold old rows into per-user balance snapshots
+
+Usage:
+    python manage.py compact_ledger                  # rows older than 90 days
+    python manage.py compact_ledger --days 30 --batch-size 200
+    python manage.py compact_ledger --audit          # only run the audit
+
+For every user with ledger rows older than the cutoff:
+1. Add the unreconciled total of those rows to the user's snapshot row
+   (LedgerEntry source='snapshot', tipo='Saldo'), creating it if needed
+2. Move the rows to core_ledgerarchive (bulk insert + delete by id)
+
+Users are processed in chunks, one transaction per chunk, so the live
+ledger (and every get_balance / statement scan) stays small and bounded.
+Balances do not change: snapshot + live rows = full history.
+
+The audit proves it for every user:
+- snapshot == unreconciled total of the user's archived rows
+- snapshot + live ledger == unreconciled total of AccountTransaction +
+  EventTransaction (the full history)
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from core import money
+from core.models import AccountTransaction, EventTransaction, LedgerEntry, LedgerArchive
+
+
+class Command(BaseCommand):
+    help = 'Fold old ledger rows into per-user snapshots and archive them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Compact rows older than this many days (default: 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Users compacted per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--audit',
+            action='store_true',
+            help='Only check snapshot + live == full history',
+        )
+
+    def handle(self, *args, **options):
+        if not options['audit']:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            self.compact(cutoff, options['batch_size'])
+
+        self.audit()
+
+    def compact(self, cutoff, batch_size):
+        self.stdout.write(f'Compacting ledger rows older than {cutoff:%Y-%m-%d %H:%M}...')
+
+        old_rows = LedgerEntry.objects.filter(trx_date__lt=cutoff).exclude(source=LedgerEntry.SOURCE_SNAPSHOT)
+        user_ids = list(old_rows.order_by().values_list('user_id', flat=True).distinct())
+
+        users_done = 0
+        rows_done = 0
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            rows_done += self.compact_users(old_rows.filter(user_id__in=chunk), cutoff)
+            users_done += len(chunk)
+            self.stdout.write(f'  {users_done}/{len(user_ids)} users, {rows_done} rows archived...')
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Archived {rows_done} rows of {users_done} users'))
+
+    def compact_users(self, rows, cutoff):
+        with transaction.atomic():
+            entries = list(rows.select_for_update())
+            if not entries:
+                return 0
+
+            totals = defaultdict(int)  # cents
+            for entry in entries:
+                if not entry.conciliado:
+                    totals[entry.user_id] += entry.qty_cents
+
+            LedgerArchive.objects.bulk_create([LedgerArchive.from_entry(entry) for entry in entries])
+            LedgerEntry.objects.filter(id__in=[entry.id for entry in entries]).delete()
+
+            for user_id, total in totals.items():
+                self.add_to_snapshot(user_id, total, cutoff)
+
+        return len(entries)
+
+    @staticmethod
+    def add_to_snapshot(user_id, cents, cutoff):
+        total = money.from_cents(cents)
+        snapshot = LedgerEntry.objects.filter(source=LedgerEntry.SOURCE_SNAPSHOT, source_trx_id=user_id)
+        updated = snapshot.update(
+            qty=F('qty') + total,
+            qty_cents=F('qty_cents') + cents,
+            trx_date=cutoff,
+            comment=f'Saldo al {cutoff:%Y-%m-%d}',
+        )
+        if not updated:
+            LedgerEntry.objects.create(
+                source=LedgerEntry.SOURCE_SNAPSHOT,
+                source_trx_id=user_id,
+                user_id=user_id,
+                tipo=LedgerEntry.TIPO_SALDO,
+                qty=total,
+                qty_cents=cents,
+                trx_date=cutoff,
+                comment=f'Saldo al {cutoff:%Y-%m-%d}',
+            )
+
+    def audit(self):
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS('Auditing ledger (snapshot + live = full history)...'))
+
+        # Every side is compared in integer cents: a SUM of the Decimal qty
+        # column comes back as a float on SQLite (e.g. 0.960000000000002)
+        snapshots = self.totals(LedgerEntry.objects.filter(source=LedgerEntry.SOURCE_SNAPSHOT), 'qty_cents')
+        archived = self.totals(LedgerArchive.objects.filter(conciliado=False), 'qty_cents')
+        live = self.totals(LedgerEntry.objects.filter(conciliado=False).exclude(source=LedgerEntry.SOURCE_SNAPSHOT), 'qty_cents')
+
+        history = self.totals(AccountTransaction.objects.filter(conciliado=False))
+        for user_id, total in self.totals(EventTransaction.objects.filter(conciliado=False)).items():
+            history[user_id] += total
+
+        errors = 0
+        for user_id in set(snapshots) | set(archived) | set(live) | set(history):
+            if snapshots[user_id] != archived[user_id]:
+                errors += 1
+                self.stdout.write(self.style.WARNING(
+                    f'  ! User {user_id}: snapshot ${money.from_cents(snapshots[user_id])} '
+                    f'!= archived ${money.from_cents(archived[user_id])}'
+                ))
+            if snapshots[user_id] + live[user_id] != history[user_id]:
+                errors += 1
+                self.stdout.write(self.style.WARNING(
+                    f'  ! User {user_id}: snapshot + live ${money.from_cents(snapshots[user_id] + live[user_id])} '
+                    f'!= history ${money.from_cents(history[user_id])}'
+                ))
+
+        if errors:
+            self.stdout.write(self.style.ERROR(f'  ✗ {errors} mismatches found'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'  ✓ {len(history)} users balanced, total ${money.from_cents(sum(history.values()))}'
+            ))
+
+    @staticmethod
+    def totals(queryset, column='qty'):
+        """{user_id: SUM(column)} in one GROUP BY, as integer cents"""
+        rows = queryset.order_by().values('user_id').annotate(total=Sum(column))
+        if column == 'qty_cents':
+            return defaultdict(int, {row['user_id']: row['total'] or 0 for row in rows})
+        return defaultdict(int, {row['user_id']: money.to_cents(row['total']) for row in rows})
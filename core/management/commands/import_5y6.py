@@ -0,0 +1,112 @@
+"""
+Import Command - Load 5y6 cuadros from CSV or JSON files
+
+Usage:
+    python manage.py import_5y6 --jornada 12 cuadros.csv
+    python manage.py import_5y6 --jornada 12 cuadros.json --chunk-size 2000
+    python manage.py import_5y6 --jornada 12 cuadros.csv --dry-run
+
+CSV: a header row, then nombre_cuadro and one column per race with the
+horses separated by '-' (or spaces):
+    nombre_cuadro,carrera1,carrera2,carrera3,carrera4,carrera5,carrera6
+    Juan 1,3-7,1,2-5-9,4,11,6-8
+
+JSON: a list of {"nombre_cuadro": "Juan 1", "carreras": [[3, 7], [1], ...]}
+
+All rows are validated before inserting (see core/entry5y6.py); nothing is
+written if any row is invalid.
+"""
+
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.entry5y6 import CHUNK_SIZE, validate_cuadros, create_cuadros
+from core.models import Jornada5y6
+from core.scoring5y6 import RACES
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for line in reader:
+            if not any(cell.strip() for cell in line):
+                continue
+            yield {
+                'nombre_cuadro': line[0],
+                'carreras': [cell.replace('-', ' ').split() for cell in line[1:1 + RACES]],
+            }
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        rows = json.load(f)
+    if not isinstance(rows, list):
+        raise CommandError('The JSON file must contain a list of cuadros')
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import 5y6 cuadros and their selecciones into a jornada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='CSV or JSON files')
+        parser.add_argument(
+            '--jornada',
+            type=int,
+            required=True,
+            help='Jornada to import into',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Cuadros per transaction (default: {CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only validate the files',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            jornada = Jornada5y6.objects.get(id=options['jornada'])
+        except Jornada5y6.DoesNotExist:
+            raise CommandError(f"Jornada {options['jornada']} not found")
+
+        started = time.monotonic()
+        rows = []
+        for path in options['files']:
+            extension = os.path.splitext(path)[1].lower()
+            if extension == '.csv':
+                rows.extend(read_csv(path))
+            elif extension == '.json':
+                rows.extend(read_json(path))
+            else:
+                raise CommandError(f'{path}: expected a .csv or .json file')
+
+        try:
+            cuadros = validate_cuadros(jornada, rows)
+        except ValueError as e:
+            raise CommandError(f'Invalid rows, nothing imported:\n{e}')
+        self.stdout.write(f'Validated {len(cuadros)} cuadros for {jornada}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('  ! Dry run, nothing imported'))
+            return
+
+        def progress(cuadros_done, selecciones_done):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'  {cuadros_done}/{len(cuadros)} cuadros ({cuadros_done / elapsed:.0f} cuadros/s)')
+
+        created, selecciones = create_cuadros(jornada, cuadros, options['chunk_size'], progress)
+
+        elapsed = time.monotonic() - started
+        rate = (created + selecciones) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'  ✓ Imported {created} cuadros and {selecciones} selecciones in {elapsed:.2f}s ({rate:.0f} rows/s)'
+        ))
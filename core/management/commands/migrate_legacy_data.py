@@ -3,6 +3,7 @@ Data Migration Command - Transfer data from legacy PHP tables to new Django tabl
 
 Usage:
     python manage.py migrate_legacy_data
+    python manage.py migrate_legacy_data --verify-only
 
 This command safely copies all data from the old PHP tables to the new Django tables.
 Legacy tables remain UNTOUCHED.
@@ -20,11 +21,13 @@ Safety Features:
 - Dry-run mode available
 - Transaction rollback on error
 - Progress reporting
-- Data verification
+- Data verification (--verify-only re-runs it against the read replica)
 """
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from core.db_routers import replica_reads
 from django.contrib.auth.hashers import make_password
 from core.models import (
     User, Racetrack, League, Team, Polla, Evento, Match,
@@ -54,11 +57,22 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip user migration',
         )
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Only compare record counts (reads from the replica if configured)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         skip_users = options['skip_users']
 
+        if options['verify_only']:
+            # Counting every table is a heavy read: keep it off the primary
+            with replica_reads():
+                self.verify_migration()
+            return
+
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No data will be saved'))
 
@@ -97,6 +111,11 @@ class Command(BaseCommand):
                 # Step 7: Migrate 5y6 system
                 self.migrate_5y6_system()
 
+                # Step 7b: Rebuild pot / entries counters, pick counts and 5y6 scores from the migrated data
+                call_command('rebuild_event_counters', stdout=self.stdout)
+                call_command('rebuild_pick_counts', stdout=self.stdout)
+                call_command('score_5y6', stdout=self.stdout)
+
                 # Step 8: Verify data
                 self.verify_migration()
 
@@ -265,6 +284,9 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f'  ! Error migrating match {legacy.idPartido}: {str(e)}'))
         self.stdout.write(self.style.SUCCESS(f'  ✓ Migrated {count} matches'))
 
+        # Denormalized first-match time of every evento (one UPDATE)
+        Evento.refresh_locks_at()
+
     def migrate_polla_bets(self):
         self.stdout.write('Migrating polla bets...')
         count = 0
@@ -416,11 +438,16 @@ class Command(BaseCommand):
         for legacy in LegacyCuadro5y6.objects.all():
             try:
                 jornada = Jornada5y6.objects.get(id=legacy.id_jornada)
+                nombre = legacy.nombre_cuadro
+                # Names are unique per jornada now; the PHP tables did not enforce it
+                if Cuadro5y6.objects.filter(jornada=jornada, nombre_cuadro=nombre).exclude(id=legacy.id).exists():
+                    nombre = f'{nombre} ({legacy.id})'
+                    self.stdout.write(self.style.WARNING(f'  ! Duplicate cuadro name renamed to "{nombre}"'))
                 Cuadro5y6.objects.update_or_create(
                     id=legacy.id,
                     defaults={
                         'jornada': jornada,
-                        'nombre_cuadro': legacy.nombre_cuadro,
+                        'nombre_cuadro': nombre,
                     }
                 )
                 cuadros_count += 1
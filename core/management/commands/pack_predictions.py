@@ -0,0 +1,89 @@
+"""
+Pack Predictions Command - Convert core_betmatch rows to packed storage
+
+Usage:
+    python manage.py pack_predictions                 # All eventos not archived
+    python manage.py pack_predictions --evento WC26
+    python manage.py pack_predictions --unpack --evento WC26
+
+For each evento, in one transaction:
+1. Read its core_betmatch rows as plain values
+2. Delete the core_betmatch rows
+3. Pack each bet's predictions into core_betevento.predictions (9 bytes per
+   match, see core/packing.py)
+
+--unpack does the reverse (e.g. before turning PACKED_PREDICTIONS off).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core import packing
+from core.models import Evento, BetEvento, BetMatch
+
+
+class Command(BaseCommand):
+    help = 'Pack evento match predictions into BetEvento.predictions (or --unpack them)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--evento',
+            help='Only this evento (code4)',
+        )
+        parser.add_argument(
+            '--unpack',
+            action='store_true',
+            help='Move packed predictions back to core_betmatch rows',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk query (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.filter(archived=False)
+        if options['evento']:
+            eventos = eventos.filter(code4=options['evento'])
+            if not eventos.exists():
+                raise CommandError(f"Evento {options['evento']} not found")
+
+        batch_size = options['batch_size']
+        total = 0
+        for evento in eventos.iterator():
+            if options['unpack']:
+                total += self.unpack_evento(evento, batch_size)
+            else:
+                total += self.pack_evento(evento, batch_size)
+
+        action = 'Unpacked' if options['unpack'] else 'Packed'
+        self.stdout.write(self.style.SUCCESS(f'  ✓ {action} predictions of {total} bets'))
+
+    @transaction.atomic
+    def pack_evento(self, evento, batch_size):
+        predictions = {}
+        rows = BetMatch.objects.filter(bet_evento__evento=evento, bet_evento__predictions__isnull=True)
+        for bet_id, match_id, score1, score2, puntos in rows.values_list(
+                'bet_evento_id', 'match_id', 'score_team1', 'score_team2', 'puntos').iterator(chunk_size=batch_size):
+            predictions.setdefault(bet_id, []).append((match_id, score1, score2, puntos))
+
+        rows.delete()
+
+        bets = []
+        for bet_id, records in predictions.items():
+            bet = BetEvento(id=bet_id)
+            bet.set_predictions(records)
+            bets.append(bet)
+        BetEvento.objects.bulk_update(bets, ['predictions'], batch_size=batch_size)
+        return len(bets)
+
+    @transaction.atomic
+    def unpack_evento(self, evento, batch_size):
+        bets = list(BetEvento.objects.filter(evento=evento, predictions__isnull=False).only('id', 'predictions'))
+
+        BetMatch.objects.bulk_create([
+            BetMatch(bet_evento_id=bet.id, match_id=match_id, score_team1=score1, score_team2=score2, puntos=puntos)
+            for bet in bets
+            for match_id, score1, score2, puntos in packing.unpack_predictions(bet.predictions)
+        ], batch_size=batch_size)
+        BetEvento.objects.filter(id__in=[bet.id for bet in bets]).update(predictions=None)
+        return len(bets)
@@ -0,0 +1,66 @@
+"""
+Session Purge Command - Delete expired sessions in small batches
+
+Usage:
+    python manage.py purge_sessions
+    python manage.py purge_sessions --batch-size 500 --sleep 0.2
+
+Unlike Django's clearsessions (one DELETE over the whole table), this deletes
+expired rows from django_session by primary key in batches, each in its own
+short transaction, so live logins are never blocked behind a long table lock.
+
+Only needed for the db / cached_db session engines.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in batches without locking django_session'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sessions deleted per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between batches (default: 0.1)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pause = options['sleep']
+
+        if settings.SESSION_ENGINE.endswith('signed_cookies'):
+            self.stdout.write(self.style.WARNING('Signed cookie sessions are not stored in the database - nothing to purge'))
+            return
+
+        now = timezone.now()
+        total = 0
+
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            self.stdout.write(f'  Deleted {total} expired sessions...')
+
+            if pause:
+                time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Purged {total} expired sessions'))
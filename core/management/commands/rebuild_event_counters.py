@@ -0,0 +1,90 @@
+"""
+Repair Command - Rebuild the denormalized counters of pollas and eventos
+
+Usage:
+    python manage.py rebuild_event_counters
+    python manage.py rebuild_event_counters --polla 123
+    python manage.py rebuild_event_counters --evento 45
+
+Recomputes entries, pot_total and commission_total from the bets and the
+ledger (AccountTransaction / EventTransaction), with one UPDATE per table,
+and the jackpot (Acumulado) totals from the unified ledger.
+
+Run it after migrate_legacy_data, or whenever a counter is suspected to have
+drifted (e.g. after editing transactions by hand).
+"""
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from core import money
+from core.models import (
+    Polla, Evento, BetPolla, BetEvento, BetPollaArchive, BetEventoArchive, AccountTransaction, EventTransaction,
+    LedgerEntry, LedgerArchive, Jackpot, JackpotShard
+)
+from core.subqueries import subquery_count, subquery_sum
+
+
+class Command(BaseCommand):
+    help = 'Rebuild entries / pot / commission counters of pollas and eventos from the ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--polla',
+            type=int,
+            help='Only rebuild this polla',
+        )
+        parser.add_argument(
+            '--evento',
+            type=int,
+            help='Only rebuild this evento',
+        )
+
+    def handle(self, *args, **options):
+        pollas = Polla.objects.all()
+        eventos = Evento.objects.all()
+
+        if options['polla']:
+            pollas = pollas.filter(id=options['polla'])
+            eventos = eventos.none()
+        elif options['evento']:
+            eventos = eventos.filter(id=options['evento'])
+            pollas = pollas.none()
+
+        with transaction.atomic():
+            self.stdout.write('Rebuilding polla counters...')
+            # Bets of archived pollas live in the archive table (see archive_bets)
+            count = pollas.update(
+                entries=subquery_count(BetPolla, 'polla') + subquery_count(BetPollaArchive, 'polla'),
+                pot_total=subquery_sum(AccountTransaction, 'polla', 'qty', tipo='Pote'),
+                commission_total=subquery_sum(AccountTransaction, 'polla', 'qty', tipo='Comision'),
+            )
+            self.stdout.write(self.style.SUCCESS(f'  ✓ Rebuilt {count} pollas'))
+
+            self.stdout.write('Rebuilding evento counters...')
+            count = eventos.update(
+                entries=subquery_count(BetEvento, 'evento') + subquery_count(BetEventoArchive, 'evento'),
+                pot_total=subquery_sum(EventTransaction, 'evento', 'qty', tipo='Pote'),
+                commission_total=subquery_sum(EventTransaction, 'evento', 'qty', tipo='Comision'),
+            )
+            self.stdout.write(self.style.SUCCESS(f'  ✓ Rebuilt {count} eventos'))
+
+            if not options['polla'] and not options['evento']:
+                self.rebuild_jackpots()
+
+        cache.delete(Jackpot.CACHE_KEY)
+
+    def rebuild_jackpots(self):
+        """Jackpot totals = SUM of their tipo in the live and archived ledger (snapshots are tipo Saldo)"""
+        self.stdout.write('Rebuilding jackpot totals...')
+        for tipo in Jackpot.TIPOS:
+            cents = sum(
+                model.objects.filter(tipo=tipo).aggregate(total=Sum('qty_cents'))['total'] or 0
+                for model in (LedgerEntry, LedgerArchive)
+            )
+            Jackpot.objects.get_or_create(tipo=tipo, defaults={'name': tipo})
+            # The whole total in shard 0, the other shards at zero
+            JackpotShard.objects.filter(tipo=tipo).delete()
+            JackpotShard.objects.create(tipo=tipo, shard=0, total_cents=cents)
+            self.stdout.write(self.style.SUCCESS(f'  ✓ {tipo}: ${money.from_cents(cents)}'))
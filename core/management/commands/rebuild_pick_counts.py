@@ -0,0 +1,59 @@
+"""
+Repair Command - Rebuild the per-polla horse pick count matrices
+
+Usage:
+    python manage.py rebuild_pick_counts
+    python manage.py rebuild_pick_counts --polla 123
+
+Recomputes core_pollapickcounts with a single scan of the bets (live
+core_betpolla rows and archived ones), reading only (polla_id, c1..c6).
+
+Bet placement keeps the matrices up to date; run this after
+migrate_legacy_data or if they are suspected to have drifted.
+"""
+
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core import packing
+from core.models import Polla, BetPolla, BetPollaArchive, PollaPickCounts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the 6 x 20 horse pick count matrix of every polla'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--polla',
+            type=int,
+            help='Only rebuild this polla',
+        )
+
+    def handle(self, *args, **options):
+        pollas = Polla.objects.all()
+        if options['polla']:
+            pollas = pollas.filter(id=options['polla'])
+        polla_ids = list(pollas.values_list('id', flat=True))
+
+        self.stdout.write('Scanning bets...')
+        matrices = defaultdict(packing.empty_pick_counts)
+
+        live = BetPolla.objects.filter(polla_id__in=pollas.values('id')).order_by()
+        for polla_id, *picks in live.values_list('polla_id', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6').iterator(chunk_size=5000):
+            packing.count_picks(matrices[polla_id], picks)
+
+        archived = BetPollaArchive.objects.filter(polla_id__in=pollas.values('id')).order_by()
+        for polla_id, picks in archived.values_list('polla_id', 'picks').iterator(chunk_size=5000):
+            packing.count_picks(matrices[polla_id], packing.unpack_picks(picks))
+
+        with transaction.atomic():
+            PollaPickCounts.objects.filter(polla_id__in=polla_ids).delete()
+            PollaPickCounts.objects.bulk_create([
+                PollaPickCounts(polla_id=polla_id, counts=packing.pack_pick_counts(matrix))
+                for polla_id, matrix in matrices.items()
+            ], batch_size=1000)
+
+        cache.delete_many([PollaPickCounts.cache_key(polla_id) for polla_id in polla_ids])
+        self.stdout.write(self.style.SUCCESS(f'  ✓ Rebuilt pick counts of {len(matrices)} pollas'))
@@ -0,0 +1,69 @@
+"""
+Scheduler Command - Close pollas and eventos at their cutoff
+
+Usage:
+    python manage.py run_scheduler                # one pass (e.g. from cron, every minute)
+    python manage.py run_scheduler --loop         # keep running
+    python manage.py run_scheduler --loop --interval 30
+
+Each pass, in bulk UPDATEs (no per-event queries):
+1. Refresh Evento.locks_at (first match start) of Running eventos
+2. Running pollas whose date_race has passed  -> Close
+3. Running eventos whose locks_at has passed  -> Close
+4. Fold new ledger rows into the daily rollups (core/rollups.py)
+
+Polla.is_open() / Evento.is_open() also compare the cutoff, so bets are
+refused at the exact time even between two passes.
+Results still have to be entered before paying (see pay_polla / pay_evento).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core import rollups
+from core.models import Polla, Evento
+
+
+class Command(BaseCommand):
+    help = 'Close Running pollas/eventos whose betting cutoff has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Run forever, one pass every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Seconds between passes with --loop (default: 60)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.run_once()
+            return
+
+        self.stdout.write(f"Scheduler running every {options['interval']}s (Ctrl+C to stop)...")
+        try:
+            while True:
+                self.run_once()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler stopped')
+
+    def run_once(self):
+        now = timezone.now()
+
+        Evento.refresh_locks_at(Evento.objects.filter(status='Running'))
+
+        pollas = Polla.objects.filter(status='Running', date_race__lte=now).update(status='Close')
+        eventos = Evento.objects.filter(status='Running', locks_at__lte=now).update(status='Close')
+
+        if pollas or eventos:
+            self.stdout.write(self.style.SUCCESS(
+                f'  ✓ {now:%Y-%m-%d %H:%M:%S}: closed {pollas} pollas and {eventos} eventos'
+            ))
+
+        rollups.refresh()
@@ -0,0 +1,45 @@
+"""
+Repair Command - Rescore and rank the cuadros of 5y6 jornadas
+
+Usage:
+    python manage.py score_5y6
+    python manage.py score_5y6 --jornada 12
+
+Recomputes aciertos, aciertos_mask and ranking of every cuadro from one scan
+of core_seleccion5y6 per jornada (see core/scoring5y6.py).
+
+Saving a Ganador5y6 already rescores its race; run this after
+migrate_legacy_data or if the scores are suspected to have drifted.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from core.models import Jornada5y6
+from core.scoring5y6 import evaluate_jornada
+
+
+class Command(BaseCommand):
+    help = 'Score and rank every cuadro of the 5y6 jornadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jornada',
+            type=int,
+            help='Only score this jornada',
+        )
+
+    def handle(self, *args, **options):
+        jornadas = Jornada5y6.objects.order_by('id')
+        if options['jornada']:
+            jornadas = jornadas.filter(id=options['jornada'])
+
+        updated = 0
+        started = time.monotonic()
+        for jornada in jornadas:
+            updated += evaluate_jornada(jornada)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'  ✓ Scored {jornadas.count()} jornadas ({updated} cuadros updated) in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,117 @@
+"""
+Core Middleware
+
+Both middlewares are sync and async capable: under ASGI (async views) they
+run in the event loop instead of making Django adapt every request through
+a thread.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from core import db_routers
+
+
+class SlidingSessionMiddleware:
+    """
+    Sliding session expiry without a write on every request
+
+    Replaces SESSION_SAVE_EVERY_REQUEST: the session (and its cookie) is only
+    re-saved once less than SESSION_REFRESH_THRESHOLD seconds of its lifetime
+    remain, so an active user writes the session at most once per
+    (SESSION_COOKIE_AGE - SESSION_REFRESH_THRESHOLD) seconds instead of on
+    every page view.
+
+    Must be placed after SessionMiddleware.
+    """
+    REFRESHED_AT_KEY = '_refreshed_at'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.refresh(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is not None and not hasattr(session, '_session_cache'):
+            # Not loaded by the view: reading it queries the session store
+            await sync_to_async(self.refresh)(request)
+        else:
+            self.refresh(request)
+        return response
+
+    def refresh(self, request):
+        """Bump the session expiry if it is close to running out (SessionMiddleware saves it)"""
+        session = getattr(request, 'session', None)
+        if session is None or session.session_key is None or session.is_empty():
+            return
+
+        now = int(time.time())
+        refreshed_at = session.get(self.REFRESHED_AT_KEY, 0)
+        remaining = settings.SESSION_COOKIE_AGE - (now - refreshed_at)
+
+        if remaining < settings.SESSION_REFRESH_THRESHOLD:
+            # Marks the session as modified: SessionMiddleware saves it with a
+            # fresh expiry and re-sends the cookie
+            session[self.REFRESHED_AT_KEY] = now
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes for the read replica (see core.db_routers)
+
+    When a request writes a bet or transaction, a short-lived cookie pins the
+    user to the primary for REPLICA_PIN_SECONDS; while it is present, views
+    marked @use_replica read from the primary instead.
+    """
+    COOKIE_NAME = 'lapolla_pin_primary'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = db_routers.start_request(pinned=self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_routers.end_request(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        # The request state dict is shared with the sync views' thread, so their writes show up here
+        state, token = db_routers.start_request(pinned=self.COOKIE_NAME in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_routers.end_request(token)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        """Set the pin cookie if the request wrote"""
+        if state['wrote']:
+            response.set_cookie(
+                self.COOKIE_NAME,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+
+        return response
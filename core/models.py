@@ -18,12 +18,20 @@ bets_eventos      -> core_betevento
 bets_ev_partidos  -> core_betmatch
 ctaCash           -> core_accounttransaction
 ev_ctaCash        -> core_eventtransaction
+(both)            -> core_ledgerentry (unified ledger, mirrors the two above)
 """
 
-from django.db import models
+import random
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 from decimal import Decimal
+from core import money, packing
+from core.subqueries import subquery_min
 
 
 # ==================== USER MODELS ====================
@@ -80,23 +88,28 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = 'core_user'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Admin user list: alias prefix search, newest first
+            models.Index(fields=['alias'], name='user_alias_idx'),
+            models.Index(fields=['date_joined', 'id'], name='user_date_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.alias} ({self.email})"
 
     def get_balance(self):
-        """Calculate user's total balance from both transaction tables"""
-        polla_balance = AccountTransaction.objects.filter(
-            user=self,
+        """Calculate user's total balance (one range scan of the unified ledger, integer SUM)"""
+        return money.from_cents(self.ledger_entries.filter(
             conciliado=False
-        ).aggregate(total=models.Sum('qty'))['total'] or Decimal('0.00')
+        ).aggregate(total=models.Sum('qty_cents'))['total'])
 
-        event_balance = EventTransaction.objects.filter(
-            user=self,
+    async def aget_balance(self):
+        """Async version of get_balance() (for the async user views)"""
+        result = await self.ledger_entries.filter(
             conciliado=False
-        ).aggregate(total=models.Sum('qty'))['total'] or Decimal('0.00')
+        ).aaggregate(total=models.Sum('qty_cents'))
 
-        return polla_balance + event_balance
+        return money.from_cents(result['total'])
 
 
 # ==================== REFERENCE DATA MODELS ====================
@@ -186,6 +199,20 @@ class Polla(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Running')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized counters, updated with F() by bet placement and payouts
+    # (rebuild from the ledger with: manage.py rebuild_event_counters)
+    entries = models.IntegerField(default=0, help_text='Number of bets')
+    pot_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text='SUM of Pote transactions')
+    commission_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text='SUM of Comision transactions')
+
+    # Set once its bets were moved to cold storage (manage.py archive_bets)
+    archived = models.BooleanField(default=False)
+
+    # Bumped whenever results, points or payments change (cache keys, ETag and
+    # Last-Modified of the results page)
+    results_version = models.PositiveIntegerField(default=0)
+    results_updated_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         db_table = 'core_polla'
         verbose_name = 'Polla (Horse Race Pool)'
@@ -196,9 +223,21 @@ class Polla(models.Model):
         return f"{self.code4} - {self.racetrack.nombre}"
 
     def is_open(self):
-        """Check if betting is still open"""
+        """Check if betting is still open (field reads only; run_scheduler closes it at date_race)"""
         return self.status == 'Running' and self.date_race > timezone.now()
 
+    def has_results(self):
+        """All six race winners entered"""
+        return None not in (self.f1, self.f2, self.f3, self.f4, self.f5, self.f6)
+
+    def bump_results_version(self):
+        """Invalidate cached results after results, points or payments change"""
+        Polla.objects.filter(pk=self.pk).update(
+            results_version=models.F('results_version') + 1,
+            results_updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['results_version', 'results_updated_at'])
+
     def is_paid(self):
         """Check if prizes have been distributed"""
         return self.status == 'Paid'
@@ -229,6 +268,24 @@ class Evento(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Running')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized counters, updated with F() by bet placement and payouts
+    # (rebuild from the ledger with: manage.py rebuild_event_counters)
+    entries = models.IntegerField(default=0, help_text='Number of bets')
+    pot_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text='SUM of Pote transactions')
+    commission_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text='SUM of Comision transactions')
+
+    # Set once its bets were moved to cold storage (manage.py archive_bets)
+    archived = models.BooleanField(default=False)
+
+    # Bumped whenever results, points or payments change (cache keys, ETag and
+    # Last-Modified of the results page)
+    results_version = models.PositiveIntegerField(default=0)
+    results_updated_at = models.DateTimeField(null=True, blank=True)
+
+    # Start of the earliest match: bets lock then (kept by refresh_locks_at(),
+    # run_scheduler closes the evento at this time)
+    locks_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         db_table = 'core_evento'
         verbose_name = 'Evento (Sports Event)'
@@ -239,15 +296,44 @@ class Evento(models.Model):
         return f"{self.code4} - {self.name}"
 
     def is_open(self):
-        """Check if betting is still open"""
-        return self.status == 'Running'
+        """Check if betting is still open (field reads only)"""
+        return self.status == 'Running' and (self.locks_at is None or self.locks_at > timezone.now())
+
+    def has_results(self):
+        """
+        Has matches, with scores entered for all of them (uses the num_matches /
+        pending_matches annotations when present)
+        """
+        pending = getattr(self, 'pending_matches', None)
+        if pending is not None:
+            num_matches = getattr(self, 'num_matches', None)
+            if num_matches is None:
+                return pending == 0 and self.matches.exists()
+            return pending == 0 and num_matches > 0
+        return self.matches.exists() and not self.matches.filter(
+            models.Q(score_team1__isnull=True) | models.Q(score_team2__isnull=True)
+        ).exists()
+
+    @classmethod
+    def refresh_locks_at(cls, queryset=None):
+        """Recompute locks_at from the matches, in one UPDATE"""
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.update(locks_at=subquery_min(Match, 'evento', 'date'))
+
+    def bump_results_version(self):
+        """Invalidate cached results after results, points or payments change"""
+        Evento.objects.filter(pk=self.pk).update(
+            results_version=models.F('results_version') + 1,
+            results_updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['results_version', 'results_updated_at'])
 
     def is_updatable(self):
         """Check if bets can be updated"""
         # Can update until first match starts
-        first_match = self.matches.order_by('date').first()
-        if first_match:
-            return timezone.now() < first_match.date
+        if self.locks_at:
+            return timezone.now() < self.locks_at
         return self.is_open()
 
 
@@ -349,6 +435,11 @@ class BetEvento(models.Model):
 
     status = models.CharField(max_length=20, default='ok')
 
+    # Compact storage: all match predictions packed in one column (see
+    # core/packing.py) instead of one core_betmatch row per match.
+    # NULL for bets stored the legacy way (core_betmatch rows).
+    predictions = models.BinaryField(null=True, blank=True, help_text='Packed (match id, scores, puntos) records')
+
     class Meta:
         db_table = 'core_betevento'
         verbose_name = 'Evento Bet'
@@ -358,6 +449,54 @@ class BetEvento(models.Model):
     def __str__(self):
         return f"{self.user.alias} - {self.evento.code4}"
 
+    @property
+    def is_packed(self):
+        return self.predictions is not None
+
+    def set_predictions(self, predictions):
+        """Pack [(match_id, score_team1, score_team2, puntos), ...] (does not save)"""
+        self.predictions = packing.pack_predictions(predictions)
+
+    def get_match_predictions(self, matches=None):
+        """
+        Match predictions of this bet, whichever way they are stored.
+
+        Returns BetMatch rows, or PackedPrediction objects with the same
+        attributes (match, match_id, score_team1, score_team2, puntos).
+        `matches` is an optional {id: Match} dict to avoid one query per match.
+        """
+        if not self.is_packed:
+            return list(self.match_predictions.select_related('match').order_by('match__orden_pa'))
+
+        if matches is None:
+            matches = self.evento.matches.in_bulk()
+        records = [
+            PackedPrediction(self, matches.get(match_id), match_id, score1, score2, puntos)
+            for match_id, score1, score2, puntos in packing.unpack_predictions(self.predictions)
+        ]
+        return sorted(records, key=lambda record: record.match.orden_pa if record.match else 0)
+
+
+class PackedPrediction:
+    """
+    Read-only BetMatch look-alike for a packed prediction
+
+    Lets templates and reports iterate a bet's predictions the same way
+    whether they come from BetEvento.predictions or core_betmatch.
+    """
+    __slots__ = ('bet_evento', 'match', 'match_id', 'score_team1', 'score_team2', 'puntos')
+
+    def __init__(self, bet_evento, match, match_id, score_team1, score_team2, puntos):
+        self.bet_evento = bet_evento
+        self.match = match
+        self.match_id = match_id
+        self.score_team1 = score_team1
+        self.score_team2 = score_team2
+        self.puntos = puntos
+
+    def __str__(self):
+        return f"{self.bet_evento.user.alias} - {self.match}"
+
 
 class BetMatch(models.Model):
     """
@@ -383,8 +522,212 @@ class BetMatch(models.Model):
         return f"{self.bet_evento.user.alias} - {self.match}"
 
 
+# ==================== BET ARCHIVE MODELS ====================
+
+class BetPollaArchive(models.Model):
+    """
+    Settled polla bet in cold storage (creates table: core_betpollaarchive)
+
+    Bets of Paid pollas older than N months are moved here by
+    `manage.py archive_bets`, keeping their original id. The six picks are
+    packed into 6 bytes; c1..c6 are still readable as attributes.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text='Original core_betpolla id')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_polla_bets')
+    polla = models.ForeignKey(Polla, on_delete=models.CASCADE, related_name='archived_bets')
+
+    picks = models.BinaryField(max_length=6, help_text='c1..c6 packed, 1 byte each')
+    credit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    date_bet = models.DateTimeField()
+    pto_tot = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, default='ok')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'core_betpollaarchive'
+        verbose_name = 'Archived Polla Bet'
+        verbose_name_plural = 'Archived Polla Bets'
+        indexes = [
+            models.Index(fields=['user', 'date_bet'], name='betpolla_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.alias} - {self.polla.code4} (archived)"
+
+    @property
+    def selections(self):
+        """(c1..c6) unpacked"""
+        return packing.unpack_picks(self.picks)
+
+    # Same attributes as BetPolla, so templates work with live and archived bets
+    c1 = property(lambda self: self.selections[0])
+    c2 = property(lambda self: self.selections[1])
+    c3 = property(lambda self: self.selections[2])
+    c4 = property(lambda self: self.selections[3])
+    c5 = property(lambda self: self.selections[4])
+    c6 = property(lambda self: self.selections[5])
+
+    @classmethod
+    def from_bet(cls, bet):
+        """Build (without saving) the archive row of a BetPolla"""
+        return cls(
+            id=bet.id,
+            user_id=bet.user_id,
+            polla_id=bet.polla_id,
+            picks=packing.pack_picks([bet.c1, bet.c2, bet.c3, bet.c4, bet.c5, bet.c6]),
+            credit_cost=bet.credit_cost,
+            date_bet=bet.date_bet,
+            pto_tot=bet.pto_tot,
+            status=bet.status,
+        )
+
+
+class BetEventoArchive(models.Model):
+    """
+    Settled evento bet in cold storage (creates table: core_beteventoarchive)
+
+    Replaces the bet's core_betevento row AND its core_betmatch rows: all
+    match predictions are packed (match id, scores, puntos) and compressed
+    into a single column.
+    """
+    id = models.BigIntegerField(primary_key=True, help_text='Original core_betevento id')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_evento_bets')
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='archived_bets')
+
+    predictions = models.BinaryField(help_text='zlib-compressed packed match predictions')
+    credit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    date_bet = models.DateTimeField()
+    puntos = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, default='ok')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'core_beteventoarchive'
+        verbose_name = 'Archived Evento Bet'
+        verbose_name_plural = 'Archived Evento Bets'
+        indexes = [
+            models.Index(fields=['user', 'date_bet'], name='betevento_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.alias} - {self.evento.code4} (archived)"
+
+    def get_predictions(self):
+        """[(match_id, score_team1, score_team2, puntos), ...]"""
+        return packing.unpack_predictions(packing.decompress(self.predictions))
+
+    @classmethod
+    def from_bet(cls, bet, predictions):
+        """Build (without saving) the archive row of a BetEvento and its predictions"""
+        return cls(
+            id=bet.id,
+            user_id=bet.user_id,
+            evento_id=bet.evento_id,
+            predictions=packing.compress(packing.pack_predictions(predictions)),
+            credit_cost=bet.credit_cost,
+            date_bet=bet.date_bet,
+            puntos=bet.puntos,
+            status=bet.status,
+        )
+
+
+# ==================== POLLA STATS MODELS ====================
+
+class PollaPickCounts(models.Model):
+    """
+    Bets per horse in each race of a polla (creates table: core_pollapickcounts)
+
+    A 6 x 20 count matrix packed in one 480-byte column, incremented by bet
+    placement (add_bet) instead of six GROUP BYs over core_betpolla per view.
+    Recompute with: python manage.py rebuild_pick_counts
+    """
+    polla = models.OneToOneField(Polla, on_delete=models.CASCADE, primary_key=True, related_name='pick_counts')
+    counts = models.BinaryField(help_text='6 x 20 uint32 counts (core/packing.py)')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    CACHE_SECONDS = 300
+
+    class Meta:
+        db_table = 'core_pollapickcounts'
+        verbose_name = 'Polla Pick Counts'
+        verbose_name_plural = 'Polla Pick Counts'
+
+    def __str__(self):
+        return f"{self.polla.code4} pick counts"
+
+    @property
+    def matrix(self):
+        """matrix[race][horse - 1] = number of bets"""
+        return packing.unpack_pick_counts(self.counts)
+
+    @staticmethod
+    def cache_key(polla_id):
+        return f'pickcounts:{polla_id}'
+
+    @classmethod
+    def add_bet(cls, bet):
+        """Count a new bet's picks (call inside the bet's transaction)"""
+        row, _ = cls.objects.select_for_update().get_or_create(
+            polla_id=bet.polla_id,
+            defaults={'counts': packing.pack_pick_counts(packing.empty_pick_counts())},
+        )
+        matrix = row.matrix
+        packing.count_picks(matrix, [bet.c1, bet.c2, bet.c3, bet.c4, bet.c5, bet.c6])
+        row.counts = packing.pack_pick_counts(matrix)
+        row.save(update_fields=['counts', 'updated_at'])
+
+        transaction.on_commit(lambda: cache.delete(cls.cache_key(bet.polla_id)))
+
+    @classmethod
+    def get_matrix(cls, polla_id):
+        """Cached 6 x 20 matrix of a polla (zeros while it has no bets)"""
+        key = cls.cache_key(polla_id)
+        matrix = cache.get(key)
+        if matrix is None:
+            row = cls.objects.filter(polla_id=polla_id).first()
+            matrix = row.matrix if row else packing.empty_pick_counts()
+            cache.set(key, matrix, cls.CACHE_SECONDS)
+        return matrix
+
+    @classmethod
+    def favourites(cls, polla_id, top=3):
+        """Most picked horses per race: [[(horse, bets, pct), ...] x 6]"""
+        races = []
+        for counts in cls.get_matrix(polla_id):
+            total = sum(counts)
+            ranked = sorted(
+                ((horse, n) for horse, n in enumerate(counts, start=1) if n),
+                key=lambda item: item[1], reverse=True,
+            )[:top]
+            races.append([(horse, n, round(100 * n / total, 1)) for horse, n in ranked])
+        return races
+
+
 # ==================== TRANSACTION MODELS ====================
 
+class TransactionQuerySet(models.QuerySet):
+    """
+    Queryset of the two transaction tables mirrored into core_ledgerentry
+
+    save() and delete() (also cascades and queryset.delete(), through the
+    post_delete receiver below) keep the ledger in sync. A queryset
+    update() would not, so it only allows detaching bets (bet=None), which
+    the ledger's SET_NULL foreign keys mirror by themselves.
+
+    bulk_create() does not mirror either: write the LedgerEntry rows in the
+    same transaction (see process_jackpot_payment) or repair with
+    `python manage.py build_ledger`.
+    """
+
+    def update(self, **kwargs):
+        if kwargs != {'bet': None}:
+            raise TypeError(
+                'update() would leave core_ledgerentry stale: save() each transaction '
+                '(or run build_ledger after raw changes)'
+            )
+        return super().update(**kwargs)
+
+
 class AccountTransaction(models.Model):
     """
     Transaction for pollas (creates table: core_accounttransaction)
@@ -409,6 +752,8 @@ class AccountTransaction(models.Model):
     tipo = models.CharField(max_length=50, choices=TIPO_CHOICES)
     conciliado = models.BooleanField(default=False)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         db_table = 'core_accounttransaction'
         verbose_name = 'Account Transaction'
@@ -418,6 +763,13 @@ class AccountTransaction(models.Model):
     def __str__(self):
         return f"{self.user.alias} - {self.tipo} - ${self.qty}"
 
+    def save(self, *args, **kwargs):
+        """Save and mirror the row into the unified ledger (core_ledgerentry)"""
+        created = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            LedgerEntry.mirror(self, created)
+
 
 class EventTransaction(models.Model):
     """
@@ -441,6 +793,8 @@ class EventTransaction(models.Model):
     tipo = models.CharField(max_length=50, choices=TIPO_CHOICES)
     conciliado = models.BooleanField(default=False)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         db_table = 'core_eventtransaction'
         verbose_name = 'Event Transaction'
@@ -450,6 +804,408 @@ class EventTransaction(models.Model):
     def __str__(self):
         return f"{self.user.alias} - {self.tipo} - ${self.qty}"
 
+    def save(self, *args, **kwargs):
+        """Save and mirror the row into the unified ledger (core_ledgerentry)"""
+        created = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            LedgerEntry.mirror(self, created)
+
+
+class LedgerEntry(models.Model):
+    """
+    Unified ledger (creates table: core_ledgerentry)
+
+    One row per AccountTransaction / EventTransaction, kept in sync by their
+    save(). Balances, statements and exports read ONLY this table, served by
+    the (user, trx_date, id) index instead of two aggregates + a Python merge.
+
+    Backfill existing rows with: python manage.py build_ledger
+
+    Old rows are periodically folded into one per-user snapshot row
+    (source='snapshot', tipo='Saldo', source_trx_id=user id) and moved to
+    LedgerArchive by: python manage.py compact_ledger
+    """
+    SOURCE_POLLA = 'polla'
+    SOURCE_EVENTO = 'evento'
+    SOURCE_SNAPSHOT = 'snapshot'
+    SOURCE_CHOICES = [
+        (SOURCE_POLLA, 'Polla (ctaCash)'),
+        (SOURCE_EVENTO, 'Evento (ev_ctaCash)'),
+        (SOURCE_SNAPSHOT, 'Balance snapshot'),
+    ]
+
+    # Snapshot rows carry the balance of the compacted history
+    TIPO_SALDO = 'Saldo'
+    TIPO_CHOICES = AccountTransaction.TIPO_CHOICES + [(TIPO_SALDO, 'Saldo')]
+
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    source_trx_id = models.BigIntegerField(help_text='id in core_accounttransaction / core_eventtransaction')
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ledger_entries')
+    polla = models.ForeignKey(Polla, on_delete=models.CASCADE, related_name='ledger_entries', null=True, blank=True)
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='ledger_entries', null=True, blank=True)
+    bet_polla = models.ForeignKey(BetPolla, on_delete=models.SET_NULL, related_name='ledger_entries', null=True, blank=True)
+    bet_evento = models.ForeignKey(BetEvento, on_delete=models.SET_NULL, related_name='ledger_entries', null=True, blank=True)
+
+    trx_date = models.DateTimeField(default=timezone.now)
+    qty = models.DecimalField(max_digits=10, decimal_places=2)
+    # Same amount in integer cents: balances and reports SUM this column
+    qty_cents = models.BigIntegerField(default=0)
+    comment = models.TextField(blank=True)
+    tipo = models.CharField(max_length=50, choices=TIPO_CHOICES)
+    conciliado = models.BooleanField(default=False)
+    # Insert time (trx_date is the business date and may be backdated): core.rollups lags on it
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'core_ledgerentry'
+        verbose_name = 'Ledger Entry'
+        verbose_name_plural = 'Ledger Entries'
+        ordering = ['-trx_date', '-id']
+        indexes = [
+            models.Index(fields=['user', 'trx_date', 'id'], name='ledger_user_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'source_trx_id'], name='ledger_unique_source_trx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.alias} - {self.tipo} - ${self.qty}"
+
+    @classmethod
+    def from_transaction(cls, trx):
+        """Build (without saving) the ledger row for an Account/EventTransaction"""
+        if isinstance(trx, AccountTransaction):
+            refs = {'source': cls.SOURCE_POLLA, 'polla_id': trx.polla_id, 'bet_polla_id': trx.bet_id}
+        else:
+            refs = {'source': cls.SOURCE_EVENTO, 'evento_id': trx.evento_id, 'bet_evento_id': trx.bet_id}
+
+        return cls(
+            source_trx_id=trx.pk,
+            user_id=trx.user_id,
+            trx_date=trx.trx_date,
+            qty=trx.qty,
+            qty_cents=money.to_cents(trx.qty),
+            comment=trx.comment,
+            tipo=trx.tipo,
+            conciliado=trx.conciliado,
+            **refs
+        )
+
+    @classmethod
+    def mirror(cls, trx, created=False):
+        """
+        Insert (new transaction) or refresh (edited one) the ledger row of a
+        transaction, and move the change into the jackpot totals
+        """
+        entry = cls.from_transaction(trx)
+        if created:
+            entry.save(force_insert=True)
+            Jackpot.track(None, (entry.tipo, entry.qty_cents))
+            return
+
+        fields = {
+            f.attname: getattr(entry, f.attname)
+            for f in cls._meta.concrete_fields
+            if f.attname not in ('id', 'source', 'source_trx_id', 'created_at')
+        }
+
+        rows = cls.objects.filter(source=entry.source, source_trx_id=trx.pk)
+        old = rows.select_for_update().values_list('tipo', 'qty_cents').first()
+        if old:
+            rows.update(**fields)
+            Jackpot.track(old, (entry.tipo, entry.qty_cents))
+            return
+
+        # Archived history is immutable (it is already part of a snapshot):
+        # corrections to old transactions need a new adjusting transaction
+        if not LedgerArchive.objects.filter(source=entry.source, source_trx_id=trx.pk).exists():
+            entry.save(force_insert=True)
+            Jackpot.track(None, (entry.tipo, entry.qty_cents))
+
+
+class LedgerArchive(models.Model):
+    """
+    Compacted ledger history (creates table: core_ledgerarchive)
+
+    Rows moved out of core_ledgerentry by compact_ledger, keeping their
+    original id. Their unreconciled total per user equals that user's
+    snapshot row in the live ledger (checked by compact_ledger --audit).
+    """
+    id = models.BigIntegerField(primary_key=True, help_text='Original core_ledgerentry id')
+    source = models.CharField(max_length=10, choices=LedgerEntry.SOURCE_CHOICES)
+    source_trx_id = models.BigIntegerField()
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_ledger_entries')
+    polla_id = models.BigIntegerField(null=True, blank=True)
+    evento_id = models.BigIntegerField(null=True, blank=True)
+    bet_polla_id = models.BigIntegerField(null=True, blank=True)
+    bet_evento_id = models.BigIntegerField(null=True, blank=True)
+
+    trx_date = models.DateTimeField()
+    qty = models.DecimalField(max_digits=10, decimal_places=2)
+    qty_cents = models.BigIntegerField(default=0)
+    comment = models.TextField(blank=True)
+    tipo = models.CharField(max_length=50, choices=LedgerEntry.TIPO_CHOICES)
+    conciliado = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'core_ledgerarchive'
+        verbose_name = 'Archived Ledger Entry'
+        verbose_name_plural = 'Archived Ledger Entries'
+        indexes = [
+            models.Index(fields=['user', 'trx_date'], name='ledger_archive_user_date_idx'),
+            models.Index(fields=['source', 'source_trx_id'], name='ledger_archive_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.tipo} - ${self.qty}"
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Build (without saving) the archive row of a LedgerEntry"""
+        return cls(
+            id=entry.id,
+            source=entry.source,
+            source_trx_id=entry.source_trx_id,
+            user_id=entry.user_id,
+            polla_id=entry.polla_id,
+            evento_id=entry.evento_id,
+            bet_polla_id=entry.bet_polla_id,
+            bet_evento_id=entry.bet_evento_id,
+            trx_date=entry.trx_date,
+            qty=entry.qty,
+            qty_cents=entry.qty_cents,
+            comment=entry.comment,
+            tipo=entry.tipo,
+            conciliado=entry.conciliado,
+        )
+
+
+@receiver(post_delete, sender=AccountTransaction)
+@receiver(post_delete, sender=EventTransaction)
+def unmirror_transaction(sender, instance, **kwargs):
+    """
+    Drop the ledger row of a deleted transaction (and its amount from the
+    jackpot totals). If compact_ledger already moved it to the archive, its
+    amount is also taken out of the user's snapshot row so snapshot + live
+    still equals the history
+    """
+    source = LedgerEntry.SOURCE_POLLA if sender is AccountTransaction else LedgerEntry.SOURCE_EVENTO
+    rows = LedgerEntry.objects.filter(source=source, source_trx_id=instance.pk)
+    old = rows.values_list('tipo', 'qty_cents').first()
+    if old:
+        rows.delete()
+        Jackpot.track(old, None)
+        return
+
+    archived = LedgerArchive.objects.filter(source=source, source_trx_id=instance.pk).first()
+    if archived is None:
+        return
+    if not archived.conciliado:
+        LedgerEntry.objects.filter(source=LedgerEntry.SOURCE_SNAPSHOT, source_trx_id=archived.user_id).update(
+            qty=models.F('qty') - archived.qty,
+            qty_cents=models.F('qty_cents') - archived.qty_cents,
+        )
+    archived.delete()
+    Jackpot.track((archived.tipo, archived.qty_cents), None)
+
+
+# ==================== JACKPOT MODELS ====================
+
+class Jackpot(models.Model):
+    """
+    Running total of an Acumulado jackpot (creates table: core_jackpot)
+
+    The total always equals the SUM of the live and archived ledger rows of
+    its tipo. Every ledger write of that tipo adds its amount, in the same
+    transaction, to one of SHARDS JackpotShard rows picked at random, so
+    concurrent bets rarely wait on the same row lock; payouts
+    (admin_panel.utils.process_jackpot_payment) subtract theirs.
+    Recompute with: python manage.py rebuild_event_counters
+    """
+    TIPOS = ['Acumulado2305', 'AcumuladoRecord2022']
+    SHARDS = 8
+    CACHE_KEY = 'jackpots'
+    CACHE_SECONDS = 30
+
+    tipo = models.CharField(max_length=50, unique=True, help_text='AccountTransaction tipo feeding this jackpot')
+    name = models.CharField(max_length=100, blank=True)
+    last_paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'core_jackpot'
+        verbose_name = 'Jackpot'
+        verbose_name_plural = 'Jackpots'
+        ordering = ['tipo']
+
+    def __str__(self):
+        return f"{self.name or self.tipo} - ${self.total}"
+
+    @property
+    def total_cents(self):
+        return self.totals_cents([self.tipo])[self.tipo]
+
+    @property
+    def total(self):
+        return money.from_cents(self.total_cents)
+
+    @classmethod
+    def totals_cents(cls, tipos=None):
+        """{tipo: cents}, the SUM of each jackpot's shards"""
+        tipos = tipos or cls.TIPOS
+        totals = dict.fromkeys(tipos, 0)
+        rows = JackpotShard.objects.filter(tipo__in=tipos).order_by().values('tipo').annotate(cents=models.Sum('total_cents'))
+        for row in rows:
+            totals[row['tipo']] += row['cents'] or 0
+        return totals
+
+    @classmethod
+    def add(cls, tipo, cents):
+        """Add `cents` (negative for payouts) to a jackpot's running total (call inside the write's transaction)"""
+        shard = random.randrange(cls.SHARDS)
+        updated = JackpotShard.objects.filter(tipo=tipo, shard=shard).update(
+            total_cents=models.F('total_cents') + cents,
+        )
+        if not updated:
+            JackpotShard.objects.get_or_create(tipo=tipo, shard=shard)
+            JackpotShard.objects.filter(tipo=tipo, shard=shard).update(total_cents=models.F('total_cents') + cents)
+
+    @classmethod
+    def track(cls, old, new):
+        """Apply a ledger row change, (tipo, cents) before and after (None if absent), to the running totals"""
+        deltas = {}
+        if old:
+            deltas[old[0]] = deltas.get(old[0], 0) - old[1]
+        if new:
+            deltas[new[0]] = deltas.get(new[0], 0) + new[1]
+        for tipo, cents in deltas.items():
+            if tipo in cls.TIPOS and cents:
+                cls.add(tipo, cents)
+
+    @classmethod
+    def ensure_all(cls):
+        """Create the missing Jackpot rows of TIPOS and return them all"""
+        for tipo in cls.TIPOS:
+            cls.objects.get_or_create(tipo=tipo, defaults={'name': tipo})
+        return list(cls.objects.filter(tipo__in=cls.TIPOS))
+
+    @classmethod
+    def current(cls):
+        """[(name, total)] of every jackpot, cached briefly for the dashboards"""
+        totals = cache.get(cls.CACHE_KEY)
+        if totals is None:
+            names = dict(cls.objects.values_list('tipo', 'name'))
+            totals = [
+                (names.get(tipo) or tipo, money.from_cents(cents))
+                for tipo, cents in cls.totals_cents().items()
+            ]
+            cache.set(cls.CACHE_KEY, totals, cls.CACHE_SECONDS)
+        return totals
+
+
+class JackpotShard(models.Model):
+    """
+    One slice of a jackpot's running total (creates table: core_jackpotshard)
+
+    Jackpot.add() updates one of Jackpot.SHARDS rows per tipo at random;
+    the jackpot's total is the SUM of its shards.
+    """
+    tipo = models.CharField(max_length=50, help_text='Jackpot tipo')
+    shard = models.SmallIntegerField()
+    total_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'core_jackpotshard'
+        verbose_name = 'Jackpot Shard'
+        verbose_name_plural = 'Jackpot Shards'
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'shard'], name='jackpotshard_unique_tipo_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.shard} - ${money.from_cents(self.total_cents)}"
+
+
+class JackpotPayout(models.Model):
+    """One payout of a jackpot to its winners (creates table: core_jackpotpayout)"""
+    jackpot = models.ForeignKey(Jackpot, on_delete=models.CASCADE, related_name='payouts')
+    paid_at = models.DateTimeField(default=timezone.now)
+    total_cents = models.BigIntegerField()
+    winners = models.IntegerField()
+    comment = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'core_jackpotpayout'
+        verbose_name = 'Jackpot Payout'
+        verbose_name_plural = 'Jackpot Payouts'
+        ordering = ['-paid_at']
+
+    def __str__(self):
+        return f"{self.jackpot.tipo} - {self.paid_at:%Y-%m-%d} - ${money.from_cents(self.total_cents)}"
+
+
+# ==================== REPORTING MODELS ====================
+
+class DailyRollup(models.Model):
+    """
+    Daily money totals (creates table: core_dailyrollup)
+
+    One row per day x source x tipo x racetrack / league / game type, summed
+    from the ledger by `manage.py refresh_rollups` (core/rollups.py). The
+    admin revenue report reads only this table.
+    """
+    day = models.DateField()
+    source = models.CharField(max_length=10, choices=LedgerEntry.SOURCE_CHOICES)
+    tipo = models.CharField(max_length=50)
+    racetrack = models.ForeignKey(Racetrack, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+    league = models.ForeignKey(League, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+    tipo_juego = models.IntegerField(null=True, blank=True, help_text="Evento's tipo_juego (null for pollas)")
+
+    entries = models.IntegerField(default=0)
+    total_cents = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'core_dailyrollup'
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        ordering = ['-day', 'source', 'tipo']
+        indexes = [
+            models.Index(fields=['day', 'source', 'tipo'], name='dailyrollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.source} - {self.tipo} - ${self.total}"
+
+    @property
+    def total(self):
+        return money.from_cents(self.total_cents)
+
+    def key(self):
+        return (self.day, self.source, self.tipo, self.racetrack_id, self.league_id, self.tipo_juego)
+
+
+class RollupWatermark(models.Model):
+    """
+    High-water mark of an incremental job (creates table: core_rollupwatermark)
+
+    last_id is the highest source row id already folded into the rollups.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'core_rollupwatermark'
+        verbose_name = 'Rollup Watermark'
+        verbose_name_plural = 'Rollup Watermarks'
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
+
 
 # ==================== 5Y6 SYSTEM MODELS ====================
 
@@ -474,10 +1230,20 @@ class Cuadro5y6(models.Model):
     nombre_cuadro = models.CharField(max_length=100)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    # Scoring (core/scoring5y6.py): races whose winner is among the cuadro's
+    # selections, and the cuadro's place in its jornada (1 = most aciertos)
+    aciertos = models.IntegerField(default=0, help_text='Races hit (0-6)')
+    aciertos_mask = models.PositiveSmallIntegerField(default=0, help_text='Bit r-1 set if race r was hit')
+    ranking = models.IntegerField(null=True, blank=True)
+
     class Meta:
         db_table = 'core_cuadro5y6'
         verbose_name = 'Cuadro 5y6'
         verbose_name_plural = 'Cuadros 5y6'
+        constraints = [
+            # core.entry5y6 reads bulk-inserted pks back by name (MySQL)
+            models.UniqueConstraint(fields=['jornada', 'nombre_cuadro'], name='cuadro5y6_unique_nombre'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_cuadro} - {self.jornada}"
@@ -493,6 +1259,10 @@ class Seleccion5y6(models.Model):
         db_table = 'core_seleccion5y6'
         verbose_name = 'Selección 5y6'
         verbose_name_plural = 'Selecciones 5y6'
+        indexes = [
+            # Cuadros that picked a race's winner (incremental scoring)
+            models.Index(fields=['numero_carrera', 'numero_caballo', 'cuadro'], name='seleccion5y6_race_horse_idx'),
+        ]
 
     def __str__(self):
         return f"Race {self.numero_carrera} - Horse {self.numero_caballo}"
@@ -513,3 +1283,23 @@ class Ganador5y6(models.Model):
 
     def __str__(self):
         return f"Race {self.numero_carrera} - Winner: {self.numero_caballo}"
+
+    def save(self, *args, **kwargs):
+        """Save and rescore the jornada's cuadros for this race (and the race it was moved from)"""
+        from core.scoring5y6 import score_race
+        with transaction.atomic():
+            old = None
+            if self.pk:
+                old = Ganador5y6.objects.filter(pk=self.pk).values_list('jornada_id', 'numero_carrera').first()
+            super().save(*args, **kwargs)
+            if old and old != (self.jornada_id, self.numero_carrera):
+                # The old race has no winner any more (one per race)
+                score_race(*old, None)
+            score_race(self.jornada_id, self.numero_carrera, self.numero_caballo)
+
+    def delete(self, *args, **kwargs):
+        from core.scoring5y6 import score_race
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            score_race(self.jornada_id, self.numero_carrera, None)
+        return result
@@ -0,0 +1,59 @@
+"""
+Money helpers - amounts as integer cents
+
+Amounts are stored as DecimalFields (price_entry, qty, credit_cost) for
+compatibility with the legacy tables. Arithmetic on them goes through
+integer cents so splits and totals are exact:
+- to_cents / from_cents: Decimal <-> int cents (rounded half-up)
+- percent: a rate of an amount in cents
+- split: equal shares of an amount that add up to it exactly
+- split_entry: commission / acumulado / pot shares of a bet entry
+
+SUM-heavy paths (balances, reports) read LedgerEntry.qty_cents, an integer
+column kept next to qty.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+# Shares of a bet entry (the pot gets the rest)
+POLLA_COMMISSION_RATE = Decimal('0.10')
+POLLA_ACUMULADO_RATE = Decimal('0.10')
+EVENTO_COMMISSION_RATE = Decimal('0.15')
+
+
+def to_cents(amount):
+    """Decimal / int / str amount -> int cents"""
+    if amount is None:
+        return 0
+    return int((Decimal(amount) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """int cents -> Decimal with 2 decimal places"""
+    return (Decimal(cents or 0) / 100).quantize(CENT)
+
+
+def percent(cents, rate):
+    """`rate` (e.g. Decimal('0.15')) of an amount in cents, rounded to the cent"""
+    return int((cents * Decimal(rate)).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def split(cents, parts):
+    """Split an amount into `parts` shares differing by at most one cent, summing to `cents`"""
+    base, remainder = divmod(cents, parts)
+    return [base + 1 if i < remainder else base for i in range(parts)]
+
+
+def split_entry(price_entry, *rates):
+    """
+    Shares of an entry price: one per rate, then the remainder (the pot).
+    The shares always add up to price_entry exactly.
+
+    split_entry(Decimal('2.00'), POLLA_COMMISSION_RATE, POLLA_ACUMULADO_RATE)
+    -> (Decimal('0.20'), Decimal('0.20'), Decimal('1.60'))
+    """
+    total = to_cents(price_entry)
+    shares = [percent(total, rate) for rate in rates]
+    shares.append(total - sum(shares))
+    return tuple(from_cents(share) for share in shares)
@@ -0,0 +1,72 @@
+"""
+Compact binary encodings for bet data
+
+Used where one row per prediction would cost more in ids, foreign keys and
+index entries than the data itself:
+- polla picks: 6 horse numbers -> 6 bytes
+- polla pick counts: 6 races x 20 horses matrix -> 480 bytes
+- evento predictions: (match id, score team1, score team2, puntos) records,
+  9 bytes each instead of one core_betmatch row per match
+"""
+import struct
+import zlib
+
+PICKS = struct.Struct('<6B')
+# match id (uint32), score team1 (int16), score team2 (int16), puntos (uint8)
+PREDICTION = struct.Struct('<IhhB')
+
+RACES = 6
+HORSES = 20
+# Bets per (race, horse), race-major, uint32
+PICK_COUNTS = struct.Struct(f'<{RACES * HORSES}I')
+
+
+def pack_picks(picks):
+    """[c1..c6] -> 6 bytes"""
+    return PICKS.pack(*picks)
+
+
+def unpack_picks(data):
+    """6 bytes -> (c1..c6)"""
+    return PICKS.unpack(bytes(data))
+
+
+def empty_pick_counts():
+    """6 x 20 matrix of zeros (matrix[race][horse - 1])"""
+    return [[0] * HORSES for _ in range(RACES)]
+
+
+def count_picks(matrix, picks):
+    """Add one bet's [c1..c6] to a pick count matrix (in place)"""
+    for race, horse in enumerate(picks):
+        if 1 <= horse <= HORSES:
+            matrix[race][horse - 1] += 1
+
+
+def pack_pick_counts(matrix):
+    """6 x 20 matrix -> 480 bytes"""
+    return PICK_COUNTS.pack(*(count for race in matrix for count in race))
+
+
+def unpack_pick_counts(data):
+    """480 bytes -> 6 x 20 matrix"""
+    flat = PICK_COUNTS.unpack(bytes(data))
+    return [list(flat[race * HORSES:(race + 1) * HORSES]) for race in range(RACES)]
+
+
+def pack_predictions(predictions):
+    """[(match_id, score1, score2, puntos), ...] -> bytes"""
+    return b''.join(PREDICTION.pack(*prediction) for prediction in predictions)
+
+
+def unpack_predictions(data):
+    """bytes -> [(match_id, score1, score2, puntos), ...]"""
+    return list(PREDICTION.iter_unpack(bytes(data)))
+
+
+def compress(data):
+    return zlib.compress(data, 9)
+
+
+def decompress(data):
+    return zlib.decompress(bytes(data))
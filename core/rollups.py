@@ -0,0 +1,134 @@
+"""
+Daily rollups - money totals per day, tipo, racetrack / league / game type
+
+core_dailyrollup is maintained incrementally from the unified ledger:
+1. The watermark (core_rollupwatermark, name 'ledger') holds the highest
+   core_ledgerentry id already counted
+2. Each refresh reads only the ledger rows above it, in id batches, and
+   adds their entries / qty_cents into the matching rollup rows
+3. Snapshot rows (compact_ledger) are skipped: they restate old balances
+
+A refresh never passes a row inserted (created_at) less than
+ROLLUP_LAG_SECONDS ago, so ids allocated by transactions still open are
+not jumped over. Only transactions open longer than that could be skipped.
+
+Rows are counted once, when first seen: editing or deleting a ledger row
+below the watermark (transaction edits, deletes, build_ledger) is NOT
+reflected. Run `python manage.py refresh_rollups --rebuild` afterwards;
+`rebuild()` recounts everything from core_ledgerentry + core_ledgerarchive.
+
+Usage:
+    from core.rollups import refresh, rebuild
+    refresh()        # run_scheduler does this every pass
+    rebuild()        # python manage.py refresh_rollups --rebuild
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from core.models import Polla, Evento, LedgerEntry, LedgerArchive, DailyRollup, RollupWatermark
+
+WATERMARK = 'ledger'
+BATCH_SIZE = 20000
+
+
+def _dimensions(polla_ids, evento_ids):
+    """({polla_id: racetrack_id}, {evento_id: (league_id, tipo_juego)})"""
+    racetracks = dict(Polla.objects.filter(id__in=polla_ids).values_list('id', 'racetrack_id'))
+    leagues = {
+        evento_id: (league_id, tipo_juego)
+        for evento_id, league_id, tipo_juego in Evento.objects.filter(id__in=evento_ids).values_list('id', 'league_id', 'tipo_juego')
+    }
+    return racetracks, leagues
+
+
+def aggregate(rows):
+    """
+    {(day, source, tipo, racetrack_id, league_id, tipo_juego): [entries, cents]}
+    from (trx_date, source, tipo, polla_id, evento_id, qty_cents) rows
+    """
+    rows = list(rows)
+    racetracks, leagues = _dimensions(
+        {row[3] for row in rows if row[3]}, {row[4] for row in rows if row[4]},
+    )
+
+    totals = defaultdict(lambda: [0, 0])
+    for trx_date, source, tipo, polla_id, evento_id, qty_cents in rows:
+        league_id, tipo_juego = leagues.get(evento_id, (None, None))
+        key = (timezone.localdate(trx_date), source, tipo, racetracks.get(polla_id), league_id, tipo_juego)
+        totals[key][0] += 1
+        totals[key][1] += qty_cents
+    return totals
+
+
+def merge(totals):
+    """Add aggregated totals into core_dailyrollup (update existing rows, create the rest)"""
+    if not totals:
+        return
+    now = timezone.now()
+    existing = {rollup.key(): rollup for rollup in DailyRollup.objects.filter(day__in={key[0] for key in totals})}
+
+    changed, created = [], []
+    for key, (entries, cents) in totals.items():
+        rollup = existing.get(key)
+        if rollup:
+            rollup.entries += entries
+            rollup.total_cents += cents
+            rollup.updated_at = now
+            changed.append(rollup)
+        else:
+            day, source, tipo, racetrack_id, league_id, tipo_juego = key
+            created.append(DailyRollup(
+                day=day, source=source, tipo=tipo, racetrack_id=racetrack_id, league_id=league_id,
+                tipo_juego=tipo_juego, entries=entries, total_cents=cents,
+            ))
+
+    DailyRollup.objects.bulk_update(changed, ['entries', 'total_cents', 'updated_at'], batch_size=1000)
+    DailyRollup.objects.bulk_create(created, batch_size=1000)
+
+
+def _ledger_rows(model, low, high):
+    return model.objects.filter(id__gt=low, id__lte=high).exclude(
+        source=LedgerEntry.SOURCE_SNAPSHOT
+    ).values_list('trx_date', 'source', 'tipo', 'polla_id', 'evento_id', 'qty_cents')
+
+
+def refresh(batch_size=BATCH_SIZE):
+    """Fold the ledger rows above the watermark into the rollups; returns the number of ledger ids covered"""
+    RollupWatermark.objects.get_or_create(name=WATERMARK)
+    cutoff = timezone.now() - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+
+    covered = 0
+    while True:
+        with transaction.atomic():
+            # The row lock also keeps two refreshes from counting the same batch
+            watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+            pending = LedgerEntry.objects.filter(id__gt=watermark.last_id)
+            # Stop below the first row inserted within the lag, whatever its trx_date
+            recent = pending.filter(created_at__gt=cutoff).aggregate(low=Min('id'))['low']
+            upper = recent - 1 if recent else pending.aggregate(upper=Max('id'))['upper']
+            if upper is None or upper <= watermark.last_id:
+                return covered
+
+            high = min(upper, watermark.last_id + batch_size)
+            merge(aggregate(_ledger_rows(LedgerEntry, watermark.last_id, high)))
+            covered += high - watermark.last_id
+            watermark.last_id = high
+            watermark.save(update_fields=['last_id', 'updated_at'])
+
+
+@transaction.atomic
+def rebuild(batch_size=BATCH_SIZE):
+    """Recount all rollups from scratch (live and archived ledger)"""
+    RollupWatermark.objects.get_or_create(name=WATERMARK)
+    RollupWatermark.objects.select_for_update().filter(name=WATERMARK).update(last_id=0)
+    DailyRollup.objects.all().delete()
+
+    archive_upper = LedgerArchive.objects.aggregate(upper=Max('id'))['upper'] or 0
+    for low in range(0, archive_upper, batch_size):
+        merge(aggregate(_ledger_rows(LedgerArchive, low, low + batch_size)))
+
+    return refresh(batch_size)
@@ -0,0 +1,138 @@
+"""
+5y6 Scoring Engine - Aciertos and ranking of every cuadro of a jornada
+
+A cuadro hits a race when the race's winner (Ganador5y6) is among its
+selections (Seleccion5y6) for that race. The selections of a race fit in one
+int: bit h-1 is set when horse h (1-20) is selected. Scoring is then a
+bitwise AND per race instead of joining selecciones row by row.
+
+Usage:
+    from core.scoring5y6 import evaluate_jornada, score_race
+    evaluate_jornada(jornada)                 # full scoring of a jornada
+    score_race(jornada.id, 3, 7)              # incremental: race 3 won by horse 7
+
+score_race() runs on every Ganador5y6.save()/delete(); evaluate_jornada()
+backs `manage.py score_5y6`.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from core.models import Cuadro5y6, Seleccion5y6, Ganador5y6
+
+RACES = 6
+HORSES = 20
+UPDATE_BATCH_SIZE = 1000
+
+
+def horse_bit(horse):
+    return 1 << (horse - 1) if 1 <= horse <= HORSES else 0
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def load_bitsets(jornada_id):
+    """{cuadro_id: [race 1 bitset, ..., race 6 bitset]} in one scan of the selecciones"""
+    bitsets = {cuadro_id: [0] * RACES for cuadro_id in Cuadro5y6.objects.filter(jornada_id=jornada_id).values_list('id', flat=True)}
+    rows = Seleccion5y6.objects.filter(cuadro__jornada_id=jornada_id).values_list('cuadro_id', 'numero_carrera', 'numero_caballo')
+    for cuadro_id, race, horse in rows.iterator(chunk_size=10000):
+        if 1 <= race <= RACES:
+            bitsets[cuadro_id][race - 1] |= horse_bit(horse)
+    return bitsets
+
+
+def load_cuadro_bitsets(cuadro_id):
+    """[race 1 bitset, ..., race 6 bitset] of one cuadro"""
+    bitsets = [0] * RACES
+    for race, horse in Seleccion5y6.objects.filter(cuadro_id=cuadro_id).values_list('numero_carrera', 'numero_caballo'):
+        if 1 <= race <= RACES:
+            bitsets[race - 1] |= horse_bit(horse)
+    return bitsets
+
+
+def winner_bits(jornada_id):
+    """[race 1 winner bit, ..., race 6 winner bit] (0 while a race has no winner)"""
+    winners = [0] * RACES
+    for race, horse in Ganador5y6.objects.filter(jornada_id=jornada_id).values_list('numero_carrera', 'numero_caballo'):
+        if 1 <= race <= RACES:
+            winners[race - 1] = horse_bit(horse)
+    return winners
+
+
+def hit_mask(bitsets, winners):
+    """Bit r-1 set if the cuadro hit race r"""
+    mask = 0
+    for race in range(RACES):
+        if bitsets[race] & winners[race]:
+            mask |= 1 << race
+    return mask
+
+
+def rankings(aciertos):
+    """{cuadro_id: rank} from {cuadro_id: aciertos}; ties share a rank (1, 2, 2, 4)"""
+    ranks = {}
+    previous = None
+    for position, (cuadro_id, hits) in enumerate(sorted(aciertos.items(), key=lambda item: (-item[1], item[0])), start=1):
+        if hits != previous:
+            rank = position
+            previous = hits
+        ranks[cuadro_id] = rank
+    return ranks
+
+
+def _persist(jornada_id, masks):
+    """
+    Write aciertos/mask/ranking of the cuadros whose values changed.
+
+    The rank only depends on the aciertos, so cuadros sharing a hit mask get
+    identical values: one UPDATE ... WHERE id IN (...) per mask (at most 64)
+    instead of a CASE per row.
+    """
+    aciertos = {cuadro_id: popcount(mask) for cuadro_id, mask in masks.items()}
+    ranks = rankings(aciertos)
+
+    changed = defaultdict(list)
+    current = Cuadro5y6.objects.filter(jornada_id=jornada_id).values_list('id', 'aciertos_mask', 'ranking')
+    for cuadro_id, old_mask, old_rank in current:
+        if (old_mask, old_rank) != (masks[cuadro_id], ranks[cuadro_id]):
+            changed[masks[cuadro_id]].append(cuadro_id)
+
+    for mask, ids in changed.items():
+        values = {'aciertos': popcount(mask), 'aciertos_mask': mask, 'ranking': ranks[ids[0]]}
+        for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+            Cuadro5y6.objects.filter(id__in=ids[start:start + UPDATE_BATCH_SIZE]).update(**values)
+    return sum(len(ids) for ids in changed.values())
+
+
+@transaction.atomic
+def evaluate_jornada(jornada):
+    """Score and rank every cuadro of a jornada from scratch; returns the number of cuadros updated"""
+    winners = winner_bits(jornada.id)
+    masks = {cuadro_id: hit_mask(bitsets, winners) for cuadro_id, bitsets in load_bitsets(jornada.id).items()}
+    return _persist(jornada.id, masks)
+
+
+@transaction.atomic
+def score_race(jornada_id, race, horse):
+    """
+    Rescore one race after its winner was entered (horse=None: removed).
+
+    Only the cuadros that selected the winner are read from core_seleccion5y6
+    (one indexed query); the other races' hits come from the stored masks.
+    """
+    if not 1 <= race <= RACES:
+        return 0
+
+    hit = set()
+    if horse is not None:
+        hit = set(Seleccion5y6.objects.filter(
+            cuadro__jornada_id=jornada_id, numero_carrera=race, numero_caballo=horse,
+        ).values_list('cuadro_id', flat=True))
+
+    bit = 1 << (race - 1)
+    masks = {}
+    for cuadro_id, mask in Cuadro5y6.objects.filter(jornada_id=jornada_id).values_list('id', 'aciertos_mask'):
+        masks[cuadro_id] = (mask | bit) if cuadro_id in hit else (mask & ~bit)
+    return _persist(jornada_id, masks)
@@ -0,0 +1,176 @@
+"""
+What-if Simulator - Outlook of every bet of a polla in progress
+
+Usage:
+    from core.simulator import simulate_polla
+    outlook = simulate_polla(polla)          # cached per result state
+    outlook['bets'][bet.id]
+    -> {'points': 3, 'max_points': 5, 'best_rank': 2, 'p_money': 0.31, 'expected_prize': 12.4}
+
+With some of f1..f6 known, for ALL bets of the polla in one batch:
+- current and maximum attainable points
+- best-case rank: every remaining race won by the bet's own pick
+- P(in the money) and expected prize over the outcomes of the remaining races
+
+All picks are loaded once into an (N, 6) uint8 array. The outcomes of the k
+remaining races are enumerated exactly while 20^k <= SIMULATOR_MAX_OUTCOMES,
+otherwise SIMULATOR_SAMPLES of them are drawn (Monte Carlo). Either way each
+horse's probability is its share of the picks (the public's odds, +1
+smoothing). Scoring a batch of outcomes for the whole field is one broadcast
+comparison instead of a Python loop per bet and outcome.
+"""
+import itertools
+
+import numpy as np
+from django.conf import settings
+from core import packing
+from core.models import BetPolla, BetPollaArchive
+from core.singleflight import single_flight
+
+OUTCOME_BATCH = 256  # outcomes scored per broadcast (bounds memory to batch x N x k)
+
+
+def place_percentages(num_participants):
+    """Share of the pot per place (same distribution as get_polla_winners)"""
+    if num_participants < 50:
+        return [0.70, 0.30]
+    return [0.60, 0.25, 0.15]
+
+
+def load_picks(polla):
+    """(bet ids, (N, 6) uint8 picks), earliest bet first (the tie-break order)"""
+    if polla.archived:
+        rows = BetPollaArchive.objects.filter(polla=polla).order_by('date_bet', 'id').values_list('id', 'picks')
+        ids = []
+        packed = []
+        for bet_id, picks in rows.iterator(chunk_size=5000):
+            ids.append(bet_id)
+            packed.append(bytes(picks))
+        picks = np.frombuffer(b''.join(packed), dtype=np.uint8).reshape(-1, packing.RACES)
+        return np.array(ids, dtype=np.int64), picks
+
+    rows = list(
+        BetPolla.objects.filter(polla=polla).order_by('date_bet', 'id')
+        .values_list('id', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6')
+    )
+    data = np.array(rows, dtype=np.int64).reshape(-1, packing.RACES + 1)
+    return data[:, 0], data[:, 1:].astype(np.uint8)
+
+
+def horse_probabilities(picks, race):
+    """P(horse wins race) from its share of the picks, smoothed so no horse is impossible"""
+    counts = np.bincount(picks[:, race], minlength=packing.HORSES + 1)[1:packing.HORSES + 1] + 1
+    return counts / counts.sum()
+
+
+def remaining_outcomes(picks, remaining, rng):
+    """(outcomes (M, k) of the remaining races, weights (M,), exact?)"""
+    if not remaining:
+        return np.zeros((1, 0), dtype=np.uint8), np.ones(1), True
+
+    probabilities = [horse_probabilities(picks, race) for race in remaining]
+    horses = np.arange(1, packing.HORSES + 1, dtype=np.uint8)
+
+    if packing.HORSES ** len(remaining) <= settings.SIMULATOR_MAX_OUTCOMES:
+        outcomes = np.array(list(itertools.product(horses, repeat=len(remaining))), dtype=np.uint8)
+        weights = np.ones(len(outcomes))
+        for column, p in enumerate(probabilities):
+            weights *= p[outcomes[:, column] - 1]
+        return outcomes, weights, True
+
+    samples = settings.SIMULATOR_SAMPLES
+    outcomes = np.stack([rng.choice(horses, size=samples, p=p) for p in probabilities], axis=1)
+    return outcomes, np.full(samples, 1.0 / samples), False
+
+
+def best_ranks(picks, current, remaining):
+    """Rank of each bet if every remaining race is won by its own pick"""
+    n = len(picks)
+    best = current + len(remaining)
+    ranks = np.empty(n, dtype=np.int64)
+
+    for start in range(0, n, OUTCOME_BATCH):
+        chunk = np.arange(start, min(start + OUTCOME_BATCH, n))
+        # Scores of the whole field when bet i's remaining picks all win (row i)
+        hits = (picks[chunk][:, None, remaining] == picks[None, :, remaining]).sum(axis=2)
+        scores = current[None, :] + hits
+        mine = best[chunk, None]
+        earlier = np.arange(n)[None, :] < chunk[:, None]  # placed before i on ties
+        ahead = (scores > mine) | ((scores == mine) & earlier)
+        ranks[chunk] = 1 + ahead.sum(axis=1)
+    return ranks
+
+
+def prize_equity(picks, current, remaining, outcomes, weights, pot):
+    """(P(in the money), expected prize) of each bet over the weighted outcomes"""
+    n = len(picks)
+    pcts = np.array(place_percentages(n)[:n])
+    places = len(pcts)
+    tiebreak = (n - 1 - np.arange(n))[None, :]  # earlier bet wins ties
+
+    p_money = np.zeros(n)
+    expected = np.zeros(n)
+    for start in range(0, len(outcomes), OUTCOME_BATCH):
+        batch = outcomes[start:start + OUTCOME_BATCH]
+        batch_weights = weights[start:start + OUTCOME_BATCH]
+
+        scores = current[None, :] + (picks[None, :, remaining] == batch[:, None, :]).sum(axis=2)
+        keys = scores * n + tiebreak
+
+        top = np.argpartition(-keys, places - 1, axis=1)[:, :places]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=1), axis=1), axis=1)
+
+        # Tied places split their own prize (as in get_polla_winners)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        ties = (top_scores[:, :, None] == top_scores[:, None, :]).sum(axis=2)
+        prizes = pcts[None, :] * pot / ties
+
+        np.add.at(expected, top.ravel(), (prizes * batch_weights[:, None]).ravel())
+        np.add.at(p_money, top.ravel(), np.repeat(batch_weights, places))
+
+    total = weights.sum()
+    return p_money / total, expected / total
+
+
+def run_simulation(polla):
+    """Outlook of every bet of the polla (uncached, see simulate_polla)"""
+    ids, picks = load_picks(polla)
+    results = [polla.f1, polla.f2, polla.f3, polla.f4, polla.f5, polla.f6]
+    remaining = [race for race, winner in enumerate(results) if winner is None]
+
+    outlook = {'remaining_races': [race + 1 for race in remaining], 'exact': True, 'outcomes': 0, 'bets': {}}
+    if not len(ids):
+        return outlook
+
+    current = np.zeros(len(ids), dtype=np.int64)
+    for race, winner in enumerate(results):
+        if winner is not None:
+            current += picks[:, race] == winner
+
+    rng = np.random.default_rng(polla.id)
+    outcomes, weights, exact = remaining_outcomes(picks, remaining, rng)
+    ranks = best_ranks(picks, current, remaining)
+    p_money, expected = prize_equity(picks, current, remaining, outcomes, weights, float(polla.pot_total))
+
+    outlook.update(exact=exact, outcomes=len(outcomes))
+    for i, bet_id in enumerate(ids.tolist()):
+        outlook['bets'][bet_id] = {
+            'points': int(current[i]),
+            'max_points': int(current[i]) + len(remaining),
+            'best_rank': int(ranks[i]),
+            'p_money': round(float(p_money[i]), 4),
+            'expected_prize': round(float(expected[i]), 2),
+        }
+    return outlook
+
+
+def simulate_polla(polla):
+    """Cached outlook of every bet, recomputed only when results or entries change"""
+    state = '-'.join(str(winner or 'x') for winner in (polla.f1, polla.f2, polla.f3, polla.f4, polla.f5, polla.f6))
+    return single_flight(
+        f'whatif:polla:{polla.id}:{state}:{polla.entries}',
+        lambda: run_simulation(polla),
+        ttl=settings.SIMULATOR_CACHE_SECONDS,
+        stale_ttl=0,
+        wait=60,
+    )
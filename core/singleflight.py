@@ -0,0 +1,92 @@
+"""
+Single-flight cache - compute a value once, however many requests want it
+
+    winners = single_flight(f'results:polla:{polla.id}', lambda: get_polla_winners(polla))
+
+- Fresh value in the cache: returned as is.
+- Stale value (older than `ttl`, kept `stale_ttl` longer): returned right
+  away (stale-while-revalidate); the one request that gets the refresh lock
+  recomputes it.
+- No value: the first request computes it while the others wait and share
+  the result. Within a worker they wait on a per-key thread lock, across
+  workers on a cache.add() lock. If the computation takes longer than `wait`
+  seconds the waiters compute it themselves.
+
+A thundering herd on a key therefore costs one computation instead of N.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+POLL_INTERVAL = 0.05  # seconds between cache checks while another worker computes
+
+# Per-key thread locks, dropped when no thread holds or waits on them
+_local_locks = {}  # key -> [lock, users]
+_local_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _local_lock(key, timeout):
+    """Hold this worker's lock for `key` (yields False if `timeout` passed first)"""
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    acquired = entry[0].acquire(timeout=timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            entry[0].release()
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _local_locks[key]
+
+
+def _store(key, value, ttl, stale_ttl):
+    cache.set(key, (value, time.time() + ttl), ttl + stale_ttl)
+
+
+def _refresh(key, lock_key, compute, ttl, stale_ttl):
+    try:
+        value = compute()
+        _store(key, value, ttl, stale_ttl)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def single_flight(key, compute, ttl=60, stale_ttl=300, wait=10):
+    """Cached compute() for `key`, computed by one request at a time"""
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() >= fresh_until and cache.add(lock_key, 1, wait):
+            # Stale: this request revalidates, the others keep the stale value
+            return _refresh(key, lock_key, compute, ttl, stale_ttl)
+        return value
+
+    deadline = time.monotonic() + wait
+    with _local_lock(key, wait) as acquired:
+        # Computed by another thread of this worker while we waited?
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if not acquired:
+            # That thread is taking too long: don't queue behind it
+            return compute()
+
+        while not cache.add(lock_key, 1, wait):
+            # Another worker is computing it
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+            if time.monotonic() >= deadline:
+                return compute()
+
+        return _refresh(key, lock_key, compute, ttl, stale_ttl)
@@ -0,0 +1,57 @@
+"""
+Correlated subquery helpers
+
+Annotate a per-row COUNT/SUM/MIN/MAX over a related table without a JOIN + GROUP BY
+of the outer query, e.g.:
+
+    Polla.objects.annotate(entries=subquery_count(BetPolla, 'polla'))
+
+or rebuild a denormalized column with a single UPDATE:
+
+    Polla.objects.update(entries=subquery_count(BetPolla, 'polla'))
+"""
+from django.db.models import Count, DecimalField, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def subquery_count(model, field, *conditions, **filters):
+    """COUNT(*) of the `model` rows whose `field` points at the outer row (0 if none)"""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(*conditions, **{field: OuterRef('pk')}, **filters)
+            .order_by().values(field).annotate(n=Count('pk')).values('n')
+        ),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def subquery_sum(model, field, column, output_field=None, **filters):
+    """SUM(column) of the `model` rows whose `field` points at the outer row (0 if none)"""
+    if output_field is None:
+        output_field = DecimalField(max_digits=12, decimal_places=2)
+
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}, **filters)
+            .order_by().values(field).annotate(total=Sum(column)).values('total')
+        ),
+        Value(0),
+        output_field=output_field,
+    )
+
+
+def subquery_min(model, field, column, **filters):
+    """MIN(column) of the `model` rows whose `field` points at the outer row (NULL if none)"""
+    return Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}, **filters)
+        .order_by().values(field).annotate(first=Min(column)).values('first')
+    )
+
+
+def subquery_max(model, field, column, **filters):
+    """MAX(column) of the `model` rows whose `field` points at the outer row (NULL if none)"""
+    return Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}, **filters)
+        .order_by().values(field).annotate(last=Max(column)).values('last')
+    )
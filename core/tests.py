@@ -0,0 +1,1241 @@
+"""
+Core tests
+
+Usage:
+    python manage.py test core
+"""
+import asyncio
+import io
+import os
+import itertools
+import queue
+import random
+import struct
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Q, Sum
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from core import (
+    archive, combinations5y6, db_routers, entry5y6, exports, money, packing, rollups, scoring5y6, simulator, singleflight
+)
+from core.management.commands.bench_db_connections import Command as BenchDbConnections
+from core.middleware import ReplicaPinMiddleware, SlidingSessionMiddleware
+from core.models import (
+    User, League, Team, Polla, Evento, Match, BetPolla, BetEvento, BetMatch, Racetrack, AccountTransaction,
+    EventTransaction, LedgerEntry, LedgerArchive, BetPollaArchive, BetEventoArchive, Jornada5y6, Cuadro5y6,
+    Seleccion5y6, Ganador5y6, PollaPickCounts, DailyRollup, RollupWatermark, Jackpot, JackpotShard
+)
+from core.subqueries import subquery_count
+from user_area import live, results
+
+
+# ==================== FIXTURES ====================
+
+def system_user():
+    """User 1 receives commissions and pots"""
+    return User.objects.get_or_create(id=1, defaults={'email': 'system@test.com', 'alias': 'system'})[0]
+
+
+def funded_user(alias, amount=10):
+    user = User.objects.create(email=f'{alias}@test.com', alias=alias)
+    AccountTransaction.objects.create(user=user, tipo='Premio', qty=amount)
+    return user
+
+
+def open_polla(code4, **fields):
+    racetrack, _ = Racetrack.objects.get_or_create(nombre='Test')
+    fields.setdefault('date_race', timezone.now() + timedelta(days=1))
+    return Polla.objects.create(code4=code4, racetrack=racetrack, **fields)
+
+
+def place_polla_bet(test, user, polla, picks):
+    """Bet through the user view (bet, pick counts and transactions in one go)"""
+    client = Client()
+    client.force_login(user)
+    response = client.post(f'/inside/polla/{polla.id}/bet/', {f'c{race}': horse for race, horse in enumerate(picks, start=1)})
+    test.assertEqual(response.status_code, 302)
+    return BetPolla.objects.get(user=user, polla=polla)
+
+
+# ==================== DB CONNECTIONS ====================
+
+class BenchDbConnectionsTests(SimpleTestCase):
+
+    class PooledConnection:
+        """Stand-in for core.db.backends.mysql_pool: close() parks the raw connection in the pool"""
+
+        class Raw:
+            closed = False
+
+        def __init__(self):
+            self.pool = queue.LifoQueue()
+            self.pool.put_nowait((self.Raw(), 0))
+
+        def close(self):
+            self.pool.put_nowait((self.Raw(), 0))
+
+        @staticmethod
+        def _discard(raw):
+            raw.closed = True
+
+    def test_disconnect_really_closes_pooled_connections(self):
+        connection = self.PooledConnection()
+        parked = [raw for raw, _ in list(connection.pool.queue)]
+        BenchDbConnections.disconnect(connection)
+        self.assertTrue(connection.pool.empty())
+        self.assertTrue(all(raw.closed for raw in parked))
+
+    def test_disconnect_without_pool(self):
+        closed = []
+
+        class Connection:
+            def close(self):
+                closed.append(True)
+
+        BenchDbConnections.disconnect(Connection())
+        self.assertEqual(closed, [True])
+
+
+# ==================== SESSIONS ====================
+
+class SlidingSessionTests(TestCase):
+
+    def request_with_session(self, refreshed_ago):
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session['user'] = 1
+        session[SlidingSessionMiddleware.REFRESHED_AT_KEY] = int(time.time()) - refreshed_ago
+        session.save()
+        session = import_module(settings.SESSION_ENGINE).SessionStore(session.session_key)
+        request = RequestFactory().get('/')
+        request.session = session
+        return request
+
+    def test_fresh_session_is_not_written(self):
+        request = self.request_with_session(refreshed_ago=60)
+        SlidingSessionMiddleware(lambda request: HttpResponse())(request)
+        self.assertFalse(request.session.modified)
+
+    def test_session_near_expiry_is_refreshed(self):
+        request = self.request_with_session(refreshed_ago=settings.SESSION_COOKIE_AGE - 60)
+        SlidingSessionMiddleware(lambda request: HttpResponse())(request)
+        self.assertTrue(request.session.modified)
+        self.assertAlmostEqual(request.session[SlidingSessionMiddleware.REFRESHED_AT_KEY], time.time(), delta=5)
+
+    def test_anonymous_request_is_ignored(self):
+        request = RequestFactory().get('/')
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        SlidingSessionMiddleware(lambda request: HttpResponse())(request)
+        self.assertFalse(request.session.modified)
+
+
+# ==================== READ REPLICA ====================
+
+@mock.patch.dict(settings.DATABASES, {db_routers.REPLICA: {}})
+class ReplicaRoutingTests(SimpleTestCase):
+    router = db_routers.PrimaryReplicaRouter()
+
+    def test_reads_only_go_to_the_replica_when_marked(self):
+        self.assertEqual(self.router.db_for_read(Racetrack), db_routers.DEFAULT)
+        with db_routers.replica_reads():
+            self.assertEqual(self.router.db_for_read(Racetrack), db_routers.REPLICA)
+        self.assertEqual(self.router.db_for_read(Racetrack), db_routers.DEFAULT)
+
+    def test_no_replica_configured(self):
+        with mock.patch.dict(settings.DATABASES):
+            del settings.DATABASES[db_routers.REPLICA]
+            with db_routers.replica_reads():
+                self.assertEqual(self.router.db_for_read(Racetrack), db_routers.DEFAULT)
+
+    def test_pinned_request_reads_the_primary(self):
+        state, token = db_routers.start_request(pinned=True)
+        try:
+            with db_routers.replica_reads():
+                self.assertEqual(self.router.db_for_read(Racetrack), db_routers.DEFAULT)
+        finally:
+            db_routers.end_request(token)
+
+    def test_bet_write_sets_the_pin_cookie(self):
+        def view(request, model):
+            self.router.db_for_write(model)
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(lambda request: view(request, BetPolla))(RequestFactory().get('/'))
+        self.assertIn(ReplicaPinMiddleware.COOKIE_NAME, response.cookies)
+        response = ReplicaPinMiddleware(lambda request: view(request, Racetrack))(RequestFactory().get('/'))
+        self.assertNotIn(ReplicaPinMiddleware.COOKIE_NAME, response.cookies)
+
+
+# ==================== ASYNC ====================
+
+class AsyncMiddlewareTests(SimpleTestCase):
+
+    def test_sync_chain_stays_sync(self):
+        for middleware in (SlidingSessionMiddleware, ReplicaPinMiddleware):
+            self.assertFalse(iscoroutinefunction(middleware(lambda request: HttpResponse())))
+
+    async def test_async_chain_runs_in_the_event_loop(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        for middleware in (SlidingSessionMiddleware, ReplicaPinMiddleware):
+            handler = middleware(view)
+            self.assertTrue(iscoroutinefunction(handler))
+            response = await handler(RequestFactory().get('/'))
+            self.assertEqual(response.content, b'ok')
+
+    async def test_writes_in_sync_views_pin_async_requests(self):
+        def write():
+            db_routers.PrimaryReplicaRouter().db_for_write(BetPolla)
+
+        async def view(request):
+            await sync_to_async(write)()
+            return HttpResponse()
+
+        response = await ReplicaPinMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn(ReplicaPinMiddleware.COOKIE_NAME, response.cookies)
+
+
+# ==================== LIVE UPDATES ====================
+
+class LivePotsTests(TestCase):
+
+    def test_compute_pots_lists_open_events_only(self):
+        racetrack = Racetrack.objects.create(nombre='Test')
+        now = timezone.now()
+        open_polla = Polla.objects.create(code4='OPEN', racetrack=racetrack, date_race=now + timedelta(hours=1), entries=3)
+        Polla.objects.create(code4='PAST', racetrack=racetrack, date_race=now - timedelta(hours=1))
+        Polla.objects.create(code4='SHUT', racetrack=racetrack, date_race=now + timedelta(hours=1), status='Close')
+
+        pots = live.compute_pots()
+        self.assertEqual([(row['id'], row['entries']) for row in pots['pollas']], [(open_polla.id, 3)])
+        self.assertEqual(pots['pollas'][0]['pot_total'], '0.00')
+
+    def test_aggregator_computes_once_per_interval(self):
+        cache.delete(live.CACHE_KEY)
+        aggregator = live.PotAggregator(interval=60)
+        with mock.patch.object(live, 'compute_pots', return_value={'pollas': [], 'eventos': []}) as compute:
+            async def listeners():
+                return await asyncio.gather(*(aggregator.snapshot() for _ in range(20)))
+
+            snapshots = asyncio.run(listeners())
+            # A second worker finds the totals in the shared cache
+            asyncio.run(live.PotAggregator(interval=60).snapshot())
+        self.assertEqual(compute.call_count, 1)
+        self.assertTrue(all(snapshot is snapshots[0] for snapshot in snapshots))
+        cache.delete(live.CACHE_KEY)
+
+
+# ==================== EVENT COUNTERS ====================
+
+class EventCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        system_user()
+        cls.polla = open_polla('CNT1')
+
+    def test_bets_update_the_counters(self):
+        for i in range(3):
+            place_polla_bet(self, funded_user(f'user{i}'), self.polla, [1, 2, 3, 4, 5, i + 1])
+        self.polla.refresh_from_db()
+        self.assertEqual(self.polla.entries, 3)
+        self.assertEqual(self.polla.pot_total, Decimal('4.80'))
+        self.assertEqual(self.polla.commission_total, Decimal('0.60'))
+
+    def test_rebuild_restores_drifted_counters(self):
+        place_polla_bet(self, funded_user('user'), self.polla, [1, 2, 3, 4, 5, 6])
+        Polla.objects.filter(pk=self.polla.pk).update(entries=99, pot_total=0, commission_total=0)
+        call_command('rebuild_event_counters', polla=self.polla.id, stdout=io.StringIO())
+        self.polla.refresh_from_db()
+        self.assertEqual((self.polla.entries, self.polla.pot_total, self.polla.commission_total), (1, Decimal('1.60'), Decimal('0.20')))
+
+
+# ==================== LEDGER ====================
+
+class LedgerMirrorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='user@test.com', alias='user')
+
+    def ledger_row(self, trx):
+        return LedgerEntry.objects.get(source=LedgerEntry.SOURCE_POLLA, source_trx_id=trx.pk)
+
+    def test_save_mirrors_and_edit_refreshes(self):
+        trx = AccountTransaction.objects.create(user=self.user, tipo='Premio', qty=Decimal('12.34'))
+        self.assertEqual(self.ledger_row(trx).qty_cents, 1234)
+        self.assertEqual(self.user.get_balance(), Decimal('12.34'))
+
+        trx.qty = Decimal('5.00')
+        trx.conciliado = True
+        trx.save()
+        row = self.ledger_row(trx)
+        self.assertEqual((row.qty_cents, row.conciliado), (500, True))
+        self.assertEqual(self.user.get_balance(), Decimal('0.00'))
+
+    def test_delete_unmirrors(self):
+        kept = AccountTransaction.objects.create(user=self.user, tipo='Premio', qty=3)
+        trx = AccountTransaction.objects.create(user=self.user, tipo='Premio', qty=7)
+        trx.delete()
+        league = League.objects.create(name='Test')
+        evento = Evento.objects.create(code4='LDG1', league=league, name='Test', date=timezone.now())
+        EventTransaction.objects.create(user=self.user, evento=evento, tipo='Premio', qty=4)
+        evento.delete()  # Cascades through queryset deletes
+        self.assertEqual(list(LedgerEntry.objects.values_list('source_trx_id', flat=True)), [kept.pk])
+        self.assertEqual(self.user.get_balance(), Decimal('3.00'))
+
+    def test_update_is_guarded(self):
+        AccountTransaction.objects.create(user=self.user, tipo='Premio', qty=3)
+        with self.assertRaises(TypeError):
+            AccountTransaction.objects.update(qty=4)
+        with self.assertRaises(TypeError):
+            EventTransaction.objects.filter(user=self.user).update(conciliado=True)
+        # Detaching bets is mirrored by the ledger's SET_NULL keys
+        self.assertEqual(AccountTransaction.objects.update(bet=None), 1)
+
+
+# ==================== COMPACTION ====================
+
+class LedgerCompactionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='user@test.com', alias='user')
+        last_week = timezone.now() - timedelta(days=7)
+        cls.old = [
+            AccountTransaction.objects.create(user=cls.user, tipo='Premio', qty=qty, trx_date=last_week)
+            for qty in (Decimal('0.32'), Decimal('0.64'), Decimal('-0.10'))
+        ]
+        AccountTransaction.objects.create(user=cls.user, tipo='Premio', qty=Decimal('1.00'))
+
+    def compact(self, *args):
+        out = io.StringIO()
+        call_command('compact_ledger', *args, days=1, stdout=out)
+        return out.getvalue()
+
+    def test_compaction_keeps_balance(self):
+        output = self.compact()
+        self.assertIn('Archived 3 rows', output)
+        self.assertNotIn('!', output)
+        self.assertEqual(LedgerArchive.objects.count(), 3)
+        snapshot = LedgerEntry.objects.get(source=LedgerEntry.SOURCE_SNAPSHOT)
+        self.assertEqual(snapshot.qty_cents, 86)
+        self.assertEqual(self.user.get_balance(), Decimal('1.86'))
+
+    def test_delete_of_compacted_transaction_adjusts_snapshot(self):
+        self.compact()
+        self.old[1].delete()
+        self.assertEqual(LedgerArchive.objects.count(), 2)
+        self.assertEqual(self.user.get_balance(), Decimal('1.22'))
+        self.assertNotIn('!', self.compact('--audit'))
+
+
+# ==================== BET ARCHIVE ====================
+
+class BetArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        last_year = timezone.now() - timedelta(days=365)
+        cls.user = User.objects.create(email='user@test.com', alias='user')
+        cls.polla = open_polla('ARC1', date_race=last_year, status='Paid')
+        cls.bet_polla = BetPolla.objects.create(
+            user=cls.user, polla=cls.polla, c1=1, c2=2, c3=3, c4=4, c5=5, c6=20, credit_cost=2, pto_tot=4,
+        )
+        AccountTransaction.objects.create(user=cls.user, bet=cls.bet_polla, polla=cls.polla, tipo='Apuesta', qty=-2)
+
+        league = League.objects.create(name='Test')
+        team = Team.objects.create(nombre='Team', league=league)
+        cls.evento = Evento.objects.create(code4='ARC1', league=league, name='Test', date=last_year, status='Paid')
+        match1, match2 = [
+            Match.objects.create(evento=cls.evento, team1=team, team2=team, date=last_year, orden_pa=i) for i in range(2)
+        ]
+        cls.packed = [(match1.id, 1, 0, 3), (match2.id, 2, 2, 0)]
+        bet = BetEvento.objects.create(user=cls.user, evento=cls.evento, credit_cost=2, puntos=3)
+        bet.set_predictions(cls.packed)
+        bet.save()
+        # Legacy storage: one core_betmatch row per prediction
+        other = User.objects.create(email='other@test.com', alias='other')
+        cls.legacy = BetEvento.objects.create(user=other, evento=cls.evento, credit_cost=2)
+        BetMatch.objects.create(bet_evento=cls.legacy, match=match1, score_team1=0, score_team2=0, puntos=1)
+
+        # Recent polla: stays live
+        cls.recent = open_polla('ARC2', status='Paid')
+        BetPolla.objects.create(user=cls.user, polla=cls.recent, c1=1, c2=1, c3=1, c4=1, c5=1, c6=1, credit_cost=2)
+
+    def test_archive_and_read_through(self):
+        call_command('archive_bets', stdout=io.StringIO())
+        self.polla.refresh_from_db()
+        self.evento.refresh_from_db()
+        self.assertTrue(self.polla.archived and self.evento.archived)
+        self.assertFalse(BetPolla.objects.filter(polla=self.polla).exists())
+        self.assertFalse(BetEvento.objects.exists())
+        self.assertFalse(BetMatch.objects.exists())
+        # Transactions are detached, not cascaded
+        self.assertEqual(AccountTransaction.objects.get(polla=self.polla).bet_id, None)
+
+        archived = archive.polla_bets(self.polla).get()
+        self.assertEqual((archived.id, archived.selections, archived.pto_tot), (self.bet_polla.id, (1, 2, 3, 4, 5, 20), 4))
+        predictions = {bet.id: bet.get_predictions() for bet in archive.evento_bets(self.evento)}
+        self.assertEqual(predictions[self.legacy.id], [(self.packed[0][0], 0, 0, 1)])
+        self.assertIn(self.packed, predictions.values())
+
+        polla_bets = archive.user_polla_bets(self.user)
+        self.assertEqual([type(bet) for bet in polla_bets], [BetPolla, BetPollaArchive])
+        self.assertEqual(len(archive.user_evento_bets(self.user)), 1)
+        self.assertEqual(archive.polla_bets(self.recent).count(), 1)
+
+    def test_dry_run_moves_nothing(self):
+        call_command('archive_bets', dry_run=True, stdout=io.StringIO())
+        self.assertFalse(BetPollaArchive.objects.exists() or BetEventoArchive.objects.exists())
+        self.assertEqual(BetEvento.objects.count(), 2)
+
+    def test_rebuild_counts_archived_bets(self):
+        call_command('archive_bets', stdout=io.StringIO())
+        Polla.objects.update(entries=0)
+        call_command('rebuild_event_counters', stdout=io.StringIO())
+        self.polla.refresh_from_db()
+        self.assertEqual(self.polla.entries, 1)
+
+
+# ==================== PACKING ====================
+
+class PackingTests(SimpleTestCase):
+
+    def test_picks_round_trip(self):
+        picks = (1, 20, 7, 3, 14, 9)
+        data = packing.pack_picks(picks)
+        self.assertEqual(len(data), 6)
+        self.assertEqual(packing.unpack_picks(data), picks)
+
+    def test_predictions_round_trip(self):
+        predictions = [(1, 0, 0, 0), (2**32 - 1, 999, 999, 3), (42, 2, 1, 255)]
+        data = packing.pack_predictions(predictions)
+        self.assertEqual(len(data), 9 * len(predictions))
+        self.assertEqual(packing.unpack_predictions(data), predictions)
+        self.assertEqual(packing.unpack_predictions(packing.decompress(packing.compress(data))), predictions)
+
+    def test_prediction_limits(self):
+        # The bet forms cap scores at 999, well inside int16
+        with self.assertRaises(struct.error):
+            packing.pack_predictions([(1, 2**15, 0, 0)])
+        with self.assertRaises(struct.error):
+            packing.pack_predictions([(1, 0, 0, 256)])
+        with self.assertRaises(struct.error):
+            packing.pack_predictions([(2**32, 0, 0, 0)])
+
+    def test_pick_counts_round_trip(self):
+        matrix = packing.empty_pick_counts()
+        packing.count_picks(matrix, [1, 2, 3, 4, 5, 20])
+        packing.count_picks(matrix, [1, 0, 21, 4, 5, 6])  # Out of range horses are ignored
+        self.assertEqual(matrix[0][0], 2)
+        self.assertEqual(matrix[5][19], 1)
+        self.assertEqual(sum(map(sum, matrix)), 10)
+        self.assertEqual(packing.unpack_pick_counts(packing.pack_pick_counts(matrix)), matrix)
+
+
+# ==================== MONEY ====================
+
+class MoneyTests(SimpleTestCase):
+
+    def test_cents_round_trip(self):
+        self.assertEqual(money.to_cents(Decimal('2.005')), 201)
+        self.assertEqual(money.to_cents(None), 0)
+        self.assertEqual(money.from_cents(201), Decimal('2.01'))
+
+    def test_split_sums_exactly(self):
+        for cents in (0, 1, 99, 100, 1001, 123457):
+            for parts in (1, 2, 3, 7, 13):
+                shares = money.split(cents, parts)
+                self.assertEqual(sum(shares), cents)
+                self.assertLessEqual(max(shares) - min(shares), 1)
+
+    def test_split_entry_sums_exactly(self):
+        self.assertEqual(
+            money.split_entry(Decimal('2.00'), money.POLLA_COMMISSION_RATE, money.POLLA_ACUMULADO_RATE),
+            (Decimal('0.20'), Decimal('0.20'), Decimal('1.60')),
+        )
+        for price in ('0.01', '0.05', '1.15', '2.35', '3.33', '7.77'):
+            shares = money.split_entry(Decimal(price), money.EVENTO_COMMISSION_RATE, money.POLLA_ACUMULADO_RATE)
+            self.assertEqual(sum(shares), Decimal(price))
+
+
+# ==================== SINGLE FLIGHT ====================
+
+class SingleFlightTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_herd_computes_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 42
+
+        results = queue.Queue()
+        threads = [
+            threading.Thread(target=lambda: results.put(singleflight.single_flight('sf:herd', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([results.get() for _ in threads], [42] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(singleflight._local_locks, {})
+
+    def test_stale_value_is_served_then_refreshed(self):
+        singleflight.single_flight('sf:stale', lambda: 1, ttl=0)
+        # Stale: this caller revalidates, later ones get the new value
+        self.assertEqual(singleflight.single_flight('sf:stale', lambda: 2), 2)
+        self.assertEqual(singleflight.single_flight('sf:stale', lambda: 3), 2)
+
+    def test_waiter_gives_up_after_wait(self):
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.5)
+            return 'slow'
+
+        thread = threading.Thread(target=singleflight.single_flight, args=('sf:slow', slow))
+        thread.start()
+        started.wait()
+        begin = time.monotonic()
+        self.assertEqual(singleflight.single_flight('sf:slow', lambda: 'fast', wait=0.05), 'fast')
+        self.assertLess(time.monotonic() - begin, 0.4)
+        thread.join()
+
+    def test_keys_do_not_share_locks(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocked():
+            started.set()
+            release.wait(1)
+            return 'a'
+
+        thread = threading.Thread(target=singleflight.single_flight, args=('sf:a', blocked))
+        thread.start()
+        started.wait()
+        self.assertEqual(singleflight.single_flight('sf:b', lambda: 'b', wait=0.01), 'b')
+        self.assertTrue(cache.get('sf:b'))  # Computed under its own lock, not as a fallback
+        release.set()
+        thread.join()
+
+
+# ==================== RESULTS CACHING ====================
+
+@mock.patch.object(db_routers, 'REPLICA', 'unconfigured')  # view_results reads from the primary
+class ResultsCachingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='user@test.com', alias='user')
+        cls.polla = open_polla('RES1', status='Close', f1=1, f2=2, f3=3, f4=4, f5=5, f6=6)
+        cls.polla.bump_results_version()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = f'/inside/results/polla/{self.polla.id}/'
+
+    def test_matching_etag_gets_304(self):
+        etag = results.results_etag(self.polla)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+        last_modified = response['Last-Modified']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_new_results_change_the_etag(self):
+        etag = results.results_etag(self.polla)
+        self.polla.bump_results_version()
+        self.assertNotEqual(results.results_etag(self.polla), etag)
+        request = RequestFactory().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertIsNone(results.not_modified(request, self.polla))
+
+    def test_paid_results_are_long_lived(self):
+        self.polla.status = 'Paid'
+        response = results.add_cache_headers(HttpResponse(), self.polla)
+        self.assertIn(f'max-age={settings.RESULTS_PAID_MAX_AGE}', response['Cache-Control'])
+        self.assertIn('"polla-', response['ETag'])
+
+    def test_snapshot_only_for_paid_events(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(RESULTS_SNAPSHOT_ROOT=root):
+            with open(results.snapshot_path(self.polla), 'w', encoding='utf-8') as f:
+                f.write('<table></table>')
+            self.assertIsNone(results.read_snapshot(self.polla))
+            self.polla.status = 'Paid'
+            self.assertEqual(results.read_snapshot(self.polla), '<table></table>')
+
+
+# ==================== SCHEDULER ====================
+
+class SchedulerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.league = League.objects.create(name='Test')
+        cls.team = Team.objects.create(nombre='Team', league=cls.league)
+        cls.past_polla = open_polla('SCH1', date_race=now - timedelta(minutes=1))
+        cls.future_polla = open_polla('SCH2')
+        cls.started = Evento.objects.create(code4='SCH1', league=cls.league, name='Started', date=now + timedelta(days=1))
+        cls.later = Evento.objects.create(code4='SCH2', league=cls.league, name='Later', date=now + timedelta(days=1))
+        cls.first = Match.objects.create(
+            evento=cls.started, team1=cls.team, team2=cls.team, date=now - timedelta(minutes=1), orden_pa=1,
+        )
+        Match.objects.create(evento=cls.started, team1=cls.team, team2=cls.team, date=now + timedelta(days=1), orden_pa=2)
+        Match.objects.create(evento=cls.later, team1=cls.team, team2=cls.team, date=now + timedelta(days=1), orden_pa=1)
+
+    def status(self, obj):
+        obj.refresh_from_db(fields=['status'])
+        return obj.status
+
+    def test_closes_at_cutoff(self):
+        out = io.StringIO()
+        call_command('run_scheduler', stdout=out)
+        self.assertIn('closed 1 pollas and 1 eventos', out.getvalue())
+        self.assertEqual(
+            [self.status(obj) for obj in (self.past_polla, self.future_polla, self.started, self.later)],
+            ['Close', 'Running', 'Close', 'Running'],
+        )
+        # Evento cutoff is its first match, not the evento date
+        self.started.refresh_from_db(fields=['locks_at'])
+        self.assertEqual(self.started.locks_at, self.first.date)
+
+    def test_has_results(self):
+        empty = Evento.objects.create(code4='SCH3', league=self.league, name='Empty', date=timezone.now())
+        self.assertFalse(empty.has_results())
+        self.assertFalse(self.started.has_results())
+        self.started.matches.update(score_team1=1, score_team2=0)
+        self.assertTrue(self.started.has_results())
+
+        annotated = Evento.objects.annotate(
+            num_matches=subquery_count(Match, 'evento'),
+            pending_matches=subquery_count(Match, 'evento', Q(score_team1__isnull=True) | Q(score_team2__isnull=True)),
+        ).in_bulk()
+        self.assertEqual(
+            [annotated[evento.pk].has_results() for evento in (empty, self.started, self.later)],
+            [False, True, False],
+        )
+
+    def test_closed_without_results_redirects(self):
+        call_command('run_scheduler', stdout=io.StringIO())
+        client = Client()
+        client.force_login(User.objects.create(email='user@test.com', alias='user'))
+        with mock.patch.object(db_routers, 'REPLICA', 'unconfigured'):
+            response = client.get(f'/inside/results/evento/{self.started.id}/')
+        self.assertRedirects(response, '/inside/', fetch_redirect_response=False)
+
+
+# ==================== PICK COUNTS ====================
+
+class PickCountsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        system_user()
+        cls.polla = open_polla('PCK1')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bets_are_counted(self):
+        place_polla_bet(self, funded_user('user1'), self.polla, [1, 2, 3, 4, 5, 6])
+        place_polla_bet(self, funded_user('user2'), self.polla, [1, 3, 3, 4, 5, 7])
+        place_polla_bet(self, funded_user('user3'), self.polla, [2, 3, 3, 4, 5, 8])
+        favourites = PollaPickCounts.favourites(self.polla.id)
+        self.assertEqual(favourites[0], [(1, 2, 66.7), (2, 1, 33.3)])
+        self.assertEqual(favourites[2], [(3, 3, 100.0)])
+        self.assertEqual(len(favourites[5]), 3)
+
+    def test_rebuild_matches_incremental(self):
+        place_polla_bet(self, funded_user('user1'), self.polla, [1, 2, 3, 4, 5, 6])
+        place_polla_bet(self, funded_user('user2'), self.polla, [20, 19, 18, 17, 16, 15])
+        incremental = PollaPickCounts.get_matrix(self.polla.id)
+
+        PollaPickCounts.objects.all().delete()
+        self.assertEqual(sum(map(sum, PollaPickCounts.get_matrix(self.polla.id))), 12)  # Cached
+        call_command('rebuild_pick_counts', stdout=io.StringIO())
+        self.assertEqual(PollaPickCounts.get_matrix(self.polla.id), incremental)
+
+    def test_polla_without_bets(self):
+        self.assertEqual(PollaPickCounts.favourites(self.polla.id), [[]] * 6)
+
+
+# ==================== WHAT-IF SIMULATOR ====================
+
+class SimulatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(41)
+        cls.polla = open_polla('SIM1', status='Close', pot_total=Decimal('100.00'), f1=1, f2=2, f3=3, f4=4, f5=5)
+        for i in range(12):
+            user = User.objects.create(email=f'user{i}@test.com', alias=f'user{i}')
+            picks = {f'c{race}': rng.randint(1, 5) for race in range(1, 7)}
+            BetPolla.objects.create(user=user, polla=cls.polla, credit_cost=2, **picks)
+
+    def brute_force(self, polla):
+        """Best rank of each bet, one Python loop per bet (earlier bet wins ties)"""
+        bets = list(BetPolla.objects.filter(polla=polla).order_by('date_bet', 'id').values_list(
+            'id', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6'))
+        results = [polla.f1, polla.f2, polla.f3, polla.f4, polla.f5, polla.f6]
+        ranks = {}
+        for n, (bet_id, *picks) in enumerate(bets):
+            outcome = [winner or pick for winner, pick in zip(results, picks)]
+            scores = [sum(pick == winner for pick, winner in zip(other[1:], outcome)) for other in bets]
+            ranks[bet_id] = 1 + sum(
+                score > scores[n] or (score == scores[n] and i < n) for i, score in enumerate(scores)
+            )
+        return ranks
+
+    def test_one_race_left_is_exact(self):
+        outlook = simulator.run_simulation(self.polla)
+        self.assertEqual((outlook['remaining_races'], outlook['exact'], outlook['outcomes']), ([6], True, 20))
+        bets = outlook['bets']
+        self.assertEqual({bet_id: bet['best_rank'] for bet_id, bet in bets.items()}, self.brute_force(self.polla))
+        for bet in bets.values():
+            self.assertEqual(bet['max_points'], bet['points'] + 1)
+
+        # Expected prize = get_polla_winners() averaged over the 20 possible winners
+        from admin_panel.utils import get_polla_winners
+        self.polla.entries = 12
+        _, picks = simulator.load_picks(self.polla)
+        probabilities = simulator.horse_probabilities(picks, 5)
+        expected = dict.fromkeys(bets, 0)
+        for horse, p in enumerate(probabilities, start=1):
+            for bet in BetPolla.objects.filter(polla=self.polla):
+                bet.pto_tot = sum(pick == winner for pick, winner in zip(
+                    (bet.c1, bet.c2, bet.c3, bet.c4, bet.c5, bet.c6), (1, 2, 3, 4, 5, horse)))
+                bet.save(update_fields=['pto_tot'])
+            for winner in get_polla_winners(self.polla):
+                expected[winner['bet'].id] += p * float(winner['prize'])
+        for bet_id, bet in bets.items():
+            self.assertAlmostEqual(bet['expected_prize'], expected[bet_id], delta=0.01)
+
+    def test_all_results_known(self):
+        self.polla.f6 = 1
+        outlook = simulator.run_simulation(self.polla)
+        self.assertEqual((outlook['exact'], outlook['outcomes']), (True, 1))
+        p_money = sorted((bet['p_money'] for bet in outlook['bets'].values()), reverse=True)
+        self.assertEqual(p_money, [1, 1] + [0] * 10)
+
+    @override_settings(SIMULATOR_SAMPLES=500)
+    def test_many_races_left_are_sampled(self):
+        self.polla.f3 = self.polla.f4 = self.polla.f5 = None
+        outlook = simulator.run_simulation(self.polla)
+        self.assertEqual((outlook['exact'], outlook['outcomes']), (False, 500))
+        # Two places (under 50 bets) in every sampled outcome
+        self.assertAlmostEqual(sum(bet['p_money'] for bet in outlook['bets'].values()), 2, places=3)
+        self.assertEqual(outlook, simulator.run_simulation(self.polla))  # Seeded per polla
+
+    def test_no_bets(self):
+        outlook = simulator.run_simulation(open_polla('SIM2'))
+        self.assertEqual((outlook['remaining_races'], outlook['bets']), ([1, 2, 3, 4, 5, 6], {}))
+
+
+# ==================== 5y6 SCORING ====================
+
+class Scoring5y6Tests(TestCase):
+
+    def test_hit_mask_and_rankings(self):
+        bitsets = [scoring5y6.horse_bit(3) | scoring5y6.horse_bit(5), scoring5y6.horse_bit(1), 0, 0, 0, 0]
+        winners = [scoring5y6.horse_bit(5), scoring5y6.horse_bit(2), 0, 0, 0, 0]
+        self.assertEqual(scoring5y6.hit_mask(bitsets, winners), 0b1)
+        self.assertEqual(scoring5y6.horse_bit(21), 0)
+        self.assertEqual(scoring5y6.rankings({1: 3, 2: 5, 3: 3, 4: 0}), {2: 1, 1: 2, 3: 2, 4: 4})
+
+    def test_incremental_matches_full_scoring(self):
+        rng = random.Random(6)
+        jornada = Jornada5y6.objects.create(hipodromo='Test', fecha=timezone.localdate())
+        selecciones = {}
+        for i in range(30):
+            cuadro = Cuadro5y6.objects.create(jornada=jornada, nombre_cuadro=f'c{i}')
+            selecciones[cuadro.id] = {race: rng.sample(range(1, 21), rng.randint(1, 4)) for race in range(1, 7)}
+            Seleccion5y6.objects.bulk_create([
+                Seleccion5y6(cuadro=cuadro, numero_carrera=race, numero_caballo=horse)
+                for race, horses in selecciones[cuadro.id].items() for horse in horses
+            ])
+
+        # Every save/delete rescores its race incrementally
+        winners = {}
+        for race in range(1, 7):
+            winners[race] = rng.randint(1, 20)
+            ganador = Ganador5y6.objects.create(jornada=jornada, numero_carrera=race, numero_caballo=winners[race])
+        ganador.delete()  # Race 6
+        del winners[6]
+        ganador = Ganador5y6.objects.get(jornada=jornada, numero_carrera=5)
+        ganador.numero_carrera = 6
+        ganador.save()
+        winners[6] = winners.pop(5)
+
+        incremental = dict(Cuadro5y6.objects.filter(jornada=jornada).values_list('id', 'aciertos_mask'))
+        for cuadro_id, mask in incremental.items():
+            expected = sum(1 << (race - 1) for race, horse in winners.items() if horse in selecciones[cuadro_id][race])
+            self.assertEqual(mask, expected)
+
+        Cuadro5y6.objects.filter(jornada=jornada).update(aciertos=0, aciertos_mask=0, ranking=None)
+        scoring5y6.evaluate_jornada(jornada)
+        self.assertEqual(dict(Cuadro5y6.objects.filter(jornada=jornada).values_list('id', 'aciertos_mask')), incremental)
+
+
+# ==================== 5y6 COMBINATIONS ====================
+
+class Combinations5y6Tests(TestCase):
+
+    def bitsets(self, races):
+        return [sum(scoring5y6.horse_bit(horse) for horse in horses) for horses in races]
+
+    def test_hit_counts_match_expansion(self):
+        rng = random.Random(43)
+        for _ in range(20):
+            races = [rng.sample(range(1, 21), rng.randint(1, 4)) for _ in range(6)]
+            winners = [rng.choice([None, rng.randint(1, 20)]) for _ in range(6)]
+            expanded = [0] * 7
+            for ticket in itertools.product(*races):
+                expanded[sum(horse == winner for horse, winner in zip(ticket, winners))] += 1
+            hits = combinations5y6.hit_counts(self.bitsets(races), self.bitsets([[w] if w else [] for w in winners]))
+            self.assertEqual(hits, expanded)
+            self.assertEqual(combinations5y6.ticket_count(self.bitsets(races)), sum(expanded))
+
+    @override_settings(TICKET_PRICE_5Y6='0.10')
+    def test_cost(self):
+        bitsets = self.bitsets([[1, 2, 3], [1, 2], [1], [1], [1, 2, 3, 4], [1]])
+        self.assertEqual(combinations5y6.ticket_count(bitsets), 24)
+        self.assertEqual(combinations5y6.ticket_cost(bitsets), Decimal('2.40'))
+        bitsets[2] = 0  # A race without selection: no tickets
+        self.assertEqual(combinations5y6.ticket_cost(bitsets), Decimal('0.00'))
+
+    def test_evaluate_jornada(self):
+        jornada = Jornada5y6.objects.create(hipodromo='Test', fecha=timezone.localdate())
+        cuadros = []
+        for i, horses in enumerate([[1, 2], [3]]):
+            cuadro = Cuadro5y6.objects.create(jornada=jornada, nombre_cuadro=f'c{i}')
+            Seleccion5y6.objects.bulk_create([
+                Seleccion5y6(cuadro=cuadro, numero_carrera=race, numero_caballo=horse)
+                for race in range(1, 7) for horse in horses
+            ])
+            cuadros.append(cuadro)
+        Ganador5y6.objects.create(jornada=jornada, numero_carrera=1, numero_caballo=2)
+
+        evaluated = combinations5y6.evaluate_jornada_tickets(jornada.id)
+        self.assertEqual(evaluated[cuadros[0].id]['hits'], [32, 32, 0, 0, 0, 0, 0])
+        self.assertEqual(evaluated[cuadros[1].id]['hits'], [1, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(combinations5y6.evaluate_cuadro(cuadros[0]), evaluated[cuadros[0].id])
+
+
+# ==================== 5y6 ENTRY ====================
+
+class Entry5y6Tests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.jornada = Jornada5y6.objects.create(hipodromo='Test', fecha=timezone.localdate())
+        Cuadro5y6.objects.create(jornada=cls.jornada, nombre_cuadro='taken')
+
+    def rows(self, n):
+        return [{'nombre_cuadro': f'c{i}', 'carreras': [[1, 2], [3], [4], [5], [6], [7, 8, '9']]} for i in range(n)]
+
+    def test_validation_lists_bad_rows(self):
+        rows = self.rows(2) + [
+            {'nombre_cuadro': 'taken', 'carreras': [[1]] * 6},
+            {'nombre_cuadro': 'c0', 'carreras': [[1]] * 6},
+            {'nombre_cuadro': 'short', 'carreras': [[1]] * 5},
+            {'nombre_cuadro': 'range', 'carreras': [[1]] * 5 + [[21]]},
+            {'nombre_cuadro': 'empty', 'carreras': [[1]] * 5 + [[]]},
+            {'nombre_cuadro': '', 'carreras': [[1]] * 6},
+        ]
+        with self.assertRaises(ValueError) as raised:
+            entry5y6.validate_cuadros(self.jornada, rows)
+        self.assertEqual([line.split(':')[0] for line in str(raised.exception).splitlines()],
+                         ['row 3', 'row 4', 'row 5', 'row 6', 'row 7', 'row 8'])
+        self.assertEqual(entry5y6.validate_cuadros(self.jornada, self.rows(1)),
+                         [('c0', [[1, 2], [3], [4], [5], [6], [7, 8, 9]])])
+
+    def test_create_in_chunks(self):
+        progress = []
+        cuadros = entry5y6.validate_cuadros(self.jornada, self.rows(5))
+        created = entry5y6.create_cuadros(self.jornada, cuadros, chunk_size=2, progress=lambda *done: progress.append(done))
+        self.assertEqual(created, (5, 45))
+        self.assertEqual(progress, [(2, 18), (4, 36), (5, 45)])
+        cuadro = Cuadro5y6.objects.get(jornada=self.jornada, nombre_cuadro='c4')
+        horses = cuadro.selecciones.filter(numero_carrera=6).values_list('numero_caballo', flat=True)
+        self.assertEqual(sorted(horses), [7, 8, 9])
+
+    def test_create_without_returned_ids_and_rescore(self):
+        Ganador5y6.objects.create(jornada=self.jornada, numero_carrera=1, numero_caballo=2)
+        cuadros = entry5y6.validate_cuadros(self.jornada, self.rows(3))
+        # MySQL path: bulk_create does not return the pks
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            entry5y6.create_cuadros(self.jornada, cuadros)
+        self.assertEqual(Seleccion5y6.objects.count(), 27)
+        imported = Cuadro5y6.objects.filter(jornada=self.jornada).exclude(nombre_cuadro='taken')
+        self.assertEqual(set(imported.values_list('aciertos', flat=True)), {1})
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write('nombre_cuadro,carrera1,carrera2,carrera3,carrera4,carrera5,carrera6\n')
+            f.write('Juan 1,3-7,1,2-5-9,4,11,6 8\n\n')
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('import_5y6', f.name, jornada=self.jornada.id, stdout=out)
+        self.assertIn('Imported 1 cuadros and 10 selecciones', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_5y6', f.name, jornada=self.jornada.id, stdout=out)  # Name taken now
+
+
+# ==================== EXPORTS ====================
+
+@mock.patch.object(exports, 'CHUNK_SIZE', 2)
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create(email=f'user{i}@test.com', alias=f'user{i}') for i in range(3)]
+        last_week = timezone.now() - timedelta(days=7)
+        for i, user in enumerate(cls.users):
+            AccountTransaction.objects.create(user=user, tipo='Premio', qty=10 + i, trx_date=last_week)
+            AccountTransaction.objects.create(user=user, tipo='Premio', qty=-1)
+
+    def test_keyset_chunks_cover_every_row(self):
+        rows = list(exports._chunked(User.objects.all(), 'alias'))
+        self.assertEqual(rows, [(user.id, user.alias) for user in self.users])
+        self.assertEqual(list(exports._chunked(User.objects.none(), 'alias')), [])
+
+    def test_user_rows(self):
+        rows = list(exports.user_rows())
+        self.assertEqual(rows[0][-1], 'balance')
+        self.assertEqual([row[-1] for row in rows[1:]], [Decimal('9.00'), Decimal('10.00'), Decimal('11.00')])
+        self.assertEqual(exports.write_csv(exports.user_rows(), io.StringIO()), 3)
+
+    def test_ledger_export_reads_the_archive(self):
+        before = list(exports.ledger_rows())
+        call_command('compact_ledger', days=1, stdout=io.StringIO())
+        after = list(exports.ledger_rows())
+        self.assertEqual(len(after), 7)
+        self.assertEqual(sorted(after[1:]), sorted(before[1:]))  # No snapshot rows, nothing lost
+
+        since = timezone.now() - timedelta(days=1)
+        archived = list(exports.ledger_rows(date_to=since, user=self.users[1]))
+        self.assertEqual([row[-3] for row in archived[1:]], [Decimal('11.00')])
+        self.assertEqual(len(list(exports.ledger_rows(date_from=since))), 4)
+
+    def test_archived_polla_bets(self):
+        polla = open_polla('EXP1', archived=True)
+        BetPollaArchive.objects.create(
+            id=7, user=self.users[0], polla=polla, picks=packing.pack_picks((1, 2, 3, 4, 5, 6)),
+            credit_cost=2, date_bet=timezone.now(),
+        )
+        rows = list(exports.polla_bet_rows(polla))
+        self.assertEqual(rows[1][:9], [7, self.users[0].id, 'user0', 1, 2, 3, 4, 5, 6])
+
+
+# ==================== ROLLUPS ====================
+
+@override_settings(ROLLUP_LAG_SECONDS=0)
+class RollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(email='user@test.com', alias='user')
+        cls.polla = open_polla('ROL1')
+        last_week = timezone.now() - timedelta(days=7)
+        for qty in (5, 7, -2):
+            AccountTransaction.objects.create(user=user, polla=cls.polla, tipo='Premio', qty=qty, trx_date=last_week)
+        AccountTransaction.objects.create(user=user, tipo='Recarga', qty=20)
+
+    def totals(self):
+        return sorted(DailyRollup.objects.values_list('day', 'tipo', 'racetrack_id', 'entries', 'total_cents'))
+
+    def test_refresh_is_incremental(self):
+        self.assertEqual(rollups.refresh(batch_size=1), LedgerEntry.objects.count())
+        self.assertEqual(rollups.refresh(), 0)
+        self.assertEqual(
+            [row[1:] for row in self.totals()],
+            [('Premio', self.polla.racetrack_id, 3, 1000), ('Recarga', None, 1, 2000)],
+        )
+        self.assertEqual(RollupWatermark.objects.get().last_id, LedgerEntry.objects.order_by('id').last().id)
+
+        AccountTransaction.objects.create(user=User.objects.get(), tipo='Recarga', qty=1)
+        rollups.refresh()
+        self.assertEqual(self.totals()[-1][3:], (2, 2100))
+
+    @override_settings(ROLLUP_LAG_SECONDS=3600)
+    def test_recent_rows_wait_for_the_lag(self):
+        self.assertEqual(rollups.refresh(), 0)
+        first = LedgerEntry.objects.order_by('id').first()
+        LedgerEntry.objects.filter(id=first.id).update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(rollups.refresh(), 1)  # Stops below the first recent row
+        self.assertEqual(RollupWatermark.objects.get().last_id, first.id)
+
+    def test_rebuild_counts_archive_not_snapshots(self):
+        rollups.refresh()
+        incremental = self.totals()
+        call_command('compact_ledger', days=1, stdout=io.StringIO())
+        rollups.rebuild(batch_size=2)
+        self.assertEqual(self.totals(), incremental)
+
+
+# ==================== JACKPOTS ====================
+
+class JackpotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.system = system_user()
+        cls.jackpot = Jackpot.ensure_all()[0]
+
+    def ledger_cents(self):
+        return sum(
+            model.objects.filter(tipo=self.jackpot.tipo).aggregate(total=Sum('qty_cents'))['total'] or 0
+            for model in (LedgerEntry, LedgerArchive)
+        )
+
+    def test_writes_update_the_running_total(self):
+        place_polla_bet(self, funded_user('user'), open_polla('JCK1'), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(self.jackpot.total, Decimal('0.20'))
+
+        trx = AccountTransaction.objects.create(user=self.system, tipo=self.jackpot.tipo, qty=5)
+        trx.qty = 3
+        trx.save()
+        self.assertEqual(self.jackpot.total_cents, 320)
+        trx.tipo = 'Premio'
+        trx.save()
+        self.assertEqual(self.jackpot.total_cents, 20)
+        trx.tipo = self.jackpot.tipo
+        trx.save()
+        trx.delete()
+        self.assertEqual(self.jackpot.total_cents, 20)
+
+        # Compaction moves rows to the archive: same total, deletes still count
+        AccountTransaction.objects.create(
+            user=self.system, tipo=self.jackpot.tipo, qty=1, trx_date=timezone.now() - timedelta(days=7),
+        ).delete()
+        old = AccountTransaction.objects.create(
+            user=self.system, tipo=self.jackpot.tipo, qty=2, trx_date=timezone.now() - timedelta(days=7),
+        )
+        call_command('compact_ledger', days=1, stdout=io.StringIO())
+        self.assertEqual(self.jackpot.total_cents, 220)
+        old.delete()
+        self.assertEqual(self.jackpot.total_cents, self.ledger_cents())
+        self.assertLessEqual(JackpotShard.objects.filter(tipo=self.jackpot.tipo).count(), Jackpot.SHARDS)
+
+    def test_payout(self):
+        from admin_panel.utils import process_jackpot_payment
+        AccountTransaction.objects.create(user=self.system, tipo=self.jackpot.tipo, qty=10)
+        winners = [User.objects.create(email=f'user{i}@test.com', alias=f'user{i}') for i in range(3)]
+
+        for users, amount, reason in [([], None, 'ganadores'), (winners, 0, 'mayor que cero'), (winners, 11, 'supera')]:
+            with self.assertRaisesMessage(ValueError, reason):
+                process_jackpot_payment(self.jackpot, users, amount)
+
+        payout = process_jackpot_payment(self.jackpot, winners, Decimal('4.00'))
+        self.assertEqual((payout.total_cents, payout.winners), (400, 3))
+        self.assertEqual(sorted(user.get_balance() for user in winners), [Decimal('1.33'), Decimal('1.33'), Decimal('1.34')])
+        self.assertEqual(self.jackpot.total_cents, 600)
+
+        process_jackpot_payment(self.jackpot, winners[:1])
+        self.assertEqual(self.jackpot.total_cents, 0)
+        self.assertEqual(self.ledger_cents(), 0)
+        with self.assertRaisesMessage(ValueError, 'cero'):
+            process_jackpot_payment(self.jackpot, winners)
+
+    def test_rebuild(self):
+        for qty in (3, 4, -1):
+            AccountTransaction.objects.create(user=self.system, tipo=self.jackpot.tipo, qty=qty)
+        JackpotShard.objects.update(total_cents=0)
+        call_command('rebuild_event_counters', stdout=io.StringIO())
+        self.assertEqual(Jackpot.totals_cents()[self.jackpot.tipo], 600)
+        cache.clear()
+        self.assertIn((self.jackpot.name, Decimal('6.00')), Jackpot.current())
+
+
+# ==================== USER STATS ====================
+
+class UserStatsTests(TestCase):
+
+    def test_annotations(self):
+        from admin_panel.utils import with_user_stats
+        now = timezone.now()
+        active, idle, archived_only = [
+            User.objects.create(email=f'{alias}@test.com', alias=alias) for alias in ('active', 'idle', 'archived')
+        ]
+        polla = open_polla('USR1')
+        old_polla = open_polla('USR2', archived=True)
+        league = League.objects.create(name='Test')
+        evento = Evento.objects.create(code4='USR1', league=league, name='Test', date=now)
+
+        AccountTransaction.objects.create(user=active, tipo='Premio', qty=5)
+        AccountTransaction.objects.create(user=active, tipo='Premio', qty=7, conciliado=True)
+        BetPolla.objects.create(user=active, polla=polla, c1=1, c2=1, c3=1, c4=1, c5=1, c6=1, credit_cost=2)
+        BetPollaArchive.objects.create(
+            id=99, user=active, polla=old_polla, picks=packing.pack_picks((1, 1, 1, 1, 1, 1)),
+            credit_cost=2, date_bet=now - timedelta(days=300),
+        )
+        evento_bet = BetEvento.objects.create(user=active, evento=evento, credit_cost=2)
+        BetEvento.objects.filter(id=evento_bet.id).update(date_bet=now + timedelta(hours=1))
+        BetEventoArchive.objects.create(
+            id=99, user=archived_only, evento=evento, predictions=packing.compress(b''),
+            credit_cost=2, date_bet=now - timedelta(days=200),
+        )
+
+        stats = with_user_stats(User.objects.all()).in_bulk()
+        self.assertEqual(
+            (stats[active.id].balance_cents, stats[active.id].num_polla_bets, stats[active.id].num_evento_bets),
+            (500, 2, 1),
+        )
+        self.assertEqual(stats[active.id].last_bet, now + timedelta(hours=1))
+        self.assertEqual(
+            (stats[idle.id].balance_cents, stats[idle.id].num_polla_bets, stats[idle.id].last_bet), (0, 0, None),
+        )
+        self.assertEqual(stats[archived_only.id].num_evento_bets, 1)
+        self.assertEqual(stats[archived_only.id].last_bet, now - timedelta(days=200))
+
+
+# ==================== EVENT LISTINGS ====================
+
+class EventListingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email='admin@test.com', alias='admin', is_admin=True)
+        cls.league = League.objects.create(name='Test')
+        cls.team = Team.objects.create(nombre='Team', league=cls.league)
+
+    def add_evento(self, n, scored):
+        evento = Evento.objects.create(code4=f'LST{n}', league=self.league, name=f'Test {n}', date=timezone.now())
+        for i in range(2):
+            Match.objects.create(
+                evento=evento, team1=self.team, team2=self.team, date=evento.date, orden_pa=i,
+                score_team1=1 if scored else None, score_team2=0 if scored else None,
+            )
+        return evento
+
+    def listing(self, url, key):
+        """(rendered rows with their results status and __str__, number of queries)"""
+        client = Client()
+        client.force_login(self.admin)
+        with mock.patch('admin_panel.views.render', return_value=HttpResponse()) as render, \
+                CaptureQueriesContext(connection) as queries:
+            client.get(url)
+            rows = [(str(event), event.has_results()) for event in render.call_args.args[2][key]]
+        return rows, len(queries)
+
+    def test_eventos_page_queries_do_not_grow(self):
+        self.add_evento(0, scored=True)
+        rows, queries = self.listing('/adm/eventos/', 'eventos')
+        self.assertEqual([has_results for _, has_results in rows], [True])
+
+        Evento.objects.create(code4='LST9', league=self.league, name='Empty', date=timezone.now())
+        for n in range(1, 5):
+            self.add_evento(n, scored=n % 2)
+        rows, more_queries = self.listing('/adm/eventos/', 'eventos')
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(sorted(has_results for _, has_results in rows), [False] * 3 + [True] * 3)
+        self.assertEqual(more_queries, queries)
+
+    def test_pollas_page_queries_do_not_grow(self):
+        open_polla('LST0')
+        _, queries = self.listing('/adm/pollas/', 'pollas')
+        for n in range(1, 5):
+            open_polla(f'LST{n}', f1=1, f2=1, f3=1, f4=1, f5=1, f6=1)
+        rows, more_queries = self.listing('/adm/pollas/', 'pollas')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(more_queries, queries)
+
+
+# ==================== EVENTO RESCORING ====================
+
+class EventoRescoringTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(50)
+        league = League.objects.create(name='Test')
+        team = Team.objects.create(nombre='Team', league=league)
+        cls.evento = Evento.objects.create(
+            code4='T1', league=league, name='Test', date=timezone.now() - timedelta(days=1), status='Close',
+        )
+        cls.matches = [
+            Match.objects.create(evento=cls.evento, team1=team, team2=team, date=cls.evento.date, orden_pa=i)
+            for i in range(8)
+        ]
+        for i in range(20):
+            user = User.objects.create(email=f'user{i}@test.com', alias=f'user{i}')
+            bet = BetEvento.objects.create(user=user, evento=cls.evento, credit_cost=2)
+            predictions = [(match.id, rng.randint(0, 3), rng.randint(0, 3)) for match in cls.matches]
+            if i % 2:
+                records = [(match_id, pred1, pred2, 0) for match_id, pred1, pred2 in predictions]
+                if i % 4 == 3:
+                    records.reverse()  # Not in match order (e.g. packed by pack_predictions)
+                bet.set_predictions(records)
+                bet.save()
+            else:
+                # Legacy storage: one core_betmatch row per prediction
+                BetMatch.objects.bulk_create([
+                    BetMatch(bet_evento=bet, match_id=match_id, score_team1=pred1, score_team2=pred2)
+                    for match_id, pred1, pred2 in predictions
+                ])
+
+    def snapshot(self):
+        return (
+            sorted(BetEvento.objects.values_list('id', 'puntos')),
+            sorted(BetMatch.objects.values_list('id', 'puntos')),
+            sorted((bet.id, bytes(bet.predictions)) for bet in BetEvento.objects.exclude(predictions=None)),
+        )
+
+    def test_incremental_matches_full_recompute(self):
+        from admin_panel.utils import calculate_evento_points, rescore_evento_matches
+        rng = random.Random(5)
+        # Enter results one match at a time, then correct and clear one
+        steps = [[match] for match in self.matches] + [[self.matches[0]], [self.matches[3], self.matches[4]]]
+        for n, step in enumerate(steps):
+            for match in step:
+                if n == len(steps) - 1 and match is self.matches[4]:
+                    match.score_team1 = match.score_team2 = None
+                else:
+                    match.score_team1, match.score_team2 = rng.randint(0, 3), rng.randint(0, 3)
+                match.save(update_fields=['score_team1', 'score_team2'])
+            rescore_evento_matches(self.evento, [match.id for match in step])
+
+            incremental = self.snapshot()
+            calculate_evento_points(self.evento)
+            self.assertEqual(incremental, self.snapshot(), f'step {n}')
+
+    def test_unchanged_points_read_only_the_changed_records(self):
+        from admin_panel.utils import rescore_evento_matches
+        match = self.matches[0]
+        match.score_team1, match.score_team2 = 9, 9
+        match.save(update_fields=['score_team1', 'score_team2'])
+        rescore_evento_matches(self.evento, [match.id])
+
+        # Same result again: only the misplaced cards are decoded whole, nothing is written
+        with CaptureQueriesContext(connection) as queries:
+            rescore_evento_matches(self.evento, [match.id])
+        scan, *loads = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'core_betevento' in q['sql']]
+        self.assertIn('SUBSTR', scan.upper())
+        self.assertEqual(len(loads), 1)
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "core_betevento"') and 'predictions' in q['sql']])
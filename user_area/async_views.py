@@ -0,0 +1,151 @@
+"""
+User Area Async Views - Read-heavy pages for the ASGI deployment
+
+Async versions of dashboard, account_detail, my_bets and view_results.
+The independent queries of each page are started together with
+asyncio.gather, and the worker is free to serve other requests while they run.
+
+Used instead of user_area.views when running under bets_project/asgi.py
+(see user_area/urls.py).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404
+from django.shortcuts import render, redirect
+from django.utils import timezone
+from core.archive import user_polla_bets, user_evento_bets
+from core.db_routers import use_replica
+from core.models import Polla, Evento, LedgerEntry, Jackpot
+from user_area import results
+from user_area.decorators import async_login_required
+
+# Template rendering and context processors are sync (and may query the DB)
+arender = sync_to_async(render)
+
+
+async def as_list(queryset):
+    """Evaluate a queryset with the async ORM"""
+    return [obj async for obj in queryset]
+
+
+@async_login_required
+async def dashboard(request):
+    """User dashboard - shows active and past events"""
+    now = timezone.now()
+
+    active_pollas, active_eventos, past_pollas, past_eventos, balance, jackpots = await asyncio.gather(
+        # Active events
+        as_list(Polla.objects.filter(status='Running', date_race__gt=now).select_related('racetrack')),
+        as_list(Evento.objects.filter(status='Running').exclude(locks_at__lte=now).select_related('league')),
+        # Past events
+        as_list(Polla.objects.filter(status__in=['Close', 'Paid']).select_related('racetrack').order_by('-date_race')[:5]),
+        as_list(Evento.objects.filter(status__in=['Close', 'Paid']).select_related('league').order_by('-date')[:5]),
+        # User's balance
+        request.user.aget_balance(),
+        # Running jackpots (cached)
+        sync_to_async(Jackpot.current)(),
+    )
+
+    context = {
+        'title': 'Dashboard',
+        'active_pollas': active_pollas,
+        'active_eventos': active_eventos,
+        'past_pollas': past_pollas,
+        'past_eventos': past_eventos,
+        'balance': balance,
+        'jackpots': jackpots,
+    }
+
+    return await arender(request, 'user_area/dashboard.html', context)
+
+
+@async_login_required
+@use_replica
+async def account_detail(request):
+    """Show user's transaction history"""
+    transactions, balance = await asyncio.gather(
+        as_list(
+            LedgerEntry.objects.filter(user=request.user)
+            .select_related('polla', 'evento').order_by('-trx_date', '-id')
+        ),
+        request.user.aget_balance(),
+    )
+
+    context = {
+        'title': 'Detalle de Cuenta',
+        'transactions': transactions,
+        'balance': balance
+    }
+
+    return await arender(request, 'user_area/account_detail.html', context)
+
+
+@async_login_required
+@use_replica
+async def my_bets(request):
+    """Show user's betting history"""
+    # Live and archived bets (see core.archive)
+    polla_bets, evento_bets = await asyncio.gather(
+        sync_to_async(user_polla_bets)(request.user),
+        sync_to_async(user_evento_bets)(request.user),
+    )
+
+    context = {
+        'title': 'Mis Apuestas',
+        'polla_bets': polla_bets,
+        'evento_bets': evento_bets,
+    }
+
+    return await arender(request, 'user_area/my_bets.html', context)
+
+
+@async_login_required
+@use_replica
+async def view_results(request, polla_id=None, evento_id=None):
+    """View results for a completed event"""
+    if polla_id:
+        try:
+            event = await Polla.objects.select_related('racetrack').aget(id=polla_id)
+        except Polla.DoesNotExist:
+            raise Http404('No Polla matches the given query.')
+
+        if event.status == 'Running':
+            messages.warning(request, 'Esta polla aún no ha cerrado')
+            return redirect('user_area:dashboard')
+    elif evento_id:
+        try:
+            event = await Evento.objects.select_related('league').aget(id=evento_id)
+        except Evento.DoesNotExist:
+            raise Http404('No Evento matches the given query.')
+
+        if event.status == 'Running':
+            messages.warning(request, 'Este evento aún no ha cerrado')
+            return redirect('user_area:dashboard')
+    else:
+        return redirect('user_area:dashboard')
+
+    # Closed by run_scheduler at post time does not mean results were entered
+    if not await sync_to_async(event.has_results)():
+        messages.info(request, 'Resultados pendientes')
+        return redirect('user_area:dashboard')
+
+    # Unchanged since the client's copy: 304 without computing anything
+    response = results.not_modified(request, event)
+
+    if response is None:
+        block = await sync_to_async(results.read_snapshot)(event)
+        if block is None:
+            # Get winners (computed once for concurrent requests)
+            from admin_panel.utils import cached_polla_winners, cached_evento_winners
+            if polla_id:
+                winners = await sync_to_async(cached_polla_winners)(event)
+            else:
+                winners = await sync_to_async(cached_evento_winners)(event)
+            block = await sync_to_async(results.render_block)(event, winners)
+
+        template, context = results.results_page(event, block)
+        response = await arender(request, template, context)
+
+    return results.add_cache_headers(response, event)
@@ -0,0 +1,30 @@
+"""
+Decorators for the async user views
+
+Django 4.2's @login_required only wraps sync views, and request.user is loaded
+lazily with a sync DB query, so async views need their own version.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+
+
+def async_login_required(view_func):
+    """
+    Async equivalent of @login_required
+
+    Usage:
+        @async_login_required
+        async def dashboard(request):
+            ...
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # Resolves the lazy request.user in a thread; afterwards it is cached
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
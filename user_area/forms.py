@@ -2,6 +2,7 @@
 User Area Forms - Betting forms
 """
 from django import forms
+from django.conf import settings
 from core.models import BetPolla, BetEvento, BetMatch
 
 
@@ -67,16 +68,19 @@ class BetEventoForm(forms.ModelForm):
                 self.fields[f'match_{match.id}_score1'] = forms.IntegerField(
                     label=match.team1.nombre,
                     min_value=0,
+                    max_value=999,  # packed as int16 (core/packing.py)
                     widget=forms.NumberInput(attrs={'class': 'form-control', 'style': 'width: 80px; display: inline-block;'})
                 )
                 self.fields[f'match_{match.id}_score2'] = forms.IntegerField(
                     label=match.team2.nombre,
                     min_value=0,
+                    max_value=999,
                     widget=forms.NumberInput(attrs={'class': 'form-control', 'style': 'width: 80px; display: inline-block;'})
                 )
 
     def save_match_predictions(self, bet):
         """Save match predictions after bet is created"""
+        predictions = []
         for match in self.matches:
             if self.evento.tipo_juego == 3:
                 # NFL - Convert winner selection to scores
@@ -99,9 +103,14 @@ class BetEventoForm(forms.ModelForm):
                 score1 = self.cleaned_data.get(f'match_{match.id}_score1')
                 score2 = self.cleaned_data.get(f'match_{match.id}_score2')
 
-            BetMatch.objects.create(
-                bet_evento=bet,
-                match=match,
-                score_team1=score1,
-                score_team2=score2
-            )
+            predictions.append((match, score1, score2))
+
+        if settings.PACKED_PREDICTIONS:
+            # One packed column on the bet instead of a row per match
+            bet.set_predictions([(match.id, score1, score2, 0) for match, score1, score2 in predictions])
+            bet.save(update_fields=['predictions'])
+        else:
+            BetMatch.objects.bulk_create([
+                BetMatch(bet_evento=bet, match=match, score_team1=score1, score_team2=score2)
+                for match, score1, score2 in predictions
+            ])
@@ -0,0 +1,105 @@
+"""
+Live Updates - Server-sent events with pot size and entry counts
+
+Instead of users reloading the dashboard (a full page render with its
+aggregates per reload), the page subscribes to an event stream
+(templates/user_area/dashboard.html):
+
+    const source = new EventSource("{{ live_pots_url }}");
+    source.onmessage = (e) => updatePots(JSON.parse(e.data));
+
+The dashboard only subscribes when the URL exists; otherwise it shows the
+totals it was rendered with.
+
+All open streams share ONE PotAggregator per worker, which recomputes the
+totals at most once per LIVE_UPDATES_INTERVAL seconds (and shares them with
+the other workers through the cache), no matter how many clients listen.
+
+ASGI only (see user_area/urls.py): under WSGI each stream would hold a worker.
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from core.models import Polla, Evento
+from user_area.decorators import async_login_required
+
+CACHE_KEY = 'live:pots'
+
+
+def compute_pots():
+    """Pot and entries of every open polla and evento (from their counters)"""
+    now = timezone.now()
+    pollas = Polla.objects.filter(
+        status='Running', date_race__gt=now
+    ).values('id', 'code4', 'pot_total', 'entries')
+
+    eventos = Evento.objects.filter(
+        status='Running'
+    ).exclude(locks_at__lte=now).values('id', 'code4', 'pot_total', 'entries')
+
+    return {
+        'pollas': [{**row, 'pot_total': str(row['pot_total'])} for row in pollas],
+        'eventos': [{**row, 'pot_total': str(row['pot_total'])} for row in eventos],
+        'updated_at': timezone.now().isoformat(),
+    }
+
+
+class PotAggregator:
+    """Shared, interval-based computation of the live pot data"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._data = None
+        self._computed_at = 0.0
+
+    def _is_fresh(self):
+        return self._data is not None and time.monotonic() - self._computed_at < self.interval
+
+    async def snapshot(self):
+        if self._is_fresh():
+            return self._data
+
+        async with self._lock:
+            # Another stream may have refreshed it while we waited
+            if not self._is_fresh():
+                data = await cache.aget(CACHE_KEY)
+                if data is None:
+                    data = await sync_to_async(compute_pots)()
+                    await cache.aset(CACHE_KEY, data, self.interval)
+                self._data = data
+                self._computed_at = time.monotonic()
+
+        return self._data
+
+
+aggregator = PotAggregator(settings.LIVE_UPDATES_INTERVAL)
+
+
+@async_login_required
+async def live_pots(request):
+    """Event stream with the pot and entries of every open polla/evento"""
+    interval = aggregator.interval
+
+    async def stream():
+        # Ask the browser to reconnect after the stream ends
+        yield f'retry: {int(interval * 1000)}\n\n'
+
+        # Streams are closed after a while: a fresh connection is cheap and
+        # guarantees no stream outlives a client that went away silently
+        deadline = time.monotonic() + settings.LIVE_UPDATES_MAX_SECONDS
+        while time.monotonic() < deadline:
+            data = await aggregator.snapshot()
+            yield f'data: {json.dumps(data)}\n\n'
+            await asyncio.sleep(interval)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
@@ -0,0 +1,116 @@
+"""
+Results Page Caching - Conditional GET and pre-rendered snapshots
+
+- Every results page carries an ETag (event, status and results_version)
+  and a Last-Modified (results_updated_at). A browser or proxy revalidating an
+  unchanged page gets a 304 before any winners are computed or rendered.
+- Paid events never change again: their page is sent with a long max-age,
+  and their results block (winners table, favourites) is rendered ONCE at
+  payout time to a static HTML snapshot (RESULTS_SNAPSHOT_ROOT, outside
+  MEDIA_ROOT so the web server never serves it directly). view_results
+  embeds it in the normal page, rendered with the request as usual.
+"""
+import os
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+from core.models import Polla, PollaPickCounts
+
+
+def results_block(event, winners):
+    """(template, context) of the results block (no per-user content) of a polla or evento"""
+    if isinstance(event, Polla):
+        return 'user_area/results_polla_block.html', {
+            'polla': event,
+            'winners': winners,
+            'favourites': PollaPickCounts.favourites(event.id),
+        }
+    return 'user_area/results_evento_block.html', {
+        'evento': event,
+        'winners': winners,
+    }
+
+
+def render_block(event, winners):
+    template, context = results_block(event, winners)
+    return render_to_string(template, context)
+
+
+def results_page(event, block_html):
+    """(template, context) of the full results page around a rendered results block"""
+    if isinstance(event, Polla):
+        return 'user_area/view_results_polla.html', {
+            'title': f'Resultados - {event.code4}',
+            'polla': event,
+            'results_html': mark_safe(block_html),
+        }
+    return 'user_area/view_results_evento.html', {
+        'title': f'Resultados - {event.name}',
+        'evento': event,
+        'results_html': mark_safe(block_html),
+    }
+
+
+def _kind(event):
+    return 'polla' if isinstance(event, Polla) else 'evento'
+
+
+def results_etag(event):
+    return f'"{_kind(event)}-{event.id}-{event.status}-v{event.results_version}"'
+
+
+def _last_modified(event):
+    if event.results_updated_at is None:
+        return None
+    return int(event.results_updated_at.timestamp())
+
+
+def not_modified(request, event):
+    """304 response if the client's copy of the page is current, else None"""
+    return get_conditional_response(request, etag=results_etag(event), last_modified=_last_modified(event))
+
+
+def add_cache_headers(response, event):
+    """Validators on every results page; long-lived caching once the event is Paid"""
+    response['ETag'] = results_etag(event)
+    if event.results_updated_at is not None:
+        response['Last-Modified'] = http_date(_last_modified(event))
+
+    if event.status == 'Paid':
+        patch_cache_control(response, private=True, max_age=settings.RESULTS_PAID_MAX_AGE)
+    else:
+        # Results may still be corrected: always revalidate (cheap with the ETag)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ==================== SNAPSHOTS ====================
+
+def snapshot_path(event):
+    return os.path.join(settings.RESULTS_SNAPSHOT_ROOT, f'{_kind(event)}-{event.id}.html')
+
+
+def write_snapshot(event, winners):
+    """Render the results block of a Paid event to its static snapshot"""
+    html = render_block(event, winners)
+
+    path = snapshot_path(event)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(tmp_path, path)  # atomic: readers never see a partial file
+
+
+def read_snapshot(event):
+    """The pre-rendered results block of a Paid event, or None if there is none"""
+    if event.status != 'Paid':
+        return None
+    try:
+        with open(snapshot_path(event), encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
@@ -3,24 +3,35 @@ User Area URLs - Authenticated user interface
 
 Matches PHP's /inside/ directory
 """
+from django.conf import settings
 from django.urls import path
-from user_area import views
+from user_area import views, async_views, live
 
 app_name = 'user_area'
 
+# Under ASGI the read-heavy pages are served by their async versions
+read_views = async_views if settings.ASGI_DEPLOYMENT else views
+
 urlpatterns = [
     # Dashboard
-    path('', views.dashboard, name='dashboard'),
+    path('', read_views.dashboard, name='dashboard'),
 
     # Betting
     path('polla/<int:polla_id>/bet/', views.place_bet_polla, name='place_bet_polla'),
     path('evento/<int:evento_id>/bet/', views.place_bet_evento, name='place_bet_evento'),
+    path('polla/<int:polla_id>/whatif/', views.polla_whatif, name='polla_whatif'),
 
     # Account
-    path('account/', views.account_detail, name='account_detail'),
-    path('my-bets/', views.my_bets, name='my_bets'),
+    path('account/', read_views.account_detail, name='account_detail'),
+    path('my-bets/', read_views.my_bets, name='my_bets'),
 
     # Results
-    path('results/polla/<int:polla_id>/', views.view_results, name='view_results_polla'),
-    path('results/evento/<int:evento_id>/', views.view_results, name='view_results_evento'),
+    path('results/polla/<int:polla_id>/', read_views.view_results, name='view_results_polla'),
+    path('results/evento/<int:evento_id>/', read_views.view_results, name='view_results_evento'),
 ]
+
+if settings.ASGI_DEPLOYMENT:
+    urlpatterns += [
+        # Live pot / entries stream (server-sent events)
+        path('live/pots/', live.live_pots, name='live_pots'),
+    ]
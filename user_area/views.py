@@ -6,8 +6,16 @@ Matches PHP's /inside/ directory
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
-from core.models import Polla, Evento, BetPolla, BetEvento, AccountTransaction, EventTransaction
+from core import money
+from core.archive import user_polla_bets, user_evento_bets
+from core.db_routers import use_replica
+from core.models import (
+    Polla, Evento, BetPolla, BetEvento, AccountTransaction, EventTransaction, LedgerEntry, PollaPickCounts, Jackpot
+)
+from user_area import results
 from user_area.forms import BetPollaForm, BetEventoForm
 
 
@@ -15,12 +23,12 @@ from user_area.forms import BetPollaForm, BetEventoForm
 def dashboard(request):
     """User dashboard - shows active and past events"""
     # Get active events
-    active_pollas = Polla.objects.filter(status='Running', date_race__gt=timezone.now())
-    active_eventos = Evento.objects.filter(status='Running')
+    active_pollas = Polla.objects.filter(status='Running', date_race__gt=timezone.now()).select_related('racetrack')
+    active_eventos = Evento.objects.filter(status='Running').exclude(locks_at__lte=timezone.now()).select_related('league')
 
     # Get past events
-    past_pollas = Polla.objects.filter(status__in=['Close', 'Paid']).order_by('-date_race')[:5]
-    past_eventos = Evento.objects.filter(status__in=['Close', 'Paid']).order_by('-date')[:5]
+    past_pollas = Polla.objects.filter(status__in=['Close', 'Paid']).select_related('racetrack').order_by('-date_race')[:5]
+    past_eventos = Evento.objects.filter(status__in=['Close', 'Paid']).select_related('league').order_by('-date')[:5]
 
     # Get user's balance
     balance = request.user.get_balance()
@@ -32,6 +40,7 @@ def dashboard(request):
         'past_pollas': past_pollas,
         'past_eventos': past_eventos,
         'balance': balance,
+        'jackpots': Jackpot.current(),
     }
 
     return render(request, 'user_area/dashboard.html', context)
@@ -61,61 +70,72 @@ def place_bet_polla(request, polla_id):
     if request.method == 'POST':
         form = BetPollaForm(request.POST)
         if form.is_valid():
-            bet = form.save(commit=False)
-            bet.user = request.user
-            bet.polla = polla
-            bet.credit_cost = -polla.price_entry
-            bet.save()
-
-            # Create account transactions
-            now = timezone.now()
-
-            # Debit user's account
-            AccountTransaction.objects.create(
-                user=request.user,
-                polla=polla,
-                bet=bet,
-                tipo='Apuesta',
-                comment=f'Apuesta: {polla.code4}',
-                qty=-polla.price_entry,
-                trx_date=now
-            )
-
-            # Calculate commission and pot
-            commission = polla.price_entry * 0.10
-            acumulado = polla.price_entry * 0.10
-            pot = polla.price_entry - commission - acumulado
-
-            # System transactions
-            AccountTransaction.objects.create(
-                user_id=1,  # System user
-                polla=polla,
-                bet=bet,
-                tipo='Comision',
-                comment=f'Comisión sistema - {polla.code4}',
-                qty=commission,
-                trx_date=now
-            )
-
-            AccountTransaction.objects.create(
-                user_id=1,
-                polla=polla,
-                bet=bet,
-                tipo='Pote',
-                comment=f'Pote a repartir - {polla.code4}',
-                qty=pot,
-                trx_date=now
-            )
-
-            AccountTransaction.objects.create(
-                user_id=1,
-                polla=polla,
-                bet=bet,
-                tipo='Acumulado2305',
-                comment=f'Acumulado - {polla.code4}',
-                qty=acumulado,
-                trx_date=now
-            )
+            with transaction.atomic():
+                bet = form.save(commit=False)
+                bet.user = request.user
+                bet.polla = polla
+                bet.credit_cost = -polla.price_entry
+                bet.save()
+
+                # Horse popularity matrix of the polla
+                PollaPickCounts.add_bet(bet)
+
+                # Create account transactions
+                now = timezone.now()
+
+                # Debit user's account
+                AccountTransaction.objects.create(
+                    user=request.user,
+                    polla=polla,
+                    bet=bet,
+                    tipo='Apuesta',
+                    comment=f'Apuesta: {polla.code4}',
+                    qty=-polla.price_entry,
+                    trx_date=now
+                )
+
+                # Calculate commission and pot (exact split in cents)
+                commission, acumulado, pot = money.split_entry(
+                    polla.price_entry, money.POLLA_COMMISSION_RATE, money.POLLA_ACUMULADO_RATE
+                )
+
+                # System transactions
+                AccountTransaction.objects.create(
+                    user_id=1,  # System user
+                    polla=polla,
+                    bet=bet,
+                    tipo='Comision',
+                    comment=f'Comisión sistema - {polla.code4}',
+                    qty=commission,
+                    trx_date=now
+                )
+
+                AccountTransaction.objects.create(
+                    user_id=1,
+                    polla=polla,
+                    bet=bet,
+                    tipo='Pote',
+                    comment=f'Pote a repartir - {polla.code4}',
+                    qty=pot,
+                    trx_date=now
+                )
+
+                AccountTransaction.objects.create(
+                    user_id=1,
+                    polla=polla,
+                    bet=bet,
+                    tipo='Acumulado2305',
+                    comment=f'Acumulado - {polla.code4}',
+                    qty=acumulado,
+                    trx_date=now
+                )
+
+                # Keep the polla's counters in sync with the ledger
+                Polla.objects.filter(pk=polla.pk).update(
+                    entries=F('entries') + 1,
+                    pot_total=F('pot_total') + pot,
+                    commission_total=F('commission_total') + commission,
+                )
 
             messages.success(request, f'Apuesta registrada exitosamente. Se debitó ${polla.price_entry} de tu cuenta.')
             return redirect('user_area:dashboard')
@@ -126,12 +146,39 @@ def place_bet_polla(request, polla_id):
         'title': f'Apostar - {polla.code4}',
         'polla': polla,
         'form': form,
+        'favourites': PollaPickCounts.favourites(polla.id),
         'balance': request.user.get_balance()
     }
 
     return render(request, 'user_area/place_bet_polla.html', context)
 
 
+@login_required
+def polla_whatif(request, polla_id):
+    """Max points, best-case rank and prize chances of the user's bet while a polla is in progress"""
+    polla = get_object_or_404(Polla, id=polla_id)
+    if polla.status == 'Paid':
+        return redirect('user_area:view_results_polla', polla_id=polla.id)
+
+    bet = BetPolla.objects.filter(user=request.user, polla=polla).first()
+    if bet is None:
+        messages.warning(request, 'No tienes apuesta en esta polla')
+        return redirect('user_area:dashboard')
+
+    # Whole field in one batch, cached per result state
+    from core.simulator import simulate_polla
+    outlook = simulate_polla(polla)
+
+    context = {
+        'title': f'Proyección - {polla.code4}',
+        'polla': polla,
+        'bet': bet,
+        'outlook': outlook,
+        'my_outlook': outlook['bets'].get(bet.id),
+    }
+    return render(request, 'user_area/polla_whatif.html', context)
+
+
 @login_required
 def place_bet_evento(request, evento_id):
     """Place a bet on an evento"""
@@ -158,53 +205,60 @@ def place_bet_evento(request, evento_id):
     if request.method == 'POST':
         form = BetEventoForm(request.POST, evento=evento, matches=matches)
         if form.is_valid():
-            bet = form.save(commit=False)
-            bet.user = request.user
-            bet.evento = evento
-            bet.credit_cost = -evento.price_entry
-            bet.save()
-
-            # Save match predictions
-            form.save_match_predictions(bet)
-
-            # Create account transactions
-            now = timezone.now()
-
-            # Debit user's account
-            EventTransaction.objects.create(
-                user=request.user,
-                evento=evento,
-                bet=bet,
-                tipo='Apuesta',
-                comment=f'Apuesta: {evento.name}',
-                qty=-evento.price_entry,
-                trx_date=now
-            )
-
-            # Calculate commission and pot
-            commission = evento.price_entry * 0.15
-            pot = evento.price_entry - commission
-
-            # System transactions
-            EventTransaction.objects.create(
-                user_id=1,  # System user
-                evento=evento,
-                bet=bet,
-                tipo='Comision',
-                comment=f'Comisión sistema - {evento.name}',
-                qty=commission,
-                trx_date=now
-            )
-
-            EventTransaction.objects.create(
-                user_id=1,
-                evento=evento,
-                bet=bet,
-                tipo='Pote',
-                comment=f'Pote a repartir - {evento.name}',
-                qty=pot,
-                trx_date=now
-            )
+            with transaction.atomic():
+                bet = form.save(commit=False)
+                bet.user = request.user
+                bet.evento = evento
+                bet.credit_cost = -evento.price_entry
+                bet.save()
+
+                # Save match predictions
+                form.save_match_predictions(bet)
+
+                # Create account transactions
+                now = timezone.now()
+
+                # Debit user's account
+                EventTransaction.objects.create(
+                    user=request.user,
+                    evento=evento,
+                    bet=bet,
+                    tipo='Apuesta',
+                    comment=f'Apuesta: {evento.name}',
+                    qty=-evento.price_entry,
+                    trx_date=now
+                )
+
+                # Calculate commission and pot (exact split in cents)
+                commission, pot = money.split_entry(evento.price_entry, money.EVENTO_COMMISSION_RATE)
+
+                # System transactions
+                EventTransaction.objects.create(
+                    user_id=1,  # System user
+                    evento=evento,
+                    bet=bet,
+                    tipo='Comision',
+                    comment=f'Comisión sistema - {evento.name}',
+                    qty=commission,
+                    trx_date=now
+                )
+
+                EventTransaction.objects.create(
+                    user_id=1,
+                    evento=evento,
+                    bet=bet,
+                    tipo='Pote',
+                    comment=f'Pote a repartir - {evento.name}',
+                    qty=pot,
+                    trx_date=now
+                )
+
+                # Keep the evento's counters in sync with the ledger
+                Evento.objects.filter(pk=evento.pk).update(
+                    entries=F('entries') + 1,
+                    pot_total=F('pot_total') + pot,
+                    commission_total=F('commission_total') + commission,
+                )
 
             messages.success(request, f'Apuesta registrada exitosamente. Se debitó ${evento.price_entry} de tu cuenta.')
             return redirect('user_area:dashboard')
@@ -223,23 +277,17 @@ def place_bet_evento(request, evento_id):
 
 
 @login_required
+@use_replica
 def account_detail(request):
     """Show user's transaction history"""
-    account_transactions = AccountTransaction.objects.filter(
-        user=request.user
-    ).order_by('-trx_date')
-
-    event_transactions = EventTransaction.objects.filter(
+    # Both transaction tables, already merged and sorted by the ledger index
+    transactions = LedgerEntry.objects.filter(
         user=request.user
-    ).order_by('-trx_date')
-
-    # Merge and sort all transactions
-    all_transactions = list(account_transactions) + list(event_transactions)
-    all_transactions.sort(key=lambda x: x.trx_date, reverse=True)
+    ).select_related('polla', 'evento').order_by('-trx_date', '-id')
 
     context = {
         'title': 'Detalle de Cuenta',
-        'transactions': all_transactions,
+        'transactions': transactions,
         'balance': request.user.get_balance()
     }
 
@@ -247,10 +295,12 @@ def account_detail(request):
 
 
 @login_required
+@use_replica
 def my_bets(request):
     """Show user's betting history"""
-    polla_bets = BetPolla.objects.filter(user=request.user).order_by('-date_bet')
-    evento_bets = BetEvento.objects.filter(user=request.user).order_by('-date_bet')
+    # Live and archived bets (see core.archive)
+    polla_bets = user_polla_bets(request.user)
+    evento_bets = user_evento_bets(request.user)
 
     context = {
         'title': 'Mis Apuestas',
@@ -262,41 +312,42 @@ def my_bets(request):
 
 
 @login_required
+@use_replica
 def view_results(request, polla_id=None, evento_id=None):
     """View results for a completed event"""
     if polla_id:
-        polla = get_object_or_404(Polla, id=polla_id)
-        if polla.status == 'Running':
+        event = get_object_or_404(Polla, id=polla_id)
+        if event.status == 'Running':
             messages.warning(request, 'Esta polla aún no ha cerrado')
             return redirect('user_area:dashboard')
-
-        # Get winners
-        from admin_panel.utils import get_polla_winners
-        winners = get_polla_winners(polla)
-
-        context = {
-            'title': f'Resultados - {polla.code4}',
-            'polla': polla,
-            'winners': winners
-        }
-        return render(request, 'user_area/view_results_polla.html', context)
-
     elif evento_id:
-        evento = get_object_or_404(Evento, id=evento_id)
-        if evento.status == 'Running':
+        event = get_object_or_404(Evento, id=evento_id)
+        if event.status == 'Running':
             messages.warning(request, 'Este evento aún no ha cerrado')
             return redirect('user_area:dashboard')
+    else:
+        return redirect('user_area:dashboard')
 
-        # Get winners
-        from admin_panel.utils import get_evento_winners
-        winners = get_evento_winners(evento)
+    # Closed by run_scheduler at post time does not mean results were entered
+    if not event.has_results():
+        messages.info(request, 'Resultados pendientes')
+        return redirect('user_area:dashboard')
 
-        context = {
-            'title': f'Resultados - {evento.name}',
-            'evento': evento,
-            'winners': winners
-        }
-        return render(request, 'user_area/view_results_evento.html', context)
+    # Unchanged since the client's copy: 304 without computing anything
+    response = results.not_modified(request, event)
 
-    else:
-        return redirect('user_area:dashboard')
+    if response is None:
+        block = results.read_snapshot(event)
+        if block is None:
+            # Get winners (computed once for concurrent requests)
+            from admin_panel.utils import cached_polla_winners, cached_evento_winners
+            if polla_id:
+                winners = cached_polla_winners(event)
+            else:
+                winners = cached_evento_winners(event)
+            block = results.render_block(event, winners)
+
+        template, context = results.results_page(event, block)
+        response = render(request, template, context)
+
+    return results.add_cache_headers(response, event)